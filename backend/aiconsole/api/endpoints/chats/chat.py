@@ -13,21 +13,43 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+
 from fastapi import APIRouter, Response, status
+from fastapi.responses import FileResponse
 from send2trash import send2trash
 
-from aiconsole.core.chat.load_chat_history import load_chat_history
+from aiconsole.core.chat.chat_file import get_chat_hash_path
+from aiconsole.core.chat.chat_journal import get_chat_journal_path
+from aiconsole.core.chat.locking import close_chat_actor, read_chat_outside_of_lock
 from aiconsole.core.chat.save_chat_history import save_chat_history
+from aiconsole.core.chat.tool_call_output import (
+    delete_tool_call_outputs,
+    get_tool_call_output_path,
+)
 from aiconsole.core.project.paths import get_history_directory
 
 router = APIRouter()
 
 
+def _is_file_name(name: str) -> bool:
+    return os.path.basename(name) == name and not name.startswith(".")
+
+
 @router.delete("/{chat_id}")
 async def delete_history(chat_id: str):
     file_path = get_history_directory() / f"{chat_id}.json"
     if file_path.exists():
+        await close_chat_actor(chat_id)
         send2trash(file_path)
+        journal_path = get_chat_journal_path(chat_id)
+        if journal_path.exists():
+            send2trash(journal_path)
+        hash_path = get_chat_hash_path(chat_id)
+        if hash_path.exists():
+            os.remove(hash_path)
+        if _is_file_name(chat_id):
+            delete_tool_call_outputs(chat_id)
         return Response(
             status_code=status.HTTP_200_OK,
             content="Chat history deleted successfully",
@@ -44,10 +66,43 @@ async def get_history_path(chat_id: str):
     return {"path": str(get_history_directory() / f"{chat_id}.json")}
 
 
+@router.get("/{chat_id}/tool_calls/{tool_call_id}/output")
+async def get_tool_call_output(chat_id: str, tool_call_id: str):
+    # Only the full output of a truncated tool call is kept in a file, the chat has the rest
+    if not _is_file_name(chat_id) or not _is_file_name(tool_call_id):
+        return Response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content="Tool call output not found",
+        )
+
+    file_path = get_tool_call_output_path(chat_id, tool_call_id)
+    if not file_path.exists():
+        return Response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content="Tool call output not found",
+        )
+    return FileResponse(file_path, media_type="text/plain")
+
+
+@router.get("/{chat_id}/tool_calls/{tool_call_id}/usage")
+async def get_tool_call_usage(chat_id: str, tool_call_id: str):
+    chat = await read_chat_outside_of_lock(chat_id)
+    tool_call_location = chat.get_tool_call_location(tool_call_id)
+    if not tool_call_location or not tool_call_location.tool_call.usage:
+        return Response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content="Tool call usage not found",
+        )
+    return tool_call_location.tool_call.usage
+
+
 @router.patch("/{chat_id}")
 async def chat_options(chat_id: str, chat_odj: dict):
-    chat = await load_chat_history(id=chat_id)
+    # Whole chat is written, a chat which is being worked on is taken as it's in memory, so its unsaved changes are
+    # written with it instead of being overwritten by the older state on disk
+    chat = await read_chat_outside_of_lock(chat_id)
     if chat_odj.get("name"):
         chat.name = str(chat_odj.get("name"))
-        save_chat_history(chat, scope="name")
+        chat.title_edited = True
+        save_chat_history(chat)
     return Response(status_code=status.HTTP_200_OK)
@@ -3,7 +3,7 @@ from typing import Optional
 from fastapi import APIRouter, Response, status
 from pydantic import BaseModel
 
-from aiconsole.core.chat.load_chat_history import load_chat_history
+from aiconsole.core.chat.locking import read_chat_outside_of_lock
 from aiconsole.core.chat.save_chat_history import save_chat_history
 
 router = APIRouter()
@@ -16,9 +16,11 @@ class PatchChatOptions(BaseModel):
 
 @router.patch("/{chat_id}/chat_options")
 async def chat_options(chat_id: str, chat_options: Optional[PatchChatOptions] = None):
-    chat = await load_chat_history(id=chat_id)
+    # Whole chat is written, a chat which is being worked on is taken as it's in memory, so its unsaved changes are
+    # written with it instead of being overwritten by the older state on disk
+    chat = await read_chat_outside_of_lock(chat_id)
     if chat_options:
         for field in chat_options.model_dump(exclude_unset=True):
             setattr(chat.chat_options, field, getattr(chat_options, field))
-        save_chat_history(chat, scope="chat_options")
+        save_chat_history(chat)
     return Response(status_code=status.HTTP_200_OK)
@@ -24,6 +24,9 @@ from aiconsole.core.assets.materials.content_evaluation_context import (
     ContentEvaluationContext,
 )
 from aiconsole.core.assets.materials.material import Material
+from aiconsole.core.assets.materials.render_materials_concurrently import (
+    render_material,
+)
 from aiconsole.core.assets.types import AssetLocation
 from aiconsole.core.chat.types import Chat
 from aiconsole.core.gpt.consts import SPEED_GPT_MODE
@@ -59,7 +62,7 @@ async def materials_preview(material: Material):
     )
 
     try:
-        rendered_material = await material.render(content_context)
+        rendered_material = await render_material(material, content_context)
     except ValueError as e:
         return JSONResponse(e.args[1].model_dump(exclude_none=True))
 
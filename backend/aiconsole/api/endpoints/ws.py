@@ -52,4 +52,10 @@ async def websocket_endpoint(
                 _log.exception(e)
                 _log.error(f"Error handling message: {e}")
     except WebSocketDisconnect:
+        pass
+    except RuntimeError:
+        # Connection was closed by the server, e.g. because the client could not keep up with messages
+        if not connection.is_closed:
+            raise
+    finally:
         connection_manager.disconnect(connection)
@@ -15,14 +15,33 @@
 # limitations under the License.
 """
 Connection manager for websockets. Keeps track of all active connections
+
+Every connection has its own bounded outgoing queue drained by a writer task, so a slow client does not stall the
+others nor the code that broadcasts messages.
 """
+import asyncio
+import json
 import logging
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import Callable
 
 from fastapi import WebSocket
 
 from aiconsole.api.websockets.base_server_message import BaseServerMessage
+from aiconsole.api.websockets.mutation_batcher import (
+    ChatMutationBatcher,
+    merge_mutation_messages,
+)
+from aiconsole.api.websockets.server_messages import ChatOpenedServerMessage
+from aiconsole.consts import (
+    MUTATION_BATCHING_WINDOW,
+    WEBSOCKET_COALESCE_QUEUE_SIZE,
+    WEBSOCKET_MAX_QUEUE_SIZE,
+    WEBSOCKET_SEND_TIMEOUT,
+)
+from aiconsole.core.chat.chat_mutations import ChatMutation
 
 _log = logging.getLogger(__name__)
 
@@ -33,41 +52,200 @@ class AcquiredLock:
     request_id: str
 
 
+@dataclass(frozen=True)
+class BackpressurePolicy:
+    coalesce_queue_size: int = WEBSOCKET_COALESCE_QUEUE_SIZE
+    max_queue_size: int = WEBSOCKET_MAX_QUEUE_SIZE
+    send_timeout: float = WEBSOCKET_SEND_TIMEOUT
+
+
+def serialize_server_message(msg: BaseServerMessage) -> str:
+    return json.dumps(
+        {"type": msg.get_type(), **msg.model_dump(exclude_none=True, mode="json")},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+class _OutgoingMessage:
+    def __init__(self, message: BaseServerMessage, data: str | None = None):
+        self.message = message
+        self._data = data
+
+    @property
+    def data(self) -> str:
+        if self._data is None:
+            self._data = serialize_server_message(self.message)
+        return self._data
+
+
 class AICConnection:
-    def __init__(self, websocket: WebSocket):
+    def __init__(
+        self,
+        websocket: WebSocket,
+        backpressure_policy: BackpressurePolicy = BackpressurePolicy(),
+        on_close: Callable[["AICConnection"], None] | None = None,
+    ):
         self.websocket = websocket
         self.open_chats_ids: set[str] = set()
         self.acquired_locks: list[AcquiredLock] = []
+        self.is_closed = False
+
+        self._backpressure_policy = backpressure_policy
+        self._on_close = on_close
+        self._outgoing: deque[_OutgoingMessage] = deque()
+        self._has_outgoing = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_outgoing())
 
     async def send(self, msg: BaseServerMessage):
-        await self.websocket.send_json({"type": msg.get_type(), **msg.model_dump(exclude_none=True, mode="json")})
+        if isinstance(msg, ChatOpenedServerMessage):
+            # Opened chat is a live object which can be changed before the writer gets to it
+            self.enqueue(_OutgoingMessage(msg, serialize_server_message(msg)))
+        else:
+            self.enqueue(_OutgoingMessage(msg))
+
+    def enqueue(self, outgoing: _OutgoingMessage):
+        if self.is_closed:
+            return
+
+        if len(self._outgoing) >= self._backpressure_policy.coalesce_queue_size:
+            # Client is lagging behind, merge streamed mutations instead of queueing each of them
+            merged = merge_mutation_messages(self._outgoing[-1].message, outgoing.message)
+            if merged is not None:
+                self._outgoing[-1] = _OutgoingMessage(merged)
+                return
+
+        if len(self._outgoing) >= self._backpressure_policy.max_queue_size:
+            _log.warning(f"Client is not receiving messages, {len(self._outgoing)} messages queued, disconnecting")
+            self.close()
+            return
+
+        self._outgoing.append(outgoing)
+        self._has_outgoing.set()
+
+    def close(self):
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+        self._outgoing.clear()
+
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+        asyncio.create_task(self._close_websocket())
+
+        if self._on_close:
+            self._on_close(self)
+
+    async def _close_websocket(self):
+        try:
+            await self.websocket.close(code=1013)  # Try again later
+        except Exception as e:
+            _log.debug(f"Error during closing websocket: {e}")
+
+    async def _write_outgoing(self):
+        while not self.is_closed:
+            if not self._outgoing:
+                self._has_outgoing.clear()
+                await self._has_outgoing.wait()
+                continue
+
+            outgoing = self._outgoing.popleft()
+
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(outgoing.data), timeout=self._backpressure_policy.send_timeout
+                )
+            except asyncio.TimeoutError:
+                _log.warning("Client did not receive a message in time, disconnecting")
+                self.close()
+            except Exception as e:
+                _log.info(f"Could not send message, disconnecting: {e}")
+                self.close()
 
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, backpressure_policy: BackpressurePolicy = BackpressurePolicy()):
         self.active_connections: list[AICConnection] = []
+        self._backpressure_policy = backpressure_policy
+        self._chat_connections: dict[str, set[AICConnection]] = defaultdict(set)
+        self._mutation_batcher = ChatMutationBatcher(self._send_to_chat, window=MUTATION_BATCHING_WINDOW)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        connection = AICConnection(websocket)
+        connection = AICConnection(websocket, self._backpressure_policy, on_close=self.disconnect)
+        connection.start()
         self.active_connections.append(connection)
         _log.info("Connected")
         return connection
 
     def disconnect(self, connection: AICConnection):
+        if connection not in self.active_connections:
+            return
+
         self.active_connections.remove(connection)
+        for chat_id in connection.open_chats_ids:
+            self._remove_chat_connection(chat_id, connection)
+        connection.close()
         _log.info("Disconnected")
 
+    def open_chat(self, connection: AICConnection, chat_id: str):
+        connection.open_chats_ids.add(chat_id)
+        self._chat_connections[chat_id].add(connection)
+
+    def close_chat(self, connection: AICConnection, chat_id: str):
+        connection.open_chats_ids.discard(chat_id)
+        self._remove_chat_connection(chat_id, connection)
+
+    def _remove_chat_connection(self, chat_id: str, connection: AICConnection):
+        connections = self._chat_connections.get(chat_id)
+        if connections is None:
+            return
+
+        connections.discard(connection)
+        if not connections:
+            del self._chat_connections[chat_id]
+
+    async def send_mutation_to_chat(
+        self, request_id: str, chat_id: str, mutation: ChatMutation, except_connection: AICConnection | None = None
+    ):
+        await self._mutation_batcher.add(request_id, chat_id, mutation, except_connection)
+
+    async def flush_mutations(self, chat_id: str):
+        await self._mutation_batcher.flush(chat_id)
+
     async def send_to_chat(
         self, message: BaseServerMessage, chat_id: str, except_connection: AICConnection | None = None
     ):
-        for connection in self.active_connections:
-            if chat_id in connection.open_chats_ids and except_connection != connection:
-                await connection.send(message)
+        # Mutations gathered so far happened before this message
+        await self._mutation_batcher.flush(chat_id)
+        await self._send_to_chat(message, chat_id, except_connection)
 
     async def send_to_all(self, message: BaseServerMessage):
+        await self._mutation_batcher.flush_all()
+
+        outgoing = _OutgoingMessage(message, serialize_server_message(message))
         for connection in self.active_connections:
-            await connection.send(message)
+            connection.enqueue(outgoing)
+
+    async def _send_to_chat(
+        self, message: BaseServerMessage, chat_id: str, except_connection: AICConnection | None = None
+    ):
+        connections = [
+            connection for connection in self._chat_connections.get(chat_id, ()) if connection != except_connection
+        ]
+
+        if not connections:
+            return
+
+        # Serialized once, no matter how many clients have the chat open
+        outgoing = _OutgoingMessage(message, serialize_server_message(message))
+        for connection in connections:
+            connection.enqueue(outgoing)
 
 
 @lru_cache
@@ -53,7 +53,7 @@ from aiconsole.core.chat.locking import (
     acquire_lock,
     release_lock,
 )
-from aiconsole.core.code_running.run_code import reset_code_interpreters
+from aiconsole.core.code_running.run_code import stop_code_interpreters
 from aiconsole.core.code_running.virtual_env.create_dedicated_venv import (
     WaitForEnvEvent,
 )
@@ -147,7 +147,9 @@ async def _handle_open_chat_ws_message(connection: AICConnection, json: dict):
     message = OpenChatClientMessage(**json)
 
     try:
-        connection.open_chats_ids.add(message.chat_id)
+        # Mutations waiting to be broadcast are already part of the chat this connection is going to read
+        await connection_manager().flush_mutations(message.chat_id)
+        connection_manager().open_chat(connection, message.chat_id)
 
         chat_mutator = SequentialChatMutator(
             DefaultChatMutator(
@@ -188,7 +190,7 @@ async def _handle_stop_chat_ws_message(connection: AICConnection, json: dict):
     message: StopChatClientMessage | None = None
     try:
         message = StopChatClientMessage(**json)
-        reset_code_interpreters(chat_id=message.chat_id)
+        stop_code_interpreters(chat_id=message.chat_id)
         for task in _running_tasks[message.chat_id].values():
             task.cancel()
         await connection.send(
@@ -207,7 +209,7 @@ async def _handle_stop_chat_ws_message(connection: AICConnection, json: dict):
 
 async def _handle_close_chat_ws_message(connection: AICConnection, json: dict):
     message = CloseChatClientMessage(**json)
-    connection.open_chats_ids.discard(message.chat_id)
+    connection_manager().close_chat(connection, message.chat_id)
 
 
 async def _handle_init_chat_mutation_ws_message(connection: AICConnection | None, json: dict):
@@ -0,0 +1,151 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Gathers chat mutations broadcast during a short window into a single websocket message.
+
+While a response is streamed, every chunk produces a separate mutation. Consecutive append mutations of the same
+field are merged, so a window worth of streamed tokens is serialized and sent only once.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from aiconsole.api.websockets.base_server_message import BaseServerMessage
+from aiconsole.api.websockets.server_messages import (
+    BatchedMutationsServerMessage,
+    NotifyAboutChatMutationServerMessage,
+)
+from aiconsole.core.chat.chat_mutations import ChatMutation
+from aiconsole.core.chat.merge_mutations import merge_append_mutations
+
+if TYPE_CHECKING:
+    from aiconsole.api.websockets.connection_manager import AICConnection
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingBatch:
+    request_id: str
+    except_connection: "AICConnection | None"
+    mutations: list[ChatMutation] = field(default_factory=list)
+    flush_task: asyncio.Task | None = None
+
+
+class ChatMutationBatcher:
+    def __init__(
+        self,
+        send: Callable[[BaseServerMessage, str, "AICConnection | None"], Awaitable[None]],
+        window: float,
+    ):
+        self._send = send
+        self._window = window
+        self._batches: dict[str, _PendingBatch] = {}
+
+    async def add(
+        self, request_id: str, chat_id: str, mutation: ChatMutation, except_connection: "AICConnection | None"
+    ) -> None:
+        batch = self._batches.get(chat_id)
+
+        # Mutations of other requests or origins are sent separately, keeping the order
+        if batch and (batch.request_id != request_id or batch.except_connection is not except_connection):
+            await self.flush(chat_id)
+            batch = None
+
+        if batch is None:
+            batch = _PendingBatch(request_id=request_id, except_connection=except_connection)
+            batch.flush_task = asyncio.create_task(self._flush_later(chat_id))
+            self._batches[chat_id] = batch
+
+        merged = merge_append_mutations(batch.mutations[-1], mutation) if batch.mutations else None
+        if merged is not None:
+            batch.mutations[-1] = merged
+        else:
+            batch.mutations.append(mutation)
+
+    async def flush(self, chat_id: str) -> None:
+        batch = self._batches.pop(chat_id, None)
+
+        if batch is None:
+            return
+
+        if batch.flush_task and batch.flush_task is not asyncio.current_task():
+            batch.flush_task.cancel()
+
+        message: BaseServerMessage
+        if len(batch.mutations) == 1:
+            message = NotifyAboutChatMutationServerMessage(
+                request_id=batch.request_id, chat_id=chat_id, mutation=batch.mutations[0]
+            )
+        else:
+            message = BatchedMutationsServerMessage(
+                request_id=batch.request_id, chat_id=chat_id, mutations=batch.mutations
+            )
+
+        await self._send(message, chat_id, batch.except_connection)
+
+    async def flush_all(self) -> None:
+        for chat_id in list(self._batches):
+            await self.flush(chat_id)
+
+    async def _flush_later(self, chat_id: str) -> None:
+        await asyncio.sleep(self._window)
+        try:
+            await self.flush(chat_id)
+        except Exception as e:
+            _log.exception(f"Error during sending mutations of chat {chat_id}: {e}")
+
+
+def _get_mutations(message: BaseServerMessage) -> list[ChatMutation] | None:
+    if isinstance(message, NotifyAboutChatMutationServerMessage):
+        return [message.mutation]
+    if isinstance(message, BatchedMutationsServerMessage):
+        return message.mutations
+    return None
+
+
+def merge_mutation_messages(
+    previous: BaseServerMessage, message: BaseServerMessage
+) -> BatchedMutationsServerMessage | None:
+    """
+    Merges two consecutive mutation messages of the same chat and request into one batch.
+
+    Returns None if the messages can not be merged.
+    """
+
+    previous_mutations = _get_mutations(previous)
+    mutations = _get_mutations(message)
+
+    if previous_mutations is None or mutations is None:
+        return None
+
+    if previous.chat_id != message.chat_id or previous.request_id != message.request_id:  # type: ignore
+        return None
+
+    merged_mutations = list(previous_mutations)
+    for mutation in mutations:
+        merged = merge_append_mutations(merged_mutations[-1], mutation) if merged_mutations else None
+        if merged is not None:
+            merged_mutations[-1] = merged
+        else:
+            merged_mutations.append(mutation)
+
+    return BatchedMutationsServerMessage(
+        request_id=message.request_id, chat_id=message.chat_id, mutations=merged_mutations  # type: ignore
+    )
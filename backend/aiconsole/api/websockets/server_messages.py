@@ -79,6 +79,25 @@ class NotifyAboutChatMutationServerMessage(BaseServerMessage):
         }
 
 
+class BatchedMutationsServerMessage(BaseServerMessage):
+    request_id: str
+    chat_id: str
+    mutations: list[ChatMutation]
+
+    def model_dump(self, **kwargs):
+        # include type of each mutation in the dump of "mutations"
+        return {
+            **super().model_dump(**kwargs),
+            "mutations": [
+                {
+                    **mutation.model_dump(**kwargs),
+                    "type": mutation.__class__.__name__,
+                }
+                for mutation in self.mutations
+            ],
+        }
+
+
 class ResponseServerMessage(BaseServerMessage):
     request_id: str
     payload: dict
@@ -93,5 +112,11 @@ class ResponseServerMessage(BaseServerMessage):
         super().__init__(**{"request_id": request_id, "payload": payload, "is_error": is_error})
 
 
+class CodeExecutionQueueServerMessage(BaseServerMessage):
+    chat_id: str
+    tool_call_id: str
+    position: int | None  # None when the code is no longer waiting
+
+
 class ChatOpenedServerMessage(BaseServerMessage):
     chat: Chat
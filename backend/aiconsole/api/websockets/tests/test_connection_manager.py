@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+from aiconsole.api.websockets.connection_manager import (
+    BackpressurePolicy,
+    ConnectionManager,
+)
+from aiconsole.api.websockets.server_messages import (
+    NotificationServerMessage,
+    NotifyAboutChatMutationServerMessage,
+)
+from aiconsole.core.chat.chat_mutations import AppendToContentMessageMutation
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent: list[dict] = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+def _append(delta: str) -> NotifyAboutChatMutationServerMessage:
+    return NotifyAboutChatMutationServerMessage(
+        request_id="request",
+        chat_id="chat",
+        mutation=AppendToContentMessageMutation(message_id="message", content_delta=delta),
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_client_should_not_delay_other_clients():
+    manager = ConnectionManager()
+    slow_websocket, fast_websocket = FakeWebSocket(delay=10), FakeWebSocket()
+
+    for websocket in (slow_websocket, fast_websocket):
+        connection = await manager.connect(websocket)  # type: ignore
+        manager.open_chat(connection, "chat")
+
+    await asyncio.wait_for(manager.send_to_chat(NotificationServerMessage(title="a", message="b"), "chat"), 0.1)
+    await asyncio.sleep(0.01)
+
+    assert fast_websocket.sent == [{"type": "NotificationServerMessage", "title": "a", "message": "b"}]
+    assert slow_websocket.sent == []
+
+    for connection in list(manager.active_connections):
+        manager.disconnect(connection)
+    await asyncio.sleep(0)
+
+    assert manager._chat_connections == {}
+
+
+@pytest.mark.asyncio
+async def test_should_coalesce_deltas_for_lagging_client_and_disconnect_hopeless_one():
+    manager = ConnectionManager(BackpressurePolicy(coalesce_queue_size=2, max_queue_size=3, send_timeout=1))
+    lagging_websocket = FakeWebSocket(delay=0.05)
+    connection = await manager.connect(lagging_websocket)  # type: ignore
+    manager.open_chat(connection, "chat")
+
+    for delta in "abcdef":
+        await manager.send_to_chat(_append(delta), "chat")
+
+    await asyncio.sleep(0.3)
+
+    assert (
+        "".join(
+            mutation["content_delta"]
+            for message in lagging_websocket.sent
+            for mutation in message.get("mutations", [message.get("mutation")])
+        )
+        == "abcdef"
+    )
+    assert len(lagging_websocket.sent) < 6
+
+    for i in range(5):
+        await manager.send_to_chat(NotificationServerMessage(title="a", message=str(i)), "chat")
+
+    assert connection.is_closed
+    assert connection not in manager.active_connections
+    assert manager._chat_connections == {}
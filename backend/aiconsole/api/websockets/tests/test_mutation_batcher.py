@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from aiconsole.api.websockets.mutation_batcher import ChatMutationBatcher
+from aiconsole.api.websockets.server_messages import (
+    BatchedMutationsServerMessage,
+    NotifyAboutChatMutationServerMessage,
+)
+from aiconsole.core.chat.chat_mutations import (
+    AppendToCodeToolCallMutation,
+    AppendToContentMessageMutation,
+    SetIsStreamingMessageMutation,
+)
+
+
+@pytest.mark.asyncio
+async def test_should_coalesce_streamed_deltas_into_single_message():
+    sent = []
+
+    async def send(message, chat_id, except_connection):
+        sent.append(message)
+
+    batcher = ChatMutationBatcher(send, window=0.01)
+
+    for i in range(100):
+        await batcher.add(
+            "request", "chat", AppendToContentMessageMutation(message_id="m", content_delta=f"{i} "), None
+        )
+    await batcher.add("request", "chat", SetIsStreamingMessageMutation(message_id="m", is_streaming=False), None)
+    await batcher.add("request", "chat", AppendToCodeToolCallMutation(tool_call_id="t", code_delta="a"), None)
+    await batcher.add("request", "chat", AppendToCodeToolCallMutation(tool_call_id="t", code_delta="b"), None)
+
+    assert sent == []
+
+    await asyncio.sleep(0.05)
+
+    assert len(sent) == 1
+    message = sent[0]
+    assert isinstance(message, BatchedMutationsServerMessage)
+    assert [mutation.type for mutation in message.mutations] == [
+        "AppendToContentMessageMutation",
+        "SetIsStreamingMessageMutation",
+        "AppendToCodeToolCallMutation",
+    ]
+    assert message.mutations[0].content_delta == "".join(f"{i} " for i in range(100))
+    assert message.mutations[2].code_delta == "ab"
+
+
+@pytest.mark.asyncio
+async def test_should_keep_order_of_mutations_from_different_requests():
+    sent = []
+
+    async def send(message, chat_id, except_connection):
+        sent.append(message)
+
+    batcher = ChatMutationBatcher(send, window=10)
+
+    await batcher.add("request_1", "chat", AppendToContentMessageMutation(message_id="m", content_delta="a"), None)
+    await batcher.add("request_2", "chat", AppendToContentMessageMutation(message_id="m", content_delta="b"), None)
+    await batcher.flush("chat")
+
+    assert [message.request_id for message in sent] == ["request_1", "request_2"]
+    assert all(isinstance(message, NotifyAboutChatMutationServerMessage) for message in sent)
@@ -24,6 +24,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from aiconsole.api.routers import app_router
 from aiconsole.consts import log_config
+from aiconsole.core.chat.locking import close_chat_actors
 from aiconsole.core.project.paths import get_project_directory_safe
 from aiconsole.core.settings.fs.settings_file_storage import SettingsFileStorage
 from aiconsole.core.settings.settings import settings
@@ -42,6 +43,7 @@ logger = getLogger(__name__)
 async def lifespan(app: FastAPI):
     settings().configure(SettingsFileStorage(project_path=get_project_directory_safe()))
     yield
+    await close_chat_actors()
 
 
 def app():
@@ -47,12 +47,53 @@ def AICONSOLE_USER_CONFIG_DIR() -> Path:
 
 HISTORY_LIMIT: int = 1000
 COMMANDS_HISTORY_JSON: str = "command_history.json"
+CHAT_HEADLINES_INDEX_JSON: str = "chat_headlines.json"
+CHAT_HEADLINES_INDEX_WRITE_DELAY: float = 1.0  # Seconds changes to the index are collected for before it's written
 
 DIRECTOR_MIN_TOKENS: int = 250
 DIRECTOR_PREFERRED_TOKENS: int = 1000
 
 MAX_RECENT_PROJECTS = 8
 
+# Chat mutations are appended to a per chat journal instead of rewriting the whole chat file on every save
+CHAT_JOURNAL_ENABLED: bool = True
+CHAT_JOURNAL_FLUSH_EVERY: int = 50  # Number of (coalesced) mutations kept in memory before appending to the journal
+CHAT_JOURNAL_COMPACTION_SIZE: int = 1024 * 1024  # Journal size in bytes after which it's compacted into the snapshot
+
+# Recently used chats are kept parsed in memory
+CHAT_CACHE_SIZE: int = 16  # Number of chats
+CHAT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Total size of their files
+
+RENDERED_MATERIAL_CACHE_SIZE: int = 256  # Number of static and API materials kept rendered
+COMPILED_CODE_CACHE_SIZE: int = 256  # Number of dynamic and API material sources kept compiled and executed
+MATERIAL_RENDER_CONCURRENCY: int = 8  # Materials of a single prompt rendered at the same time
+MATERIAL_RENDER_TIMEOUT: float = 30.0  # Seconds a single material can take to render
+
+CODE_EXECUTION_CONCURRENCY: int = 4  # Code executions of all chats running at the same time, one per chat
+CODE_EXECUTION_TIMEOUT: float | None = 30 * 60.0  # Seconds a single execution can run before it's interrupted
+
+# Limits of code interpreter processes (POSIX only), an interpreter which goes above them is restarted
+KERNEL_CPU_TIME_LIMIT: int | None = None  # Seconds of CPU time an interpreter process can use over its life
+KERNEL_MEMORY_LIMIT: int | None = None  # Bytes of data memory (rlimit) and of peak RSS after an execution
+
+# Python kernels are started ahead of time, so chats don't wait for them when they first run code
+KERNEL_POOL_SIZE: int = 2  # Kernels kept started and ready to be handed out
+KERNEL_IDLE_TTL: float = 30 * 60.0  # Seconds without running code after which the kernel of a chat is shut down
+KERNEL_REAP_INTERVAL: float = 60.0  # Seconds between checks for idle kernels
+KERNEL_INTERRUPT_TIMEOUT: float = 5.0  # Seconds an interrupted kernel has to finish the code it was running
+KERNEL_LIVENESS_CHECK_INTERVAL: float = 1.0  # Seconds without output after which the kernel is checked to be alive
+
+# Output of a tool call above this size keeps only its head and tail in the chat, the full one is in .aic/outputs
+TOOL_CALL_OUTPUT_MAX_SIZE: int = 20_000  # Characters
+TOOL_CALL_OUTPUT_REFRESH_INTERVAL: float = 0.5  # Seconds between updates of a truncated output sent to the chat
+
+MUTATION_BATCHING_WINDOW: float = 0.03  # Seconds during which chat mutations are gathered into one websocket message
+
+# Backpressure of websocket clients which can't keep up with the messages sent to them
+WEBSOCKET_COALESCE_QUEUE_SIZE: int = 100  # Queued messages above which mutation messages are merged together
+WEBSOCKET_MAX_QUEUE_SIZE: int = 1000  # Queued messages above which the client is disconnected
+WEBSOCKET_SEND_TIMEOUT: float = 30.0  # Seconds a single send can take before the client is disconnected
+
 
 LOG_FORMAT: str = "{name} {funcName} {message}"
 LOG_STYLE: str = "{"
@@ -25,6 +25,10 @@ from aiconsole.core.assets.fs.delete_asset_from_fs import delete_asset_from_fs
 from aiconsole.core.assets.fs.move_asset_in_fs import move_asset_in_fs
 from aiconsole.core.assets.fs.project_asset_exists_fs import project_asset_exists_fs
 from aiconsole.core.assets.fs.save_asset_to_fs import save_asset_to_fs
+from aiconsole.core.assets.materials.compiled_code_cache import compiled_code_cache
+from aiconsole.core.assets.materials.rendered_material_cache import (
+    rendered_material_cache,
+)
 from aiconsole.core.assets.types import Asset, AssetLocation, AssetStatus, AssetType
 from aiconsole.core.project import project
 from aiconsole.core.project.paths import get_project_assets_directory
@@ -144,6 +148,10 @@ class Assets:
 
         self._assets = await load_all_assets(self.asset_type)
 
+        if self.asset_type == AssetType.MATERIAL:
+            rendered_material_cache().clear()
+            compiled_code_cache().clear()
+
         await connection_manager().send_to_all(
             AssetsUpdatedServerMessage(
                 initial=(
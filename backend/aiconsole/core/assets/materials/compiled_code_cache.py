@@ -0,0 +1,97 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory cache of compiled and executed code of dynamic and API materials.
+
+An entry is keyed by the hash of the source, so an edited material gets a new one. Dynamic materials only reuse the
+code object and execute it into fresh globals on every render, their top level code may depend on the time of the
+render and renders must not share state. API materials are only inspected for their documentation, so their module is
+executed once and reused. The cache is cleared when materials are reloaded.
+"""
+
+import hashlib
+import importlib.util
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType, ModuleType
+
+from aiconsole.consts import COMPILED_CODE_CACHE_SIZE
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class _CompiledCodeCacheEntry:
+    code: CodeType
+    module: ModuleType | None = None
+
+
+class CompiledCodeCache:
+    def __init__(self, max_size: int = COMPILED_CODE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], _CompiledCodeCacheEntry] = OrderedDict()
+
+    def compile(self, source: str, filename: str) -> CodeType:
+        return self._get_entry(source, filename).code
+
+    def module(self, source: str, module_name: str) -> ModuleType:
+        """
+        Module with the source executed in it.
+        """
+
+        entry = self._get_entry(source, module_name)
+        if entry.module is None:
+            spec = importlib.util.spec_from_loader(module_name, loader=None)
+
+            if not spec:
+                raise Exception(f"Could not create spec for {module_name}")
+
+            module = importlib.util.module_from_spec(spec)
+            exec(entry.code, module.__dict__)
+            entry.module = module
+        return entry.module
+
+    def clear(self) -> None:
+        if self._entries:
+            _log.debug(f"Clearing {len(self._entries)} compiled sources")
+        self._entries.clear()
+
+    def _get_entry(self, source: str, filename: str) -> _CompiledCodeCacheEntry:
+        key = (hashlib.blake2b(source.encode(), digest_size=16).hexdigest(), filename)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = _CompiledCodeCacheEntry(code=compile(source, filename, "exec"))
+        self._entries[key] = entry
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        return entry
+
+
+@lru_cache
+def compiled_code_cache() -> CompiledCodeCache:
+    return CompiledCodeCache()
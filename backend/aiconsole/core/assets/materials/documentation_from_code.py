@@ -14,11 +14,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import importlib.util
 import inspect
 import logging
 from typing import TYPE_CHECKING
 
+from aiconsole.core.assets.materials.compiled_code_cache import compiled_code_cache
+
 if TYPE_CHECKING:
     from aiconsole.core.assets.materials.material import Material
 
@@ -31,20 +32,8 @@ def documentation_from_code(material: "Material", source: str):
     """
 
     def create_content(context):
-        # Create a new module
-        spec = importlib.util.spec_from_loader("temp_module", loader=None)
-
-        if not spec:
-            raise Exception("Could not create spec for temp_module")
-
-        # Load the new module into memory
-        python_module = importlib.util.module_from_spec(spec)
-
-        # Compile the source into a code object that can be executed by exec()
-        code_object = compile(source, "temp_module", "exec")
-
-        # Define a new, blank namespace and execute the code object within it
-        exec(code_object, python_module.__dict__)
+        # Module with the source compiled and executed in it, done once for the same source
+        python_module = compiled_code_cache().module(source, "temp_module")
 
         function_list = []
         for name, obj in inspect.getmembers(python_module):
@@ -16,12 +16,17 @@
 import traceback
 from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+from aiconsole.core.assets.materials.compiled_code_cache import compiled_code_cache
 from aiconsole.core.assets.materials.documentation_from_code import (
     documentation_from_code,
 )
 from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
+from aiconsole.core.assets.materials.rendered_material_cache import (
+    rendered_material_cache,
+)
 from aiconsole.core.assets.types import Asset, AssetLocation, AssetStatus, AssetType
 from aiconsole.utils.events import InternalEvent, internal_events
 
@@ -58,8 +63,8 @@ class Material(Asset):
         return hash(self.id + self.version + self.name + self.usage + self.content_type + self.content)
 
     @property
-    def inlined_content(self):
-        # if starts with file:// then load the file, take into account file://./relative paths
+    def content_file_path(self) -> Path | None:
+        # if starts with file:// then it's in a file, take into account file://./relative paths
         if self.content.startswith("file://"):
             content_file = self.content[len("file://") :]
 
@@ -83,7 +88,15 @@ class Material(Asset):
             else:
                 base_search_path = core_resource_path
 
-            with open(base_search_path / content_file, "r", encoding="utf8", errors="replace") as file:
+            return base_search_path / content_file
+
+        return None
+
+    @property
+    def inlined_content(self):
+        content_file_path = self.content_file_path
+        if content_file_path:
+            with open(content_file_path, "r", encoding="utf8", errors="replace") as file:
                 return file.read()
 
         return self.content
@@ -91,21 +104,29 @@ class Material(Asset):
     async def render(self, context: "ContentEvaluationContext"):
         header = f"# {self.name}\n\n"
 
+        # Static and API materials don't depend on the context, so they are rendered once per content
         match self.content_type:
             case MaterialContentType.STATIC_TEXT:
-                return RenderedMaterial(id=self.id, content=header + self.inlined_content, error="")
+                rendered_material = rendered_material_cache().get(self)
+                if rendered_material is None:
+                    rendered_material = RenderedMaterial(id=self.id, content=header + self.inlined_content, error="")
+                    rendered_material_cache().put(self, rendered_material)
+                return rendered_material
             case MaterialContentType.DYNAMIC_TEXT:
                 return await self._handle_dynamic_text_content(context, header)
             case MaterialContentType.API:
-                return await self._handle_api_content(context, header)
+                rendered_material = rendered_material_cache().get(self)
+                if rendered_material is None:
+                    rendered_material = await self._handle_api_content(context, header)
+                    rendered_material_cache().put(self, rendered_material)
+                return rendered_material
             case _:
                 raise ValueError("Material has no content")
 
     async def _handle_dynamic_text_content(self, context, header):
         try:
-            source_code = compile(self.inlined_content, "<string>", "exec")
-            local_vars = {}
-            exec(source_code, local_vars)
+            local_vars: dict = {}
+            exec(compiled_code_cache().compile(self.inlined_content, "<string>"), local_vars)
             content_func = local_vars.get("content")
             if callable(content_func):
                 content = await content_func(context)
@@ -113,14 +134,17 @@ class Material(Asset):
             else:
                 raise ValueError("No callable content function found!")
         except Exception:
-            await internal_events().emit(MaterialRenderErrorEvent(), details=f"Error in DYNAMIC_TEXT material `{self.id}`")
+            await internal_events().emit(
+                MaterialRenderErrorEvent(), details=f"Error in DYNAMIC_TEXT material `{self.id}`"
+            )
             error_details = RenderedMaterial(id=self.id, content="", error=traceback.format_exc())
             raise ValueError("Error in Dynamic Note material", error_details)
 
     async def _handle_api_content(self, context, header):
         try:
-            compile(self.inlined_content, "temp_module", "exec")
-            content = documentation_from_code(self, self.inlined_content)(context)
+            source = self.inlined_content
+            compiled_code_cache().compile(source, "temp_module")
+            content = documentation_from_code(self, source)(context)
             return RenderedMaterial(id=self.id, content=header + content, error="")
         except Exception:
             await internal_events().emit(MaterialRenderErrorEvent(), details=f"Error in API material `{self.id}`")
@@ -0,0 +1,111 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from aiconsole.consts import MATERIAL_RENDER_CONCURRENCY, MATERIAL_RENDER_TIMEOUT
+from aiconsole.core.assets.materials.material import Material, MaterialRenderErrorEvent
+from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
+from aiconsole.utils.events import internal_events
+
+if TYPE_CHECKING:
+    from aiconsole.core.assets.materials.content_evaluation_context import (
+        ContentEvaluationContext,
+    )
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class MaterialRenderMetrics:
+    renders: int = 0
+    timeouts: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+
+    def record(self, duration: float) -> None:
+        self.renders += 1
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+
+# By material id, to find the ones which are slow to render
+material_render_metrics: dict[str, MaterialRenderMetrics] = defaultdict(MaterialRenderMetrics)
+
+
+async def render_material(
+    material: Material,
+    content_context: "ContentEvaluationContext",
+    semaphore: asyncio.Semaphore | None = None,
+    timeout: float = MATERIAL_RENDER_TIMEOUT,
+) -> RenderedMaterial:
+    """
+    Renders a material within the timeout, if a semaphore is given only when it is acquired.
+    """
+
+    if semaphore:
+        async with semaphore:
+            return await render_material(material, content_context, timeout=timeout)
+
+    metrics = material_render_metrics[material.id]
+    start = time.monotonic()
+
+    try:
+        rendered_material = await asyncio.wait_for(material.render(content_context), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.timeouts += 1
+        _log.warning(f"Material {material.id} did not render in {timeout}s")
+        await internal_events().emit(
+            MaterialRenderErrorEvent(), details=f"Material `{material.id}` did not render in {timeout}s"
+        )
+        error_details = RenderedMaterial(id=material.id, content="", error=f"Rendering timed out after {timeout}s")
+        raise ValueError("Material rendering timed out", error_details)
+    finally:
+        duration = time.monotonic() - start
+        metrics.record(duration)
+        _log.debug(f"Material {material.id} rendered in {duration:.3f}s")
+
+    return rendered_material
+
+
+async def render_materials_concurrently(
+    materials: list[Material],
+    content_context: "ContentEvaluationContext",
+    max_concurrency: int = MATERIAL_RENDER_CONCURRENCY,
+    timeout: float = MATERIAL_RENDER_TIMEOUT,
+) -> list[RenderedMaterial]:
+    """
+    Renders materials at the same time, returns them in the order they were given.
+
+    If rendering fails for any of them, the error of the first such material is raised once all are done.
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    results = await asyncio.gather(
+        *(render_material(material, content_context, semaphore, timeout) for material in materials),
+        return_exceptions=True,
+    )
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return [result for result in results if isinstance(result, RenderedMaterial)]
@@ -0,0 +1,89 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory cache of rendered static and API materials.
+
+Rendering them reads content files from disk, and for API materials executes and inspects their code, while the result
+depends only on the material itself. An entry is keyed by the hash of the material and the modification time of its
+content file, so edits of either make a new one. The cache is cleared when materials are reloaded.
+"""
+
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from aiconsole.consts import RENDERED_MATERIAL_CACHE_SIZE
+from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
+
+if TYPE_CHECKING:
+    from aiconsole.core.assets.materials.material import Material
+
+_log = logging.getLogger(__name__)
+
+CacheKey = tuple[str, int, int | None]
+
+
+def _get_cache_key(material: "Material") -> CacheKey:
+    content_file_path = material.content_file_path
+
+    mtime = None
+    if content_file_path:
+        try:
+            mtime = content_file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+
+    return (material.id, hash(material), mtime)
+
+
+class RenderedMaterialCache:
+    def __init__(self, max_size: int = RENDERED_MATERIAL_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, RenderedMaterial] = OrderedDict()
+
+    def get(self, material: "Material") -> RenderedMaterial | None:
+        key = _get_cache_key(material)
+
+        rendered_material = self._entries.get(key)
+        if rendered_material is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return rendered_material.model_copy()
+
+    def put(self, material: "Material", rendered_material: RenderedMaterial) -> None:
+        key = _get_cache_key(material)
+
+        self._entries[key] = rendered_material.model_copy()
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        if self._entries:
+            _log.debug(f"Clearing {len(self._entries)} rendered materials")
+        self._entries.clear()
+
+
+@lru_cache
+def rendered_material_cache() -> RenderedMaterialCache:
+    return RenderedMaterialCache()
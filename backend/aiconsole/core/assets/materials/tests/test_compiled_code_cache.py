@@ -0,0 +1,47 @@
+from aiconsole.core.assets.materials.compiled_code_cache import CompiledCodeCache
+
+
+def test_changed_source_is_compiled_again():
+    cache = CompiledCodeCache()
+
+    cache.compile("x = 1", "temp_module")
+    cache.compile("x = 1", "temp_module")
+    cache.compile("x = 2", "temp_module")
+
+    assert cache.misses == 2
+    assert cache.hits == 1
+
+
+def test_module_is_reused():
+    cache = CompiledCodeCache()
+    source = "def f():\n    return 1\n"
+
+    module = cache.module(source, "temp_module")
+
+    assert module.__name__ == "temp_module"
+    assert module.f.__module__ == "temp_module"
+    assert cache.module(source, "temp_module") is module
+
+
+def test_least_recently_used_source_is_evicted():
+    cache = CompiledCodeCache(max_size=2)
+
+    cache.compile("a = 1", "<string>")
+    cache.compile("b = 1", "<string>")
+    cache.compile("a = 1", "<string>")
+    cache.compile("c = 1", "<string>")
+    cache.compile("a = 1", "<string>")
+    cache.compile("b = 1", "<string>")
+
+    assert cache.hits == 2
+    assert cache.misses == 4
+
+
+def test_clear():
+    cache = CompiledCodeCache()
+    cache.compile("a = 1", "<string>")
+
+    cache.clear()
+    cache.compile("a = 1", "<string>")
+
+    assert cache.misses == 2
@@ -0,0 +1,91 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.assets.agents.agent import AICAgent
+from aiconsole.core.assets.materials.content_evaluation_context import (
+    ContentEvaluationContext,
+)
+from aiconsole.core.assets.materials.material import Material, MaterialContentType
+from aiconsole.core.assets.materials.render_materials_concurrently import (
+    material_render_metrics,
+    render_materials_concurrently,
+)
+from aiconsole.core.assets.types import AssetLocation
+from aiconsole.core.chat.types import Chat
+
+RENDER_TIME = 0.1
+
+
+def _material(material_id: str, render_time: float = RENDER_TIME) -> Material:
+    return Material(
+        id=material_id,
+        name=material_id,
+        usage="",
+        usage_examples=[],
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+        content_type=MaterialContentType.DYNAMIC_TEXT,
+        content=f"import asyncio\n\nasync def content(context):\n    await asyncio.sleep({render_time})\n    return 'Done'",
+    )
+
+
+def _context() -> ContentEvaluationContext:
+    agent = AICAgent(
+        id="agent",
+        name="Agent",
+        usage="",
+        usage_examples=[],
+        system="",
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+    )
+    chat = Chat(id="chat", name="", last_modified=datetime.now(), title_edited=False, message_groups=[])
+    return ContentEvaluationContext(chat=chat, agent=agent, gpt_mode=agent.gpt_mode, relevant_materials=[])
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    material_render_metrics.clear()
+    yield
+    material_render_metrics.clear()
+
+
+@pytest.mark.asyncio
+async def test_materials_are_rendered_concurrently_in_order():
+    materials = [_material(f"material_{i}") for i in range(4)]
+
+    start = time.monotonic()
+    rendered_materials = await render_materials_concurrently(materials, _context(), max_concurrency=4)
+    duration = time.monotonic() - start
+
+    assert [rendered_material.id for rendered_material in rendered_materials] == [m.id for m in materials]
+    assert duration < 2 * RENDER_TIME
+    assert material_render_metrics["material_0"].renders == 1
+    assert material_render_metrics["material_0"].max_duration >= RENDER_TIME
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    materials = [_material(f"material_{i}") for i in range(4)]
+
+    start = time.monotonic()
+    await render_materials_concurrently(materials, _context(), max_concurrency=2)
+    duration = time.monotonic() - start
+
+    assert duration >= 2 * RENDER_TIME
+
+
+@pytest.mark.asyncio
+async def test_slow_material_times_out():
+    materials = [_material("fast"), _material("slow", render_time=10)]
+
+    start = time.monotonic()
+    with pytest.raises(ValueError) as exc_info:
+        await render_materials_concurrently(materials, _context(), timeout=2 * RENDER_TIME)
+
+    assert time.monotonic() - start < 1
+    assert exc_info.value.args[1].id == "slow"
+    assert material_render_metrics["slow"].timeouts == 1
+    assert material_render_metrics["fast"].timeouts == 0
@@ -0,0 +1,117 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.assets.agents.agent import AICAgent
+from aiconsole.core.assets.materials import material as material_module
+from aiconsole.core.assets.materials.content_evaluation_context import (
+    ContentEvaluationContext,
+)
+from aiconsole.core.assets.materials.material import Material, MaterialContentType
+from aiconsole.core.assets.materials.rendered_material_cache import (
+    rendered_material_cache,
+)
+from aiconsole.core.assets.types import AssetLocation, AssetType
+from aiconsole.core.chat.types import Chat
+from aiconsole.core.project.paths import get_project_assets_directory
+
+API_CONTENT = '''
+"""Helpers"""
+
+
+def greet(name: str) -> str:
+    """Greets someone"""
+'''
+
+
+@pytest.fixture
+def materials_directory(initialized_project_dir):
+    get_project_assets_directory(AssetType.MATERIAL).mkdir(parents=True)
+    return get_project_assets_directory(AssetType.MATERIAL)
+
+
+def _material(content: str, content_type: MaterialContentType = MaterialContentType.STATIC_TEXT) -> Material:
+    return Material(
+        id="material",
+        name="Material",
+        usage="",
+        usage_examples=[],
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+        content_type=content_type,
+        content=content,
+    )
+
+
+def _context(material: Material) -> ContentEvaluationContext:
+    agent = AICAgent(
+        id="agent",
+        name="Agent",
+        usage="",
+        usage_examples=[],
+        system="",
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+    )
+    chat = Chat(id="chat", name="", last_modified=datetime.now(), title_edited=False, message_groups=[])
+    return ContentEvaluationContext(chat=chat, agent=agent, gpt_mode=agent.gpt_mode, relevant_materials=[material])
+
+
+@pytest.mark.asyncio
+async def test_static_material_is_rendered_again_when_its_file_changes(materials_directory):
+    content_file = materials_directory / "material.md"
+    content_file.write_text("First")
+    material = _material("file://material.md")
+
+    assert (await material.render(_context(material))).content == "# Material\n\nFirst"
+    assert (await material.render(_context(material))).content == "# Material\n\nFirst"
+
+    # Modification time is moved on explicitly, the file system could keep it the same for a quick write
+    stat = content_file.stat()
+    content_file.write_text("Second")
+    os.utime(content_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert (await material.render(_context(material))).content == "# Material\n\nSecond"
+
+    assert (rendered_material_cache().hits, rendered_material_cache().misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_api_material_code_is_executed_once(materials_directory, monkeypatch):
+    executions = []
+
+    def documentation_from_code(material, source):
+        executions.append(material.id)
+        return lambda context: "Documentation"
+
+    monkeypatch.setattr(material_module, "documentation_from_code", documentation_from_code)
+    material = _material(API_CONTENT, MaterialContentType.API)
+
+    for _ in range(3):
+        assert (await material.render(_context(material))).content == "# Material\n\nDocumentation"
+
+    assert executions == ["material"]
+
+    edited_material = material.model_copy(update={"content": API_CONTENT + "\n\ndef bye(): pass\n"})
+    await edited_material.render(_context(edited_material))
+
+    assert executions == ["material", "material"]
+
+
+@pytest.mark.asyncio
+async def test_dynamic_material_is_not_cached(materials_directory):
+    material = _material("async def content(context):\n    return context.agent.id", MaterialContentType.DYNAMIC_TEXT)
+
+    await material.render(_context(material))
+    await material.render(_context(material))
+
+    assert (rendered_material_cache().hits, rendered_material_cache().misses) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_dynamic_material_top_level_code_runs_on_every_render(materials_directory):
+    source = "renders = []\n\nasync def content(context):\n    renders.append(1)\n    return str(len(renders))"
+    material = _material(source, MaterialContentType.DYNAMIC_TEXT)
+
+    assert (await material.render(_context(material))).content == "# Material\n\n1"
+    assert (await material.render(_context(material))).content == "# Material\n\n1"
@@ -0,0 +1,126 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory LRU cache of recently used chats.
+
+A chat is put here when its lock is released, so opening a chat and processing it right after, or processing it
+again, does not parse the chat file from disk each time. An entry is valid only as long as the chat files on disk
+have the same modification times and sizes as when it was cached, so edits made by anything else invalidate it.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from aiconsole.consts import CHAT_CACHE_MAX_BYTES, CHAT_CACHE_SIZE
+from aiconsole.core.chat.chat_file import get_chat_file_path
+from aiconsole.core.chat.chat_journal import get_chat_journal_path
+from aiconsole.core.chat.types import Chat
+
+_log = logging.getLogger(__name__)
+
+FileStats = tuple[tuple[int, int] | None, ...]
+
+
+def _get_file_stats(chat_id: str) -> FileStats:
+    stats = []
+    for path in (get_chat_file_path(chat_id), get_chat_journal_path(chat_id)):
+        try:
+            stat = path.stat()
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stats.append(None)
+    return tuple(stats)
+
+
+@dataclass
+class _ChatCacheEntry:
+    chat: Chat
+    stats: FileStats
+    size: int
+
+
+class ChatCache:
+    def __init__(self, max_size: int = CHAT_CACHE_SIZE, max_bytes: int = CHAT_CACHE_MAX_BYTES):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, _ChatCacheEntry] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chat_id: str) -> Chat | None:
+        entry = self._entries.get(chat_id)
+
+        if entry is not None and entry.stats != _get_file_stats(chat_id):
+            _log.debug(f"Chat {chat_id} changed on disk, dropping it from the cache")
+            self.invalidate(chat_id)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(chat_id)
+        return entry.chat
+
+    def pop(self, chat_id: str) -> Chat | None:
+        """
+        Takes the chat out of the cache, used when the chat is going to be changed.
+        """
+
+        chat = self.get(chat_id)
+        if chat is not None:
+            self.invalidate(chat_id)
+        return chat
+
+    def put(self, chat: Chat) -> None:
+        self.invalidate(chat.id)
+
+        stats = _get_file_stats(chat.id)
+        # Size of the files is a good enough estimate of the memory taken by the parsed chat
+        size = sum(stat[1] for stat in stats if stat is not None)
+
+        if self.max_size <= 0 or size > self.max_bytes:
+            return
+
+        self._entries[chat.id] = _ChatCacheEntry(chat=chat, stats=stats, size=size)
+        self._size += size
+
+        while len(self._entries) > self.max_size or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def invalidate(self, chat_id: str) -> None:
+        entry = self._entries.pop(chat_id, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+
+@lru_cache
+def chat_cache() -> ChatCache:
+    return ChatCache()
@@ -0,0 +1,150 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+
+from pydantic import Field, ValidationError
+
+from aiconsole.core.chat.chat_migrations import CHAT_VERSION
+from aiconsole.core.chat.types import Chat
+from aiconsole.core.project.paths import get_history_directory
+
+
+class ChatFile(Chat):
+    """
+    Chat as stored in chats/<id>.json, id comes from the name of the file and last_modified from the file itself.
+    Locks are not persisted.
+    """
+
+    id: str = ""
+    last_modified: datetime = Field(default_factory=datetime.now)
+    version: int = 0
+    journal_id: str | None = None
+
+    @classmethod
+    def from_chat(cls, chat: Chat, journal_id: str | None = None) -> "ChatFile":
+        return cls.model_construct(
+            **{field: getattr(chat, field) for field in Chat.model_fields},
+            version=CHAT_VERSION,
+            journal_id=journal_id,
+        )
+
+    def to_chat(self, id: str, last_modified: datetime) -> Chat:
+        return Chat.model_construct(
+            **{
+                **{field: getattr(self, field) for field in Chat.model_fields},
+                "id": id,
+                "last_modified": last_modified,
+            }
+        )
+
+
+def get_chat_file_path(chat_id: str, project_path: Path | None = None) -> Path:
+    return get_history_directory(project_path) / f"{chat_id}.json"
+
+
+def get_chat_hash_path(chat_id: str, project_path: Path | None = None) -> Path:
+    return get_history_directory(project_path) / f"{chat_id}.sha256"
+
+
+def parse_chat_file(content: bytes) -> ChatFile | None:
+    """
+    Parses chat file content in the current version, returns None if the file needs to be migrated first.
+    """
+
+    try:
+        chat_file = ChatFile.model_validate_json(content)
+    except ValidationError:
+        return None
+
+    if chat_file.version < CHAT_VERSION:
+        return None
+
+    return chat_file
+
+
+def write_chat_file(
+    chat: Chat,
+    journal_id: str | None = None,
+    project_path: Path | None = None,
+    keep_modification_time: bool = False,
+) -> bool:
+    """
+    Writes the chat unless the same content is already on disk, returns whether it was written.
+
+    Instead of reading and comparing the previous file, its content hash is kept in chats/<id>.sha256 together with
+    the modification time and size of the written file. A file changed on disk since then is always written again.
+    """
+
+    file_path = get_chat_file_path(chat.id, project_path)
+    hash_path = get_chat_hash_path(chat.id, project_path)
+
+    content = (
+        ChatFile.from_chat(chat, journal_id).model_dump_json(exclude={"id", "last_modified", "lock_id"}).encode("utf8")
+    )
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    if file_path.exists() and hash_path.exists() and hash_path.read_text() == _file_hash(content_hash, file_path):
+        return False
+
+    os.makedirs(file_path.parent, exist_ok=True)
+
+    previous_stat = file_path.stat() if keep_modification_time and file_path.exists() else None
+
+    # Hash is removed first, so a crash in between can not leave a hash of a different content
+    if hash_path.exists():
+        os.remove(hash_path)
+
+    tmp_path = file_path.with_suffix(".json.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
+
+    if previous_stat is not None:
+        os.utime(file_path, ns=(previous_stat.st_atime_ns, previous_stat.st_mtime_ns))
+
+    hash_path.write_text(_file_hash(content_hash, file_path))
+
+    return True
+
+
+def write_migrated_chat_file(chat_id: str, data: dict, project_path: Path | None = None) -> ChatFile:
+    """
+    Writes chat data upgraded by migrate_chat_data back to its file, returns it parsed.
+    """
+
+    data.pop("id", None)
+    data.pop("last_modified", None)
+
+    chat_file = ChatFile.model_validate(data)
+
+    # Migration is not a modification, keep the times so the chat is not moved to the top of the history
+    write_chat_file(
+        chat_file.to_chat(id=chat_id, last_modified=datetime.now()),
+        chat_file.journal_id,
+        project_path,
+        keep_modification_time=True,
+    )
+
+    return chat_file
+
+
+def _file_hash(content_hash: str, file_path: Path) -> str:
+    stat = file_path.stat()
+    return f"{content_hash} {stat.st_mtime_ns} {stat.st_size}"
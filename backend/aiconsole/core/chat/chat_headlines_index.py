@@ -0,0 +1,214 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Index of chat headlines stored in .aic, so listing chats does not require parsing every chat file.
+
+Each entry remembers modification time and size of the chat files it was built from, an entry not matching the files
+on disk is rebuilt from the chat itself.
+
+The index of the current project is kept in memory. Changes to it are written to the file by a timer thread, at most
+once per CHAT_HEADLINES_INDEX_WRITE_DELAY, so saving a chat doesn't rewrite the whole index.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from aiconsole.consts import (
+    CHAT_HEADLINES_INDEX_JSON,
+    CHAT_HEADLINES_INDEX_WRITE_DELAY,
+)
+from aiconsole.core.chat.chat_journal import get_chat_journal_path
+from aiconsole.core.chat.list_possible_historic_chat_ids import (
+    list_possible_historic_chat_ids,
+)
+from aiconsole.core.chat.load_chat_history import load_chat_history
+from aiconsole.core.chat.types import Chat, ChatHeadline
+from aiconsole.core.project.paths import get_aic_directory, get_history_directory
+
+_log = logging.getLogger(__name__)
+
+# Index of the current project, by the path of its file
+_index: tuple[Path, dict[str, dict]] | None = None
+
+# Latest version of each index waiting to be written
+_indexes_to_write: dict[Path, dict[str, dict]] = {}
+_indexes_to_write_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def _get_index_path(project_path: Path | None = None) -> Path:
+    return get_aic_directory(project_path) / CHAT_HEADLINES_INDEX_JSON
+
+
+def _get_index(index_path: Path) -> dict[str, dict]:
+    global _index
+
+    if _index is None or _index[0] != index_path:
+        _index = (index_path, _read_index(index_path))
+    return _index[1]
+
+
+def _read_index(index_path: Path) -> dict[str, dict]:
+    try:
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf8", errors="replace") as f:
+                return json.load(f)
+    except (IOError, ValueError) as e:
+        _log.warning(f"Failed to read chat headlines index {index_path}: {e}")
+    return {}
+
+
+def _write_index(index: dict[str, dict], index_path: Path) -> None:
+    with _write_lock:
+        os.makedirs(index_path.parent, exist_ok=True)
+
+        tmp_path = index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf8", errors="replace") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+
+def _schedule_write(index_path: Path, index: dict[str, dict]) -> None:
+    # Timer thread is independent of the event loop, so a write is not lost when the loop closes before it's due
+    with _indexes_to_write_lock:
+        if index_path not in _indexes_to_write:
+            threading.Timer(CHAT_HEADLINES_INDEX_WRITE_DELAY, _write, (index_path,)).start()
+        _indexes_to_write[index_path] = index
+
+
+def _write(index_path: Path) -> None:
+    with _indexes_to_write_lock:
+        index = _indexes_to_write.pop(index_path)
+        # Entries are replaced and never changed in place, so a shallow copy, made in one call, is a snapshot
+        index = index.copy()
+
+    try:
+        _write_index(index, index_path)
+    except Exception as e:
+        _log.error(f"Failed to write chat headlines index: {e}")
+
+
+def _get_chat_files_stats(chat_id: str, project_path: Path | None = None) -> list[list[float]] | None:
+    """
+    Returns [[mtime, size]] of the chat snapshot followed by the same for its journal, None if chat does not exist.
+    """
+
+    stats = []
+    for path in (
+        get_history_directory(project_path) / f"{chat_id}.json",
+        get_chat_journal_path(chat_id, project_path),
+    ):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stats.append([stat.st_mtime, stat.st_size])
+
+    return stats or None
+
+
+def _get_headline_name(chat: Chat) -> str:
+    # Same as load_chat_history, not edited titles follow the first message
+    if chat.title_edited and chat.name:
+        return chat.name
+
+    for message_group in chat.message_groups:
+        for message in message_group.messages:
+            return message.content or "New Chat"
+
+    return "New Chat"
+
+
+def _create_entry(chat: Chat, stats: list[list[float]]) -> dict:
+    return {"name": _get_headline_name(chat), "stats": stats}
+
+
+def _entry_to_headline(chat_id: str, entry: dict) -> ChatHeadline:
+    return ChatHeadline(
+        id=chat_id,
+        name=entry["name"],
+        last_modified=datetime.fromtimestamp(max(mtime for mtime, _ in entry["stats"])),
+    )
+
+
+def update_chat_headline(chat: Chat) -> None:
+    try:
+        index_path = _get_index_path()
+        index = _get_index(index_path)
+        stats = _get_chat_files_stats(chat.id)
+
+        if stats is None:
+            if index.pop(chat.id, None) is None:
+                return
+        else:
+            entry = _create_entry(chat, stats)
+            if index.get(chat.id) == entry:
+                return
+            index[chat.id] = entry
+
+        _schedule_write(index_path, index)
+    except Exception as e:
+        # Index is only a cache, it's rebuilt from chat files when it gets out of date
+        _log.exception(f"Failed to update headline of chat {chat.id}: {e}")
+
+
+async def get_chat_headlines(
+    project_path: Path | None = None, offset: int = 0, limit: int | None = None
+) -> list[ChatHeadline]:
+    """
+    Returns headlines of chats sorted by modification time (descending order).
+    """
+
+    index_path = _get_index_path(project_path)
+    # Indexes of other projects, listed e.g. for recent projects, are not kept in memory
+    index = _get_index(index_path) if project_path is None else _read_index(index_path)
+    chat_ids = list_possible_historic_chat_ids(project_path)
+
+    changed = False
+    for chat_id in set(index) - set(chat_ids):
+        del index[chat_id]
+        changed = True
+
+    headlines = []
+    for chat_id in chat_ids[offset:] if limit is None else chat_ids[offset : offset + limit]:
+        stats = _get_chat_files_stats(chat_id, project_path)
+        entry = index.get(chat_id)
+
+        if stats is None:
+            continue
+
+        if entry is None or entry["stats"] != stats:
+            try:
+                chat = await load_chat_history(chat_id, project_path)
+            except Exception as e:
+                _log.exception(e)
+                _log.error(f"Failed to get history: {e} {chat_id}")
+                continue
+
+            entry = index[chat_id] = _create_entry(chat, stats)
+            changed = True
+
+        headlines.append(_entry_to_headline(chat_id, entry))
+
+    if changed:
+        _schedule_write(index_path, index)
+
+    return headlines
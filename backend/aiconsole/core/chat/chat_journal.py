@@ -0,0 +1,166 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Append-only journal of chat mutations.
+
+A chat is stored as a snapshot (chats/<id>.json) and a journal (chats/<id>.jsonl). The first line of the journal
+holds the id of the snapshot it belongs to, every next line is a mutation applied on top of that snapshot. This way
+saving a chat costs only the size of the new mutations, not the size of the whole chat.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from uuid import uuid4
+
+from pydantic import TypeAdapter, ValidationError
+
+from aiconsole.consts import CHAT_JOURNAL_COMPACTION_SIZE
+from aiconsole.core.chat.apply_mutation import apply_mutation
+from aiconsole.core.chat.chat_file import (
+    get_chat_file_path,
+    get_chat_hash_path,
+    write_chat_file,
+)
+from aiconsole.core.chat.chat_mutations import ChatMutation, CreateMessageMutation
+from aiconsole.core.chat.merge_mutations import merge_append_mutations
+from aiconsole.core.chat.types import Chat
+from aiconsole.core.project.paths import get_history_directory
+
+_log = logging.getLogger(__name__)
+
+_chat_mutation_adapter: TypeAdapter[ChatMutation] = TypeAdapter(ChatMutation)
+
+
+def get_chat_journal_path(chat_id: str, project_path: Path | None = None) -> Path:
+    return get_history_directory(project_path) / f"{chat_id}.jsonl"
+
+
+class ChatJournal:
+    def __init__(self, chat_id: str):
+        self.chat_id = chat_id
+        self._pending: list[ChatMutation] = []
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def record(self, mutation: ChatMutation) -> None:
+        # Streamed deltas are coalesced so a streamed message ends up as a single journal entry
+        if self._pending:
+            merged = merge_append_mutations(self._pending[-1], mutation)
+            if merged is not None:
+                self._pending[-1] = merged
+                return
+
+        self._pending.append(mutation)
+
+    def flush(self, chat: Chat) -> None:
+        snapshot_path = get_chat_file_path(self.chat_id)
+        journal_path = get_chat_journal_path(self.chat_id)
+
+        if not snapshot_path.exists() or not journal_path.exists():
+            self.compact(chat)
+            return
+
+        if not self._pending:
+            return
+
+        with open(journal_path, "a", encoding="utf8", errors="replace") as f:
+            f.write("".join(mutation.model_dump_json() + "\n" for mutation in self._pending))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._pending.clear()
+
+        if journal_path.stat().st_size > CHAT_JOURNAL_COMPACTION_SIZE:
+            self.compact(chat)
+
+    def compact(self, chat: Chat) -> None:
+        """
+        Writes the whole chat as a new snapshot and starts an empty journal for it.
+        """
+
+        self._pending.clear()
+
+        journal_path = get_chat_journal_path(self.chat_id)
+
+        if len(chat.message_groups) == 0 and chat.chat_options.is_default():
+            for path in (get_chat_file_path(self.chat_id), get_chat_hash_path(self.chat_id), journal_path):
+                if path.exists():
+                    os.remove(path)
+            return
+
+        journal_id = uuid4().hex
+
+        # A journal left from before belongs to a different journal_id, so a crash before the new journal is written
+        # can not apply old entries twice
+        write_chat_file(chat, journal_id)
+
+        with open(journal_path, "w", encoding="utf8", errors="replace") as f:
+            f.write(json.dumps({"journal_id": journal_id}) + "\n")
+
+
+_chat_journals: dict[str, ChatJournal] = {}
+
+
+def chat_journal(chat_id: str) -> ChatJournal:
+    if chat_id not in _chat_journals:
+        _chat_journals[chat_id] = ChatJournal(chat_id)
+    return _chat_journals[chat_id]
+
+
+def discard_chat_journal(chat_id: str) -> None:
+    _chat_journals.pop(chat_id, None)
+
+
+def replay_chat_journal(chat: Chat, journal_id: str | None, project_path: Path | None = None) -> None:
+    journal_path = get_chat_journal_path(chat.id, project_path)
+
+    if not journal_id or not journal_path.exists():
+        return
+
+    with open(journal_path, "r", encoding="utf8", errors="replace") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            _log.warning(f"Invalid journal header in {journal_path}, ignoring the journal")
+            return
+
+        if header.get("journal_id") != journal_id:
+            # Journal of a previous snapshot, its mutations are already part of the chat
+            return
+
+        for line in f:
+            try:
+                mutation = _chat_mutation_adapter.validate_json(line)
+            except ValidationError:
+                # Only the last entry can be broken, if the process died while writing it
+                _log.warning(f"Invalid journal entry in {journal_path}, ignoring the rest of the journal")
+                break
+
+            try:
+                apply_mutation(chat, mutation)
+            except ValueError as e:
+                _log.warning(f"Could not replay journal entry of chat {chat.id}: {e}")
+                continue
+
+            if isinstance(mutation, CreateMessageMutation):
+                message_location = chat.get_message_location(mutation.message_id)
+                if message_location:
+                    message_location.message.timestamp = mutation.timestamp
@@ -0,0 +1,165 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migrations of chat files between format versions.
+
+A chat file is upgraded once, when it's loaded for the first time (or by migrate_all_chats), and written back,
+so loading an up to date chat does not traverse it at all.
+"""
+
+import json
+import logging
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from aiconsole.core.chat.list_possible_historic_chat_ids import (
+    list_possible_historic_chat_ids,
+)
+from aiconsole.core.project.paths import get_history_directory
+
+_log = logging.getLogger(__name__)
+
+
+def _migrate_from_legacy_format(data: dict) -> None:
+    # Convert old format
+    if "message_groups" not in data or not data["message_groups"]:
+        data["message_groups"] = []
+
+        if "messages" in data and data["messages"]:
+            for message in data["messages"]:
+                data["message_groups"].append(
+                    {
+                        "id": message["id"] if "id" in message else uuid.uuid4().hex,
+                        "role": message["role"] if "role" in message else "",
+                        "task": message["task"] if "task" in message and message["task"] else "",
+                        "agent_id": message["agent_id"] if "agent_id" in message else "",
+                        "materials_ids": (
+                            message["materials_ids"] if "materials_ids" in message and message["materials_ids"] else []
+                        ),
+                        "messages": [
+                            {
+                                "id": message["id"] if "id" in message else uuid.uuid4().hex,
+                                "timestamp": message["timestamp"] if "timestamp" in message else "",
+                                "content": message["content"] if "content" in message else "",
+                            }
+                        ],
+                    }
+                )
+            del data["messages"]
+
+    for group in data["message_groups"]:
+        # Change agent_id to actor_id
+        if "agent_id" in group:
+            group["actor_id"] = {
+                "type": "user" if group["agent_id"] == "user" else "agent",
+                "id": group["agent_id"],
+            }
+            del group["agent_id"]
+
+        # Add "analysis" to each message group
+        if "analysis" not in group:
+            group["analysis"] = ""
+
+        for msg in group.get("messages") or []:
+            # Add tool_calls to each message
+            if "tool_calls" not in msg:
+                msg["tool_calls"] = []
+
+            for tool_call in msg["tool_calls"] or []:
+                # Add an empty headline to tool calls without one
+                if "headline" not in tool_call:
+                    tool_call["headline"] = ""
+
+                # Tools with "shell" language are run as "python"
+                if "language" in tool_call and tool_call["language"] == "shell":
+                    tool_call["language"] = "python"
+
+                # Add "type" field with default "function" value
+                if "type" not in tool_call:
+                    tool_call["type"] = "function"
+
+    if "name" not in data or not data["name"]:
+        if "headline" in data and data["headline"]:
+            data["name"] = data["headline"]
+        elif "title" in data and data["title"]:
+            data["name"] = data["title"]
+        else:
+            data["name"] = get_default_chat_name(data) or "New Chat"
+
+    if "title_edited" not in data or not data["title_edited"]:
+        data["title_edited"] = False
+
+
+# _MIGRATIONS[i] upgrades a chat from version i to version i + 1, files without a version are version 0
+_MIGRATIONS: list[Callable[[dict], None]] = [
+    _migrate_from_legacy_format,
+]
+
+CHAT_VERSION = len(_MIGRATIONS)
+
+
+def get_default_chat_name(data: dict) -> str | None:
+    for group in data["message_groups"]:
+        if "messages" in group and group["messages"]:
+            for msg in group["messages"]:
+                return msg.get("content")
+    return None
+
+
+def migrate_chat_data(data: dict) -> bool:
+    """
+    Upgrades chat data read from a chat file to the current version in place, returns whether anything was done.
+    """
+
+    version = data.get("version", 0)
+
+    if version >= CHAT_VERSION:
+        return False
+
+    for migration in _MIGRATIONS[version:]:
+        migration(data)
+
+    data["version"] = CHAT_VERSION
+    return True
+
+
+def migrate_all_chats(project_path: Path) -> int:
+    """
+    Upgrades all chat files of the project, returns the number of upgraded chats.
+    """
+
+    # Chat files depend on the current version defined here
+    from aiconsole.core.chat.chat_file import write_migrated_chat_file
+
+    history_directory = get_history_directory(project_path)
+    migrated = 0
+
+    for chat_id in list_possible_historic_chat_ids(project_path):
+        file_path = history_directory / f"{chat_id}.json"
+
+        try:
+            with open(file_path, "r", encoding="utf8", errors="replace") as f:
+                data = json.load(f)
+
+            if migrate_chat_data(data):
+                write_migrated_chat_file(chat_id, data, project_path)
+                migrated += 1
+        except Exception as e:
+            _log.exception(f"Failed to migrate chat {chat_id}: {e}")
+
+    return migrated
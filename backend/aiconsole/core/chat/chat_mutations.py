@@ -4,6 +4,7 @@ from pydantic import BaseModel
 
 from aiconsole.core.chat.actor_id import ActorId
 from aiconsole.core.code_running.code_interpreters.language import LanguageStr
+from aiconsole.core.code_running.resource_limits import CodeExecutionUsage
 from aiconsole.core.gpt.tool_definition import ToolDefinition
 from aiconsole.core.gpt.types import GPTRole
 
@@ -170,6 +171,13 @@ class SetOutputToolCallMutation(BaseModel):
     type: Literal["SetOutputToolCallMutation"] = "SetOutputToolCallMutation"
     tool_call_id: str
     output: str | None = None
+    is_output_truncated: bool = False
+
+
+class SetUsageToolCallMutation(BaseModel):
+    type: Literal["SetUsageToolCallMutation"] = "SetUsageToolCallMutation"
+    tool_call_id: str
+    usage: CodeExecutionUsage | None = None
 
 
 class AppendToOutputToolCallMutation(BaseModel):
@@ -218,6 +226,7 @@ ChatMutation = (
     | SetLanguageToolCallMutation
     | SetOutputToolCallMutation
     | AppendToOutputToolCallMutation
+    | SetUsageToolCallMutation
     | SetIsStreamingToolCallMutation
     | SetIsExecutingToolCallMutation
 )
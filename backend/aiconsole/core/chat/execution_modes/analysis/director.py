@@ -23,6 +23,9 @@ from aiconsole.core.chat.execution_modes.analysis.create_materials_str import (
 from aiconsole.core.chat.execution_modes.analysis.gpt_analysis_function_step import (
     gpt_analysis_function_step,
 )
+from aiconsole.core.chat.execution_modes.analysis.speculative_preparation import (
+    SpeculativePreparation,
+)
 from aiconsole.core.gpt.consts import ANALYSIS_GPT_MODE
 
 INITIAL_SYSTEM_PROMPT = """
@@ -100,7 +103,9 @@ Now analyse the chat.
 """.strip()
 
 
-async def director_analyse(chat_mutator: ChatMutator, message_group_id: str):
+async def director_analyse(
+    chat_mutator: ChatMutator, message_group_id: str, preparation: SpeculativePreparation | None = None
+):
     initial_system_prompt = INITIAL_SYSTEM_PROMPT.format(
         agents=create_agents_str(agent_id=chat_mutator.chat.chat_options.agent_id),
         materials=create_materials_str(
@@ -124,4 +129,5 @@ async def director_analyse(chat_mutator: ChatMutator, message_group_id: str):
         initial_system_prompt=initial_system_prompt,
         last_system_prompt=last_system_prompt,
         force_call=True,
+        preparation=preparation,
     )
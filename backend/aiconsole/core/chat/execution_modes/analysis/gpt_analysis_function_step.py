@@ -37,8 +37,12 @@ from aiconsole.core.chat.execution_modes.analysis.agents_to_choose_from import (
 from aiconsole.core.chat.execution_modes.analysis.create_plan_class import (
     create_plan_class,
 )
+from aiconsole.core.chat.execution_modes.analysis.speculative_preparation import (
+    SpeculativePreparation,
+)
 from aiconsole.core.chat.types import Chat
 from aiconsole.core.gpt.consts import GPTMode
+from aiconsole.core.gpt.context_budget import DefaultContextBudget
 from aiconsole.core.gpt.gpt_executor import GPTExecutor
 from aiconsole.core.gpt.request import GPTRequest
 from aiconsole.core.gpt.tool_definition import ToolDefinition, ToolFunctionDefinition
@@ -106,6 +110,18 @@ def _get_relevant_materials(relevant_material_ids: list[str]) -> list[Material]:
     return relevant_materials
 
 
+def _speculate(
+    preparation: SpeculativePreparation,
+    possible_agent_choices: list[AICAgent],
+    agent_id: str,
+    relevant_material_ids: list[str],
+) -> None:
+    # Partial ids which don't match anything are skipped, ones which do but change later are cancelled at the end
+    agent = next((agent for agent in possible_agent_choices if agent.id == agent_id), None)
+    if agent and isinstance(relevant_material_ids, list):
+        preparation.speculate(agent, _get_relevant_materials(relevant_material_ids))
+
+
 @dataclass
 class AnalysisResult:
     agent: AICAgent
@@ -121,6 +137,7 @@ async def gpt_analysis_function_step(
     initial_system_prompt: str,
     last_system_prompt: str,
     force_call: bool,
+    preparation: SpeculativePreparation | None = None,
 ) -> AnalysisResult:
     gpt_executor = GPTExecutor()
 
@@ -180,6 +197,7 @@ async def gpt_analysis_function_step(
         presence_penalty=2,
         min_tokens=DIRECTOR_MIN_TOKENS,
         preferred_tokens=DIRECTOR_PREFERRED_TOKENS,
+        context_budget=DefaultContextBudget(),
     )
 
     if force_call:
@@ -201,6 +219,8 @@ async def gpt_analysis_function_step(
         )
     )
 
+    speculated_plan = None
+
     try:
         async for chunk in gpt_executor.execute(request):
             if len(gpt_executor.partial_response.choices) > 0:
@@ -219,6 +239,16 @@ async def gpt_analysis_function_step(
                                 )
                             )
 
+                        if preparation and "agent_id" in arguments_dict and not arguments_dict.get("is_users_turn"):
+                            # Copied, as the arguments are updated in place when more of them is streamed
+                            partial_plan = (
+                                arguments_dict["agent_id"],
+                                list(arguments_dict.get("relevant_material_ids") or []),
+                            )
+                            if partial_plan != speculated_plan:
+                                speculated_plan = partial_plan
+                                _speculate(preparation, possible_agent_choices, *partial_plan)
+
                         if "relevant_material_ids" in arguments_dict:
                             await chat_mutator.mutate(
                                 SetMaterialsIdsMessageGroupMutation(
@@ -0,0 +1,153 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+from typing import Coroutine, TypeVar
+
+from aiconsole.consts import MATERIAL_RENDER_CONCURRENCY
+from aiconsole.core.assets.agents.agent import AICAgent
+from aiconsole.core.assets.materials.content_evaluation_context import (
+    ContentEvaluationContext,
+)
+from aiconsole.core.assets.materials.material import Material, MaterialContentType
+from aiconsole.core.assets.materials.render_materials_concurrently import (
+    render_material,
+)
+from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
+from aiconsole.core.chat.execution_modes.execution_mode import ExecutionMode
+from aiconsole.core.chat.execution_modes.utils.import_and_validate_execution_mode import (
+    import_and_validate_execution_mode,
+)
+from aiconsole.core.chat.types import Chat
+from aiconsole.utils.events import (
+    InternalEvent,
+    hold_back_internal_events,
+    internal_events,
+)
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rendered the same for any chat and relevant materials, so they can be rendered before the plan is final
+_SPECULATED_CONTENT_TYPES = (MaterialContentType.STATIC_TEXT, MaterialContentType.API)
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Failures of work which is never used are not errors
+    if not task.cancelled():
+        task.exception()
+
+
+async def _hold_back_events(
+    coroutine: Coroutine[None, None, T], held_back_events: list[tuple[InternalEvent, dict]]
+) -> T:
+    # Runs in its own task, so only events of this coroutine are held back
+    hold_back_internal_events(held_back_events)
+    return await coroutine
+
+
+class SpeculativePreparation:
+    """
+    Prepares the agent picked by the director before the analysis is finished.
+
+    As soon as the streamed plan names an agent and its materials, the execution mode of the agent is imported and its
+    static and API materials are rendered in the background. When the plan is final, work matching it is used and the
+    rest is cancelled.
+
+    Speculative work doesn't notify anyone, its events are held back and emitted only if the plan uses it. Dynamic
+    materials depend on the chat and the relevant materials, so they are rendered only for the final plan.
+    """
+
+    def __init__(self, chat: Chat):
+        self.chat = chat
+        self._execution_modes: dict[str, asyncio.Task[ExecutionMode]] = {}
+        self._rendered_materials: dict[tuple[str, str], asyncio.Task[RenderedMaterial]] = {}
+        self._held_back_events: dict[asyncio.Task, list[tuple[InternalEvent, dict]]] = {}
+        self._render_semaphore = asyncio.Semaphore(MATERIAL_RENDER_CONCURRENCY)
+
+    def speculate(self, agent: AICAgent, materials: list[Material]) -> None:
+        if agent.id not in self._execution_modes:
+            _log.debug(f"Speculatively preparing agent {agent.id}")
+            self._execution_modes[agent.id] = self._start(import_and_validate_execution_mode(agent, self.chat.id))
+
+        content_context = self._content_context(agent, materials)
+
+        for material in materials:
+            key = (agent.id, material.id)
+            if material.content_type in _SPECULATED_CONTENT_TYPES and key not in self._rendered_materials:
+                self._rendered_materials[key] = self._start(
+                    render_material(material, content_context, self._render_semaphore)
+                )
+
+    async def prepare(
+        self, agent: AICAgent, materials: list[Material]
+    ) -> tuple[ExecutionMode, list[RenderedMaterial]]:
+        """
+        Returns the execution mode of the agent and its rendered materials, reusing what was speculatively prepared.
+        """
+
+        self.speculate(agent, materials)
+
+        keys = [(agent.id, material.id) for material in materials]
+        for execution_mode_agent_id in self._execution_modes:
+            if execution_mode_agent_id != agent.id:
+                self._execution_modes[execution_mode_agent_id].cancel()
+        for key in self._rendered_materials:
+            if key not in keys:
+                self._rendered_materials[key].cancel()
+
+        # Imported again, now that the module is loaded it's quick and its warnings are sent to the chat
+        await asyncio.wait([self._execution_modes[agent.id]])
+        execution_mode = await import_and_validate_execution_mode(agent, self.chat.id)
+
+        content_context = self._content_context(agent, materials)
+        rendered_materials = await asyncio.gather(
+            *(self._rendered_material(material, content_context) for material in materials)
+        )
+
+        return execution_mode, rendered_materials
+
+    def cancel(self) -> None:
+        for task in [*self._execution_modes.values(), *self._rendered_materials.values()]:
+            task.cancel()
+
+    def _content_context(self, agent: AICAgent, materials: list[Material]) -> ContentEvaluationContext:
+        return ContentEvaluationContext(
+            chat=self.chat,
+            agent=agent,
+            gpt_mode=agent.gpt_mode,
+            relevant_materials=materials,
+        )
+
+    async def _rendered_material(
+        self, material: Material, content_context: ContentEvaluationContext
+    ) -> RenderedMaterial:
+        task = self._rendered_materials.get((content_context.agent.id, material.id))
+        if task is None:
+            return await render_material(material, content_context, self._render_semaphore)
+
+        await asyncio.wait([task])
+        for event, kwargs in self._held_back_events[task]:
+            await internal_events().emit(event, **kwargs)
+        return task.result()
+
+    def _start(self, coroutine: Coroutine[None, None, T]) -> asyncio.Task[T]:
+        held_back_events: list[tuple[InternalEvent, dict]] = []
+        task = asyncio.create_task(_hold_back_events(coroutine, held_back_events))
+        task.add_done_callback(_retrieve_exception)
+        self._held_back_events[task] = held_back_events
+        return task
@@ -20,9 +20,6 @@ from uuid import uuid4
 from aiconsole.api.websockets.connection_manager import connection_manager
 from aiconsole.api.websockets.server_messages import NotificationServerMessage
 from aiconsole.core.assets.agents.agent import AICAgent
-from aiconsole.core.assets.materials.content_evaluation_context import (
-    ContentEvaluationContext,
-)
 from aiconsole.core.assets.materials.material import Material
 from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
 from aiconsole.core.chat.actor_id import ActorId
@@ -32,10 +29,10 @@ from aiconsole.core.chat.chat_mutations import (
 )
 from aiconsole.core.chat.chat_mutator import ChatMutator
 from aiconsole.core.chat.execution_modes.analysis.director import director_analyse
-from aiconsole.core.chat.execution_modes.execution_mode import ExecutionMode
-from aiconsole.core.chat.execution_modes.utils.import_and_validate_execution_mode import (
-    import_and_validate_execution_mode,
+from aiconsole.core.chat.execution_modes.analysis.speculative_preparation import (
+    SpeculativePreparation,
 )
+from aiconsole.core.chat.execution_modes.execution_mode import ExecutionMode
 
 _log = logging.getLogger(__name__)
 
@@ -71,21 +68,18 @@ async def _execution_mode_process(
             await chat_mutator.mutate(DeleteMessageGroupMutation(message_group_id=last_message_group.id))
             return
 
-    analysis = await director_analyse(chat_mutator, last_message_group.id)
+    # Agent is being prepared while the analysis is still streamed, to start its answer sooner
+    preparation = SpeculativePreparation(chat_mutator.chat)
 
-    if analysis.agent.id != "user" and analysis.next_step:
-        content_context = ContentEvaluationContext(
-            chat=chat_mutator.chat,
-            agent=analysis.agent,
-            gpt_mode=analysis.agent.gpt_mode,
-            relevant_materials=analysis.relevant_materials,
-        )
+    try:
+        analysis = await director_analyse(chat_mutator, last_message_group.id, preparation)
 
-        rendered_materials = [
-            await material.render(content_context) for material in content_context.relevant_materials
-        ]
+        if analysis.agent.id != "user" and analysis.next_step:
+            execution_mode, rendered_materials = await preparation.prepare(analysis.agent, analysis.relevant_materials)
+    finally:
+        preparation.cancel()
 
-        execution_mode = await import_and_validate_execution_mode(analysis.agent, chat_mutator.chat.id)
+    if analysis.agent.id != "user" and analysis.next_step:
 
         await execution_mode.process_chat(
             chat_mutator=chat_mutator,
@@ -16,6 +16,7 @@
 
 import asyncio
 import traceback
+from contextlib import aclosing
 from datetime import datetime
 from uuid import uuid4
 
@@ -32,10 +33,7 @@ from aiconsole.core.chat.chat_mutations import (
 )
 from aiconsole.core.chat.chat_mutator import ChatMutator
 from aiconsole.core.chat.execution_modes.execution_mode import ExecutionMode
-from aiconsole.core.code_running.run_code import (
-    get_code_interpreter,
-    run_in_code_interpreter,
-)
+from aiconsole.core.code_running.run_code import run_in_code_interpreter
 
 
 async def _execution_mode_process(
@@ -94,16 +92,15 @@ async def _execution_mode_process(
 
     try:
         try:
-            async for token in await run_in_code_interpreter("python", chat_mutator.chat.id, code, []):
-                await chat_mutator.mutate(
-                    AppendToOutputToolCallMutation(
-                        tool_call_id=tool_call_id,
-                        output_delta=token,
+            # Closing the output on cancellation interrupts the code
+            async with aclosing(await run_in_code_interpreter("python", chat_mutator.chat.id, code, [])) as tokens:
+                async for token in tokens:
+                    await chat_mutator.mutate(
+                        AppendToOutputToolCallMutation(
+                            tool_call_id=tool_call_id,
+                            output_delta=token,
+                        )
                     )
-                )
-        except asyncio.CancelledError:
-            (await get_code_interpreter("python", chat_mutator.chat.id)).terminate()
-            raise
         except Exception:
             await connection_manager().send_to_chat(
                 ErrorServerMessage(error=traceback.format_exc().strip()), chat_mutator.chat.id
@@ -17,6 +17,7 @@ from aiconsole.core.chat.chat_mutations import (
 from aiconsole.core.chat.chat_mutator import ChatMutator
 from aiconsole.core.chat.convert_messages import convert_messages
 from aiconsole.core.chat.execution_modes.utils.send_code import send_code
+from aiconsole.core.gpt.context_budget import DefaultContextBudget
 from aiconsole.core.gpt.function_calls import OpenAISchema
 from aiconsole.core.gpt.gpt_executor import GPTExecutor
 from aiconsole.core.gpt.request import GPTRequest
@@ -111,6 +112,7 @@ async def generate_response_message_with_code(
                 ),
                 min_tokens=250,
                 preferred_tokens=2000,
+                context_budget=DefaultContextBudget(),
                 temperature=0.2,
             )
         ):
@@ -1,14 +1,20 @@
 import traceback
+from contextlib import aclosing
 
 from aiconsole.api.websockets.connection_manager import connection_manager
-from aiconsole.api.websockets.server_messages import ErrorServerMessage
+from aiconsole.api.websockets.server_messages import (
+    CodeExecutionQueueServerMessage,
+    ErrorServerMessage,
+)
 from aiconsole.core.assets.materials.material import Material
 from aiconsole.core.chat.chat_mutations import (
-    AppendToOutputToolCallMutation,
     SetIsExecutingToolCallMutation,
     SetOutputToolCallMutation,
+    SetUsageToolCallMutation,
 )
 from aiconsole.core.chat.chat_mutator import ChatMutator
+from aiconsole.core.chat.tool_call_output import ToolCallOutput
+from aiconsole.core.code_running.resource_limits import CodeExecutionUsage
 from aiconsole.core.code_running.run_code import run_in_code_interpreter
 
 
@@ -23,6 +29,25 @@ async def run_code(
         raise Exception(f"Tool call {tool_call_id} should have been created")
 
     tool_call = tool_call_location.tool_call
+    output = ToolCallOutput(chat_mutator.chat.id, tool_call_id)
+
+    async def record_usage(usage: CodeExecutionUsage):
+        await chat_mutator.mutate(
+            SetUsageToolCallMutation(
+                tool_call_id=tool_call_id,
+                usage=usage,
+            )
+        )
+
+    async def notify_about_queue_position(position: int | None):
+        await connection_manager().send_to_chat(
+            CodeExecutionQueueServerMessage(
+                chat_id=chat_mutator.chat.id,
+                tool_call_id=tool_call_id,
+                position=position,
+            ),
+            chat_mutator.chat.id,
+        )
 
     try:
         await chat_mutator.mutate(
@@ -39,29 +64,43 @@ async def run_code(
             )
         )
 
+        await chat_mutator.mutate(
+            SetUsageToolCallMutation(
+                tool_call_id=tool_call_id,
+                usage=None,
+            )
+        )
+
         try:
             assert tool_call.language is not None
-            async for token in await run_in_code_interpreter(
-                tool_call.language, chat_mutator.chat.id, tool_call.code, materials
-            ):
-                await chat_mutator.mutate(
-                    AppendToOutputToolCallMutation(
-                        tool_call_id=tool_call_id,
-                        output_delta=token,
-                    )
+            # Closed explicitly, so the code is interrupted and its slot freed as soon as this is cancelled
+            async with aclosing(
+                await run_in_code_interpreter(
+                    tool_call.language,
+                    chat_mutator.chat.id,
+                    tool_call.code,
+                    materials,
+                    on_queue_position=notify_about_queue_position,
+                    on_usage=record_usage,
                 )
+            ) as tokens:
+                async for token in tokens:
+                    mutation = output.append(token)
+                    if mutation:
+                        await chat_mutator.mutate(mutation)
         except Exception:
             await connection_manager().send_to_chat(
                 ErrorServerMessage(error=traceback.format_exc().strip()), chat_mutator.chat.id
             )
 
-            await chat_mutator.mutate(
-                AppendToOutputToolCallMutation(
-                    tool_call_id=tool_call_id,
-                    output_delta=traceback.format_exc().strip(),
-                )
-            )
+            mutation = output.append(traceback.format_exc().strip())
+            if mutation:
+                await chat_mutator.mutate(mutation)
     finally:
+        mutation = output.close()
+        if mutation:
+            await chat_mutator.mutate(mutation)
+
         await chat_mutator.mutate(
             SetIsExecutingToolCallMutation(
                 tool_call_id=tool_call_id,
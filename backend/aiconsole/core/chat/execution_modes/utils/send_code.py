@@ -132,7 +132,7 @@ async def send_code(
         if tool_call.type == "function":
             function_call = tool_call.function
 
-            if not function_call.arguments:
+            if not function_call.has_arguments:
                 continue
 
             if function_call.name in [language_cls.__name__ for language_cls in language_classes]:
@@ -143,6 +143,32 @@ async def send_code(
                 if tool_call_data.language is None and function_call.name in languages:
                     await send_language_if_needed(cast(LanguageStr, function_call.name))
 
+                arguments_deltas = function_call.take_arguments_deltas()
+
+                if arguments_deltas is not None:
+                    # Only what was streamed since the last chunk is appended, without going over the whole code again
+                    code_delta = arguments_deltas.get("code")
+                    headline_delta = arguments_deltas.get("headline")
+
+                    if code_delta:
+                        await send_language_if_needed(default_language)
+                        await chat_mutator.mutate(
+                            AppendToCodeToolCallMutation(
+                                tool_call_id=tool_call.id,
+                                code_delta=code_delta,
+                            )
+                        )
+
+                    if headline_delta:
+                        await chat_mutator.mutate(
+                            AppendToHeadlineToolCallMutation(
+                                tool_call_id=tool_call.id,
+                                headline_delta=headline_delta,
+                            )
+                        )
+
+                    continue
+
                 code = None
                 headline = None
 
@@ -25,10 +25,20 @@ def list_possible_historic_chat_ids(project_path: Path | None = None):
     if history_directory.exists() and history_directory.is_dir():
         entries = os.scandir(history_directory)
 
-        files = [entry for entry in entries if entry.is_file() and entry.name.endswith(".json")]
-        # Sort the files based on modification time (descending order)
-        files = sorted(files, key=lambda entry: os.path.getmtime(entry.path), reverse=True)
+        snapshots: dict[str, float] = {}
+        journals: dict[str, float] = {}
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".json"):
+                snapshots[entry.name.split(".")[0]] = entry.stat().st_mtime
+            elif entry.is_file() and entry.name.endswith(".jsonl"):
+                journals[entry.name.split(".")[0]] = entry.stat().st_mtime
 
-        return [file.name.split(".")[0] for file in files]
+        # Chat is modified either by rewriting its snapshot or by appending to its journal
+        modification_times = {
+            chat_id: max(mtime, journals.get(chat_id, mtime)) for chat_id, mtime in snapshots.items()
+        }
+
+        # Sort the chats based on modification time (descending order)
+        return sorted(modification_times, key=lambda chat_id: modification_times[chat_id], reverse=True)
     else:
         return []
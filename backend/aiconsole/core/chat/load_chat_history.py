@@ -15,128 +15,73 @@
 # limitations under the License.
 
 import json
+import logging
 import os
-import uuid
 from datetime import datetime
 from pathlib import Path
 
+from aiconsole.core.chat.chat_file import (
+    ChatFile,
+    get_chat_file_path,
+    parse_chat_file,
+    write_migrated_chat_file,
+)
+from aiconsole.core.chat.chat_journal import (
+    get_chat_journal_path,
+    replay_chat_journal,
+)
+from aiconsole.core.chat.chat_migrations import migrate_chat_data
 from aiconsole.core.chat.types import Chat
-from aiconsole.core.project.paths import get_history_directory
+
+_log = logging.getLogger(__name__)
+
+
+def _read_chat_file(id: str, file_path: Path, project_path: Path | None) -> ChatFile:
+    content = file_path.read_bytes()
+
+    chat_file = parse_chat_file(content)
+    if chat_file is not None:
+        return chat_file
+
+    # Slow path, the file is in an older format
+    data = json.loads(content.decode("utf8", errors="replace"))
+
+    if migrate_chat_data(data):
+        try:
+            return write_migrated_chat_file(id, data, project_path)
+        except OSError as e:
+            _log.warning(f"Could not write migrated chat {id}: {e}")
+
+    data.pop("id", None)
+    data.pop("last_modified", None)
+
+    return ChatFile.model_validate(data)
 
 
 async def load_chat_history(id: str, project_path: Path | None = None) -> Chat:
-    history_directory = get_history_directory(project_path)
-    file_path = history_directory / f"{id}.json"
+    file_path = get_chat_file_path(id, project_path)
 
     if file_path.exists():
-        with open(file_path, "r", encoding="utf8", errors="replace") as f:
-            data = json.load(f)
-
-            # Convert old format
-            if "message_groups" not in data or not data["message_groups"]:
-                data["message_groups"] = []
-
-                if "messages" in data and data["messages"]:
-                    for message in data["messages"]:
-                        data["message_groups"].append(
-                            {
-                                "id": message["id"] if "id" in message else uuid.uuid4().hex,
-                                "role": message["role"] if "role" in message else "",
-                                "task": message["task"] if "task" in message and message["task"] else "",
-                                "agent_id": message["agent_id"] if "agent_id" in message else "",
-                                "materials_ids": (
-                                    message["materials_ids"]
-                                    if "materials_ids" in message and message["materials_ids"]
-                                    else []
-                                ),
-                                "messages": [
-                                    {
-                                        "id": message["id"] if "id" in message else uuid.uuid4().hex,
-                                        "timestamp": message["timestamp"] if "timestamp" in message else "",
-                                        "content": message["content"] if "content" in message else "",
-                                    }
-                                ],
-                            }
-                        )
-                    del data["messages"]
-
-            # Add tool_calls to each message
-            for group in data["message_groups"]:
-                if "messages" in group and group["messages"]:
-                    for msg in group["messages"]:
-                        if "tool_calls" not in msg:
-                            msg["tool_calls"] = []
-
-            # For all tool calls without headline add an empty headline
-            for group in data["message_groups"]:
-                if "messages" in group and group["messages"]:
-                    for msg in group["messages"]:
-                        if "tool_calls" in msg and msg["tool_calls"]:
-                            for tool_call in msg["tool_calls"]:
-                                if "headline" not in tool_call:
-                                    tool_call["headline"] = ""
-
-            # For each tool with "shell" language change it to "python"
-            for group in data["message_groups"]:
-                if "messages" in group and group["messages"]:
-                    for msg in group["messages"]:
-                        if "tool_calls" in msg and msg["tool_calls"]:
-                            for tool_call in msg["tool_calls"]:
-                                if "language" in tool_call and tool_call["language"] == "shell":
-                                    tool_call["language"] = "python"
-
-            # For each tool call add "type" field with default "function" value
-            for group in data["message_groups"]:
-                if "messages" in group and group["messages"]:
-                    for msg in group["messages"]:
-                        if "tool_calls" in msg and msg["tool_calls"]:
-                            for tool_call in msg["tool_calls"]:
-                                if "type" not in tool_call:
-                                    tool_call["type"] = "function"
-
-            # For each agent_id change it to actor_id
-            for group in data["message_groups"]:
-                if "agent_id" in group:
-                    group["actor_id"] = {
-                        "type": "user" if group["agent_id"] == "user" else "agent",
-                        "id": group["agent_id"],
-                    }
-                    del group["agent_id"]
-
-            # Add "analysis" to each message group
-            for group in data["message_groups"]:
-                if "analysis" not in group:
-                    group["analysis"] = ""
-
-            def extract_default_headline():
-                for group in data["message_groups"]:
-                    if "messages" in group and group["messages"]:
-                        for msg in group["messages"]:
-                            return msg.get("content")
-
-            if "name" not in data or not data["name"]:
-                if "headline" in data and data["headline"]:
-                    data["name"] = data["headline"]
-                elif "title" in data and data["title"]:
-                    data["name"] = data["title"]
-                else:
-                    data["name"] = extract_default_headline() or "New Chat"
-
-            if "title_edited" not in data or not data["title_edited"]:
-                data["title_edited"] = False
-                data["name"] = extract_default_headline() or "New Chat"
-
-            if "id" in data:
-                del data["id"]
-
-            if "last_modified" in data:
-                del data["last_modified"]
-
-            return Chat(
-                id=id,
-                last_modified=datetime.fromtimestamp(os.path.getmtime(file_path)),
-                **data,
+        chat_file = _read_chat_file(id, file_path, project_path)
+
+        # Titles which were not edited by the user follow the first message
+        if not chat_file.title_edited:
+            chat_file.name = (
+                next((group.messages[0].content for group in chat_file.message_groups if group.messages), None)
+                or "New Chat"
             )
+
+        journal_id = chat_file.journal_id
+        journal_path = get_chat_journal_path(id, project_path)
+        last_modified = os.path.getmtime(file_path)
+        if journal_id and journal_path.exists():
+            last_modified = max(last_modified, os.path.getmtime(journal_path))
+
+        chat = chat_file.to_chat(id=id, last_modified=datetime.fromtimestamp(last_modified))
+
+        replay_chat_journal(chat, journal_id, project_path)
+
+        return chat
     else:
         return Chat(
             id=id,
@@ -1,6 +1,8 @@
 import asyncio
 import logging
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
 from typing import Callable, Coroutine
 
 from fastapi import HTTPException
@@ -12,7 +14,11 @@ from aiconsole.api.websockets.connection_manager import (
 from aiconsole.api.websockets.server_messages import (
     NotifyAboutChatMutationServerMessage,
 )
+from aiconsole.consts import CHAT_JOURNAL_ENABLED, CHAT_JOURNAL_FLUSH_EVERY
 from aiconsole.core.chat.apply_mutation import apply_mutation
+from aiconsole.core.chat.chat_cache import chat_cache
+from aiconsole.core.chat.chat_headlines_index import update_chat_headline
+from aiconsole.core.chat.chat_journal import chat_journal, discard_chat_journal
 from aiconsole.core.chat.chat_mutations import (
     ChatMutation,
     LockAcquiredMutation,
@@ -24,33 +30,135 @@ from aiconsole.core.chat.save_chat_history import save_chat_history
 from aiconsole.core.chat.types import Chat
 
 chats: dict[str, Chat] = {}
-lock_events: dict[str, asyncio.Event] = defaultdict(asyncio.Event)
 
 lock_timeout = 30  # Time in seconds to wait for the lock
 
 _log = logging.getLogger(__name__)
 
 
-async def wait_for_lock(chat_id: str) -> None:
-    try:
-        _log.debug(f"Waiting for lock {chat_id}")
-        await asyncio.wait_for(lock_events[chat_id].wait(), timeout=lock_timeout)
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=408, detail="Lock acquisition timed out")
+@dataclass
+class LockMetrics:
+    acquisitions: int = 0
+    contended_acquisitions: int = 0
+    handoffs: int = 0
+    timeouts: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    def record_wait(self, wait_time: float) -> None:
+        self.acquisitions += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+lock_metrics = LockMetrics()
+
+
+class ChatLock:
+    """
+    Fair lock of a single chat, waiting requests get it in the order they asked for it.
+
+    On release the lock is handed over directly to the first waiter, so waiters don't race for it.
+    """
+
+    def __init__(self):
+        self.owner: str | None = None
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+
+    @property
+    def has_waiters(self) -> bool:
+        return any(not future.done() for _, future in self._waiters)
+
+    async def acquire(self, owner: str, timeout: float) -> None:
+        if self.owner is None and not self._waiters:
+            self.owner = owner
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((owner, future))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Lock was handed over at the same time, pass it on
+                self.release(owner)
+            else:
+                future.cancel()
+                self._waiters.remove((owner, future))
+            raise
+
+    def release(self, owner: str) -> bool:
+        if self.owner != owner:
+            return False
+
+        self.owner = None
+
+        while self._waiters:
+            next_owner, future = self._waiters.popleft()
+            if not future.done():
+                self.owner = next_owner
+                future.set_result(None)
+                break
+
+        return True
+
+
+_chat_locks: dict[str, ChatLock] = defaultdict(ChatLock)
+
+
+def _unload_chat(chat_id: str) -> None:
+    """
+    Saves a chat nobody holds the lock of, and moves it from memory to the chat cache.
+    """
+
+    if CHAT_JOURNAL_ENABLED:
+        chat_journal(chat_id).flush(chats[chat_id])
+        discard_chat_journal(chat_id)
+        update_chat_headline(chats[chat_id])
+    else:
+        save_chat_history(chats[chat_id])
+    chat_cache().put(chats[chat_id])
+    del chats[chat_id]
+
+    if not _chat_locks[chat_id].has_waiters and _chat_locks[chat_id].owner is None:
+        del _chat_locks[chat_id]
 
 
 async def acquire_lock(chat_id: str, request_id: str, skip_mutating_clients: bool = False):
     _log.debug(f"Acquiring lock {chat_id} {request_id}")
-    if chat_id in chats and chats[chat_id].lock_id:
-        await wait_for_lock(chat_id)
 
-    if chat_id not in chats:
-        chat_history = await load_chat_history(chat_id)
-        chat_history.lock_id = None
-        chats[chat_id] = chat_history
+    lock = _chat_locks[chat_id]
+    contended = lock.owner is not None
+    start = time.monotonic()
+
+    try:
+        await lock.acquire(request_id, timeout=lock_timeout)
+    except BaseException as e:
+        # Lock could have been handed over to this request just before it gave up
+        if lock.owner is None and chat_id in chats:
+            _unload_chat(chat_id)
+
+        if isinstance(e, asyncio.TimeoutError):
+            lock_metrics.timeouts += 1
+            raise HTTPException(status_code=408, detail="Lock acquisition timed out")
+        raise
+
+    wait_time = time.monotonic() - start
+    lock_metrics.record_wait(wait_time)
+    if contended:
+        lock_metrics.contended_acquisitions += 1
+        _log.debug(f"Lock {chat_id} {request_id} acquired after {wait_time:.3f}s")
+
+    try:
+        if chat_id not in chats:
+            chat_history = chat_cache().pop(chat_id) or await load_chat_history(chat_id)
+            chats[chat_id] = chat_history
+    except BaseException:
+        lock.release(request_id)
+        raise
 
     chats[chat_id].lock_id = request_id
-    lock_events[chat_id].clear()
 
     if not skip_mutating_clients:
         await connection_manager().send_to_chat(
@@ -62,10 +170,14 @@ async def acquire_lock(chat_id: str, request_id: str, skip_mutating_clients: boo
     return chats[chat_id]
 
 
-async def _read_chat_outside_of_lock(chat_id: str):
+async def read_chat_outside_of_lock(chat_id: str):
     _log.debug(f"Reading chat{chat_id}")
     if chat_id not in chats:
-        return await load_chat_history(chat_id)
+        chat = chat_cache().get(chat_id)
+        if chat is None:
+            chat = await load_chat_history(chat_id)
+            chat_cache().put(chat)
+        return chat
 
     return chats[chat_id]
 
@@ -73,10 +185,8 @@ async def _read_chat_outside_of_lock(chat_id: str):
 async def release_lock(chat_id: str, request_id: str) -> None:
     if chat_id in chats and chats[chat_id].lock_id == request_id:
         chats[chat_id].lock_id = None
-        save_chat_history(chats[chat_id], scope="message_groups")
-        del chats[chat_id]
-        lock_events[chat_id].set()
 
+        # Sent before the lock is handed over, so clients don't see the next acquisition before this release
         await connection_manager().send_to_chat(
             NotifyAboutChatMutationServerMessage(
                 request_id=request_id, chat_id=chat_id, mutation=LockReleasedMutation(lock_id=request_id)
@@ -84,6 +194,17 @@ async def release_lock(chat_id: str, request_id: str) -> None:
             chat_id,
         )
 
+        lock = _chat_locks[chat_id]
+        if lock.has_waiters:
+            # Chat stays in memory for the next request, only what's not yet persisted is written
+            if CHAT_JOURNAL_ENABLED:
+                chat_journal(chat_id).flush(chats[chat_id])
+            lock_metrics.handoffs += 1
+            lock.release(request_id)
+        else:
+            lock.release(request_id)
+            _unload_chat(chat_id)
+
 
 class DefaultChatMutator(ChatMutator):
     def __init__(self, chat_id: str, request_id: str, connection: AICConnection | None):
@@ -103,47 +224,127 @@ class DefaultChatMutator(ChatMutator):
 
         apply_mutation(self.chat, mutation)
 
-        await connection_manager().send_to_chat(
-            NotifyAboutChatMutationServerMessage(
-                request_id=self.request_id,
-                chat_id=self.chat_id,
-                mutation=mutation,
-            ),
-            self.chat_id,
+        if CHAT_JOURNAL_ENABLED:
+            journal = chat_journal(self.chat_id)
+            journal.record(mutation)
+            if journal.pending_count >= CHAT_JOURNAL_FLUSH_EVERY:
+                journal.flush(self.chat)
+
+        await connection_manager().send_mutation_to_chat(
+            request_id=self.request_id,
+            chat_id=self.chat_id,
+            mutation=mutation,
             except_connection=self.connection,
         )
 
 
-# This lock is responsible for sequencing the mutations and reads on a given chat
-_waiting_mutations: dict[str, list[Coroutine]] = defaultdict(lambda: [])
-_running_mutations: dict[str, asyncio.Task | None] = defaultdict(lambda: None)
+class ChatActor:
+    """
+    Runs operations on a single chat one after another, in the order they were submitted.
 
+    A consumer task takes operations from the queue while there are any, every submitted operation gets a future which
+    completes when it's done. Once the queue is drained the consumer finishes and the actor is forgotten, the next
+    submitted operation starts a new one.
+    """
 
-def _check_mutation_queue(chat_id: str):
-    if _running_mutations[chat_id] is not None:
-        return
+    def __init__(self, chat_id: str):
+        self.chat_id = chat_id
+        self._queue: asyncio.Queue[tuple[Callable[[], Coroutine], asyncio.Future]] = asyncio.Queue()
+        self._consumer: asyncio.Task | None = None
 
-    if not _waiting_mutations[chat_id]:
-        return
+    def submit(self, f: Callable[[], Coroutine]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((f, future))
 
-    h = _waiting_mutations[chat_id].pop()
-    task = asyncio.create_task(h)
-    _running_mutations[chat_id] = task
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.create_task(self._consume())
+
+        return future
+
+    async def barrier(self) -> None:
+        """
+        Waits until everything submitted so far is done.
+        """
+
+        async def noop():
+            pass
+
+        await self.submit(noop)
+
+    async def close(self) -> None:
+        """
+        Stops the consumer, operations still in the queue are not run.
+        """
+
+        consumer = self._consumer
+        if consumer is not None:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+        self._forget()
+
+    async def _consume(self) -> None:
+        try:
+            while not self._queue.empty():
+                f, future = self._queue.get_nowait()
+
+                try:
+                    # Own task, so its cancellation can be told apart from cancellation of the consumer
+                    operation = asyncio.ensure_future(f())
+                    # Operation runs even if whoever waits for it was cancelled, so the chat is not left half mutated
+                    result = await asyncio.shield(operation)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    if not operation.cancelled():
+                        operation.cancel()
+                        raise
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            if self._queue.empty():
+                self._forget()
+
+    def _forget(self) -> None:
+        if _chat_actors.get(self.chat_id) is self:
+            del _chat_actors[self.chat_id]
 
-    def clear_task(future):
-        if _running_mutations[chat_id] == future:
-            _running_mutations[chat_id] = None
-            _check_mutation_queue(chat_id)
-        else:
-            _log.error(f"Task {chat_id} already cleared")
 
-    task.add_done_callback(clear_task)
+_chat_actors: dict[str, ChatActor] = {}
+
+
+def chat_actor(chat_id: str) -> ChatActor:
+    if chat_id not in _chat_actors:
+        _chat_actors[chat_id] = ChatActor(chat_id)
+    return _chat_actors[chat_id]
+
+
+async def close_chat_actor(chat_id: str) -> None:
+    if chat_id in _chat_actors:
+        await _chat_actors[chat_id].close()
+
+
+async def close_chat_actors() -> None:
+    for actor in list(_chat_actors.values()):
+        await actor.close()
+    _chat_actors.clear()
+
+
+def _log_exception(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        _log.error(f"Operation on chat failed: {future.exception()}", exc_info=future.exception())
 
 
 class SequentialChatMutator(ChatMutator):
     def __init__(self, mutator: DefaultChatMutator):
         self.mutator = mutator
-        self._chat = None
 
     @property
     def chat(self) -> Chat:
@@ -153,36 +354,15 @@ class SequentialChatMutator(ChatMutator):
         async def h():
             await self.mutator.mutate(mutation)
 
-        _waiting_mutations[self.mutator.chat_id].append(h())
-        _check_mutation_queue(self.mutator.chat_id)
-
-        await self.wait_for_all_mutations()
+        await chat_actor(self.mutator.chat_id).submit(h)
 
     async def wait_for_all_mutations(self):
-        chat_id = self.mutator.chat_id
-        while _waiting_mutations[chat_id] or _running_mutations[chat_id] is not None:
-            running_mutation = _running_mutations[chat_id]
-            if running_mutation:
-                await running_mutation
-            else:
-                await asyncio.sleep(0)
+        await chat_actor(self.mutator.chat_id).barrier()
 
     async def in_sequence(self, f: Callable[[], Coroutine]):
-        _waiting_mutations[self.mutator.chat_id].append(f())
-        _check_mutation_queue(self.mutator.chat_id)
+        chat_actor(self.mutator.chat_id).submit(f).add_done_callback(_log_exception)
 
     async def read(self) -> Chat:
-        while True:
-            running_mutation = _running_mutations[self.mutator.chat_id]
-
-            if running_mutation is None:
-                break
-
-            await running_mutation
-
-            if running_mutation.exception():
-                _log.exception(running_mutation.exception())
-
-            await asyncio.sleep(0)
+        await chat_actor(self.mutator.chat_id).barrier()
 
-        return await _read_chat_outside_of_lock(chat_id=self.mutator.chat_id)
+        return await read_chat_outside_of_lock(chat_id=self.mutator.chat_id)
@@ -0,0 +1,55 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from aiconsole.core.chat.chat_mutations import (
+    AppendToAnalysisMessageGroupMutation,
+    AppendToCodeToolCallMutation,
+    AppendToContentMessageMutation,
+    AppendToHeadlineToolCallMutation,
+    AppendToOutputToolCallMutation,
+    AppendToTaskMessageGroupMutation,
+    ChatMutation,
+)
+
+# For each append-style mutation: (name of the target id field, name of the delta field)
+APPEND_MUTATION_FIELDS: dict[type, tuple[str, str]] = {
+    AppendToTaskMessageGroupMutation: ("message_group_id", "task_delta"),
+    AppendToAnalysisMessageGroupMutation: ("message_group_id", "analysis_delta"),
+    AppendToContentMessageMutation: ("message_id", "content_delta"),
+    AppendToHeadlineToolCallMutation: ("tool_call_id", "headline_delta"),
+    AppendToCodeToolCallMutation: ("tool_call_id", "code_delta"),
+    AppendToOutputToolCallMutation: ("tool_call_id", "output_delta"),
+}
+
+
+def merge_append_mutations(previous: ChatMutation, mutation: ChatMutation) -> ChatMutation | None:
+    """
+    Merges two consecutive append mutations targeting the same field of the same object into one.
+
+    Returns None if the mutations can not be merged.
+    """
+
+    if type(previous) is not type(mutation) or type(mutation) not in APPEND_MUTATION_FIELDS:
+        return None
+
+    id_field, delta_field = APPEND_MUTATION_FIELDS[type(mutation)]
+
+    if getattr(previous, id_field) != getattr(mutation, id_field):
+        return None
+
+    return mutation.model_copy(
+        update={delta_field: getattr(previous, delta_field) + getattr(mutation, delta_field)},
+    )
@@ -14,44 +14,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 import os
 
+from aiconsole.core.chat.chat_file import (
+    get_chat_file_path,
+    get_chat_hash_path,
+    write_chat_file,
+)
+from aiconsole.core.chat.chat_headlines_index import update_chat_headline
+from aiconsole.core.chat.chat_journal import get_chat_journal_path
 from aiconsole.core.chat.types import Chat
-from aiconsole.core.project.paths import get_history_directory
 
 
-def save_chat_history(chat: Chat, scope: str = "default"):
-    history_directory = get_history_directory()
-    file_path = history_directory / f"{chat.id}.json"
+def save_chat_history(chat: Chat):
+    """
+    Writes the whole chat as given, there are no partial saves of single fields.
 
-    new_content = chat.model_dump(exclude={"id", "last_modified"})
+    Whatever is on disk is replaced, so the chat should come from read_chat_outside_of_lock or the lock holder, which
+    have its latest state including changes not saved yet.
+    """
+
+    journal_path = get_chat_journal_path(chat.id)
 
     if len(chat.message_groups) == 0 and chat.chat_options.is_default():
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    else:
-        os.makedirs(history_directory, exist_ok=True)
-
-        # check if file exists and contents are the same
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf8", errors="replace") as f:
-                old_content = json.load(f)
-                if scope == "chat_options" and (
-                    "chat_options" not in old_content or old_content["chat_options"] != new_content["chat_options"]
-                ):
-                    old_content["chat_options"] = new_content["chat_options"]
-                    new_content = old_content
-                elif scope == "message_groups" and old_content["message_groups"] != new_content["message_groups"]:
-                    old_content["message_groups"] = new_content["message_groups"]
-                    new_content = old_content
-                elif scope == "name" and ("name" not in old_content or old_content["name"] != new_content["name"]):
-                    old_content["name"] = new_content["name"]
-                    old_content["title_edited"] = True
-                    new_content = old_content
-                else:
-                    return  # contents are the same, no need to write to file
-
-        # write new content to file
-        with open(file_path, "w", encoding="utf8", errors="replace") as f:
-            json.dump(new_content, f)
+        for path in (get_chat_file_path(chat.id), get_chat_hash_path(chat.id), journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        update_chat_headline(chat)
+    elif write_chat_file(chat):
+        # Chat is saved as a whole, so the journal (if any) is already part of it
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+
+        update_chat_headline(chat)
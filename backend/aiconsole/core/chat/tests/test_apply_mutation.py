@@ -0,0 +1,89 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.apply_mutation import apply_mutation
+from aiconsole.core.chat.chat_mutations import (
+    AppendToCodeToolCallMutation,
+    AppendToContentMessageMutation,
+    CreateMessageGroupMutation,
+    CreateMessageMutation,
+    CreateToolCallMutation,
+    DeleteMessageGroupMutation,
+    DeleteToolCallMutation,
+)
+from aiconsole.core.chat.types import Chat
+
+
+def _create_chat(message_groups_count: int) -> Chat:
+    chat = Chat(id="chat", name="", last_modified=datetime.now(), message_groups=[])
+
+    for i in range(message_groups_count):
+        apply_mutation(
+            chat,
+            CreateMessageGroupMutation(
+                message_group_id=f"group_{i}",
+                actor_id=ActorId(type="agent", id="agent"),
+                role="assistant",
+                task="",
+                materials_ids=[],
+                analysis="",
+            ),
+        )
+        apply_mutation(
+            chat,
+            CreateMessageMutation(message_group_id=f"group_{i}", message_id=f"message_{i}", timestamp="", content=""),
+        )
+        apply_mutation(
+            chat,
+            CreateToolCallMutation(message_id=f"message_{i}", tool_call_id=f"tool_call_{i}", code="", headline=""),
+        )
+
+    return chat
+
+
+def _time_per_token(chat: Chat, tokens: int = 2000) -> float:
+    last = len(chat.message_groups) - 1
+
+    start = time.perf_counter()
+    for _ in range(tokens):
+        apply_mutation(chat, AppendToContentMessageMutation(message_id=f"message_{last}", content_delta="x"))
+        apply_mutation(chat, AppendToCodeToolCallMutation(tool_call_id=f"tool_call_{last}", code_delta="x"))
+    return (time.perf_counter() - start) / tokens
+
+
+@pytest.mark.benchmark
+def test_per_token_cost_should_not_grow_with_chat_length():
+    small_chat = _create_chat(10)
+    large_chat = _create_chat(5000)
+
+    # Warm up
+    _time_per_token(small_chat, tokens=100)
+    _time_per_token(large_chat, tokens=100)
+
+    small = min(_time_per_token(small_chat) for _ in range(3))
+    large = min(_time_per_token(large_chat) for _ in range(3))
+
+    # Linear lookups would make the large chat ~500x slower
+    assert large < small * 5, f"{small * 1e6:.2f}us per token for 10 message groups, {large * 1e6:.2f}us for 5000"
+
+
+def test_should_keep_index_consistent_after_deletions():
+    chat = _create_chat(3)
+
+    apply_mutation(chat, DeleteMessageGroupMutation(message_group_id="group_0"))
+    apply_mutation(chat, DeleteToolCallMutation(tool_call_id="tool_call_1"))
+
+    assert chat.get_message_group("group_0") is None
+    assert chat.get_message_location("message_0") is None
+    assert chat.get_tool_call_location("tool_call_0") is None
+
+    # Message without content and tool calls is removed together with its group
+    assert chat.get_message_group("group_1") is None
+    assert chat.get_message_location("message_1") is None
+
+    tool_call_location = chat.get_tool_call_location("tool_call_2")
+    assert tool_call_location is not None
+    assert tool_call_location.message_group is chat.message_groups[0]
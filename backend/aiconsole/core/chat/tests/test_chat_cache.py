@@ -0,0 +1,92 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.chat_cache import ChatCache, chat_cache
+from aiconsole.core.chat.locking import (
+    acquire_lock,
+    read_chat_outside_of_lock,
+    release_lock,
+)
+from aiconsole.core.chat.save_chat_history import save_chat_history
+from aiconsole.core.chat.types import AICMessage, AICMessageGroup, Chat
+
+
+def _create_chat(chat_id: str, content: str = "Hello") -> Chat:
+    return Chat(
+        id=chat_id,
+        name="",
+        last_modified=datetime.now(),
+        message_groups=[
+            AICMessageGroup(
+                id="group",
+                actor_id=ActorId(type="user", id="user"),
+                role="user",
+                task="",
+                materials_ids=[],
+                analysis="",
+                messages=[AICMessage(id="message", timestamp="", content=content, tool_calls=[])],
+            )
+        ],
+    )
+
+
+def test_should_serve_cached_chat_until_it_changes_on_disk(initialized_project_dir):
+    cache = ChatCache()
+    chat = _create_chat("chat")
+    save_chat_history(chat)
+    cache.put(chat)
+
+    assert cache.get("chat") is chat
+
+    save_chat_history(_create_chat("chat", content="Changed"))
+
+    assert cache.get("chat") is None
+    assert len(cache) == 0
+
+
+def test_should_evict_least_recently_used_chats(initialized_project_dir):
+    cache = ChatCache(max_size=2)
+    for chat_id in ("chat_1", "chat_2"):
+        chat = _create_chat(chat_id)
+        save_chat_history(chat)
+        cache.put(chat)
+
+    cache.get("chat_1")
+    chat_3 = _create_chat("chat_3")
+    save_chat_history(chat_3)
+    cache.put(chat_3)
+
+    assert cache.get("chat_2") is None
+    assert cache.get("chat_1") is not None
+    assert cache.get("chat_3") is not None
+
+
+def test_should_evict_chats_above_max_bytes(initialized_project_dir):
+    chat_1 = _create_chat("chat_1")
+    save_chat_history(chat_1)
+    chat_2 = _create_chat("chat_2")
+    save_chat_history(chat_2)
+
+    cache = ChatCache(max_bytes=os.path.getsize(initialized_project_dir / "chats" / "chat_1.json") + 1)
+    cache.put(chat_1)
+    cache.put(chat_2)
+
+    assert cache.get("chat_1") is None
+    assert cache.get("chat_2") is chat_2
+
+
+@pytest.mark.asyncio
+async def test_should_not_reload_chat_after_lock_is_released(initialized_project_dir):
+    save_chat_history(_create_chat("chat"))
+    hits = chat_cache().hits
+
+    opened = await read_chat_outside_of_lock("chat")
+    chat = await acquire_lock("chat", "request", skip_mutating_clients=True)
+    await release_lock("chat", "request")
+
+    assert chat is opened
+    assert await read_chat_outside_of_lock("chat") is chat
+    assert chat_cache().hits == hits + 2
@@ -0,0 +1,153 @@
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.chat_file import write_chat_file
+from aiconsole.core.chat.load_chat_history import load_chat_history
+from aiconsole.core.chat.save_chat_history import save_chat_history
+from aiconsole.core.chat.types import AICMessage, AICMessageGroup, AICToolCall, Chat
+
+
+def _create_chat(messages_count: int) -> Chat:
+    return Chat(
+        id="chat",
+        name="Benchmark",
+        title_edited=True,
+        last_modified=datetime.now(),
+        message_groups=[
+            AICMessageGroup(
+                id=f"group_{i}",
+                actor_id=ActorId(type="agent", id="agent"),
+                role="assistant",
+                task="",
+                materials_ids=[],
+                analysis="",
+                messages=[
+                    AICMessage(
+                        id=f"message_{i}",
+                        timestamp=datetime.now().isoformat(),
+                        content=f"Message {i} " * 20,
+                        tool_calls=[
+                            AICToolCall(id=f"tool_call_{i}", code=f"print({i})\n" * 5, headline="", output=f"{i}\n")
+                        ],
+                    )
+                ],
+            )
+            for i in range(messages_count)
+        ],
+    )
+
+
+async def _duration(function) -> float:
+    start = time.perf_counter()
+    result = function()
+    if inspect.isawaitable(result):
+        await result
+    return time.perf_counter() - start
+
+
+async def _peak_memory(function) -> int:
+    # Measured separately, tracing allocations slows everything down
+    tracemalloc.start()
+    result = function()
+    if inspect.isawaitable(result):
+        await result
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def _benchmark(save, load, remove) -> dict[str, float]:
+    save_duration = await _duration(save)
+    unchanged_save_duration = await _duration(save)
+    load_duration = min([await _duration(load) for _ in range(3)])
+    load_peak = await _peak_memory(load)
+    remove()
+    save_peak = await _peak_memory(save)
+
+    return {
+        "save_ms": save_duration * 1000,
+        "unchanged_save_ms": unchanged_save_duration * 1000,
+        "load_ms": load_duration * 1000,
+        "save_peak_kb": save_peak / 1024,
+        "load_peak_kb": load_peak / 1024,
+    }
+
+
+def _legacy_save(chat: Chat, file_path):
+    # How chats were saved before, read and compare the previous content, then write a whole dict
+    new_content = chat.model_dump(exclude={"id", "last_modified"})
+    if os.path.exists(file_path):
+        with open(file_path, "r", encoding="utf8", errors="replace") as f:
+            if json.load(f)["message_groups"] == new_content["message_groups"]:
+                return
+    with open(file_path, "w", encoding="utf8", errors="replace") as f:
+        json.dump(new_content, f)
+
+
+def _legacy_load(file_path):
+    with open(file_path, "r", encoding="utf8", errors="replace") as f:
+        data = json.load(f)
+    data.pop("version", None)
+    data.pop("journal_id", None)
+    return Chat(id="chat", last_modified=datetime.now(), **data)
+
+
+@pytest.mark.asyncio
+async def test_saved_chat_is_loaded_back_and_not_written_again_while_unchanged(initialized_project_dir):
+    chat = _create_chat(100)
+    file_path = initialized_project_dir / "chats" / "chat.json"
+
+    assert write_chat_file(chat)
+    modification_time = file_path.stat().st_mtime_ns
+
+    assert not write_chat_file(chat)
+    assert file_path.stat().st_mtime_ns == modification_time
+
+    loaded = await load_chat_history("chat")
+    assert loaded.model_dump(exclude={"last_modified"}) == chat.model_dump(exclude={"last_modified"})
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("messages_count", [1_000, 10_000])
+async def test_chat_file_load_and_save_benchmark(initialized_project_dir, messages_count):
+    chat = _create_chat(messages_count)
+    file_path = initialized_project_dir / "chats" / "chat.json"
+    legacy_path = initialized_project_dir / "legacy.json"
+
+    results = await _benchmark(
+        save=lambda: save_chat_history(chat),
+        load=lambda: load_chat_history("chat"),
+        remove=lambda: [os.remove(path) for path in (file_path, file_path.with_suffix(".sha256"))],
+    )
+    legacy_results = await _benchmark(
+        save=lambda: _legacy_save(chat, legacy_path),
+        load=lambda: _legacy_load(legacy_path),
+        remove=lambda: os.remove(legacy_path),
+    )
+
+    comparison = ", ".join(f"{key}: {results[key]:.1f} (was {legacy_results[key]:.1f})" for key in results)
+    assert results["save_ms"] < legacy_results["save_ms"], comparison
+    assert results["unchanged_save_ms"] < legacy_results["unchanged_save_ms"], comparison
+    assert results["load_peak_kb"] < legacy_results["load_peak_kb"], comparison
+
+
+def test_unchanged_chat_is_written_again_if_its_file_changed_on_disk(initialized_project_dir):
+    chat = _create_chat(1)
+    file_path = initialized_project_dir / "chats" / "chat.json"
+
+    assert write_chat_file(chat)
+    assert not write_chat_file(chat)
+
+    content = file_path.read_bytes()
+    file_path.write_bytes(b"{}")
+
+    assert write_chat_file(chat)
+    assert file_path.read_bytes() == content
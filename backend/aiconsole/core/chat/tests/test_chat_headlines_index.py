@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.chat import chat_headlines_index
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.chat_headlines_index import (
+    get_chat_headlines,
+    update_chat_headline,
+)
+from aiconsole.core.chat.save_chat_history import save_chat_history
+from aiconsole.core.chat.types import AICMessage, AICMessageGroup, Chat
+
+
+def _save_chat(chat_id: str, content: str) -> Chat:
+    chat = Chat(
+        id=chat_id,
+        name="",
+        last_modified=datetime.now(),
+        message_groups=[
+            AICMessageGroup(
+                id="group",
+                actor_id=ActorId(type="user", id="user"),
+                role="user",
+                analysis="",
+                task="",
+                materials_ids=[],
+                messages=[AICMessage(id="message", timestamp="", content=content)],
+            )
+        ],
+    )
+    save_chat_history(chat)
+    return chat
+
+
+@pytest.mark.asyncio
+async def test_should_list_headlines_without_loading_chats(initialized_project_dir, monkeypatch):
+    _save_chat("chat_1", "First")
+    _save_chat("chat_2", "Second")
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("Chat should not be loaded")
+
+    monkeypatch.setattr(chat_headlines_index, "load_chat_history", fail)
+
+    headlines = await get_chat_headlines()
+
+    assert {headline.id: headline.name for headline in headlines} == {"chat_1": "First", "chat_2": "Second"}
+    assert len(await get_chat_headlines(limit=1)) == 1
+    assert len(await get_chat_headlines(offset=1)) == 1
+
+
+@pytest.mark.asyncio
+async def test_should_rebuild_headline_of_chat_modified_outside_of_aiconsole(initialized_project_dir):
+    _save_chat("chat", "Before")
+
+    chat_path = initialized_project_dir / "chats" / "chat.json"
+    chat_path.write_text(chat_path.read_text().replace("Before", "After, from another process"))
+
+    headlines = await get_chat_headlines()
+
+    assert headlines[0].name == "After, from another process"
+
+
+@pytest.fixture
+def index_writes(monkeypatch):
+    writes: list[dict] = []
+    write_index = chat_headlines_index._write_index
+
+    def record_write(index, index_path):
+        writes.append(index)
+        write_index(index, index_path)
+
+    monkeypatch.setattr(chat_headlines_index, "CHAT_HEADLINES_INDEX_WRITE_DELAY", 0.01)
+    monkeypatch.setattr(chat_headlines_index, "_write_index", record_write)
+    return writes
+
+
+@pytest.mark.asyncio
+async def test_updates_are_written_together(initialized_project_dir, index_writes):
+    for i in range(10):
+        _save_chat(f"chat_{i}", f"Chat {i}")
+
+    await asyncio.sleep(0.1)
+
+    assert len(index_writes) == 1
+    assert sorted(index_writes[0]) == [f"chat_{i}" for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_headline_is_not_written(initialized_project_dir, index_writes):
+    chat = _save_chat("chat", "Content")
+    await asyncio.sleep(0.1)
+
+    update_chat_headline(chat)
+    await asyncio.sleep(0.1)
+
+    assert len(index_writes) == 1
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.chat_journal import ChatJournal, get_chat_journal_path
+from aiconsole.core.chat.chat_mutations import (
+    AppendToContentMessageMutation,
+    CreateMessageGroupMutation,
+    CreateMessageMutation,
+)
+from aiconsole.core.chat.load_chat_history import load_chat_history
+from aiconsole.core.chat.locking import DefaultChatMutator, acquire_lock, release_lock
+
+
+async def _write_message(chat_id: str, request_id: str, mutations: list) -> None:
+    await acquire_lock(chat_id=chat_id, request_id=request_id, skip_mutating_clients=True)
+    mutator = DefaultChatMutator(chat_id=chat_id, request_id=request_id, connection=None)
+    for mutation in mutations:
+        await mutator.mutate(mutation)
+    await release_lock(chat_id=chat_id, request_id=request_id)
+
+
+@pytest.mark.asyncio
+async def test_should_append_mutations_to_journal_instead_of_rewriting_chat(initialized_project_dir):
+    await _write_message(
+        "chat",
+        "request_1",
+        [
+            CreateMessageGroupMutation(
+                message_group_id="group",
+                actor_id=ActorId(type="user", id="user"),
+                role="user",
+                task="",
+                materials_ids=[],
+                analysis="",
+            ),
+            CreateMessageMutation(message_group_id="group", message_id="message", timestamp="", content="Hello"),
+        ],
+    )
+
+    snapshot_path = initialized_project_dir / "chats" / "chat.json"
+    snapshot = snapshot_path.read_text()
+
+    await _write_message(
+        "chat",
+        "request_2",
+        [AppendToContentMessageMutation(message_id="message", content_delta=delta) for delta in " world !"],
+    )
+
+    assert snapshot_path.read_text() == snapshot
+
+    journal_lines = get_chat_journal_path("chat").read_text().splitlines()
+    assert json.loads(journal_lines[0])["journal_id"] == json.loads(snapshot)["journal_id"]
+    assert len(journal_lines) == 2  # Streamed deltas are coalesced into a single entry
+
+    chat = await load_chat_history("chat")
+    assert chat.message_groups[0].messages[0].content == "Hello world !"
+
+
+@pytest.mark.asyncio
+async def test_should_ignore_journal_of_previous_snapshot(initialized_project_dir):
+    await _write_message(
+        "chat",
+        "request_1",
+        [
+            CreateMessageGroupMutation(
+                message_group_id="group",
+                actor_id=ActorId(type="user", id="user"),
+                role="user",
+                task="",
+                materials_ids=[],
+                analysis="",
+            ),
+            CreateMessageMutation(message_group_id="group", message_id="message", timestamp="", content="Hello"),
+        ],
+    )
+
+    journal_path = get_chat_journal_path("chat")
+    stale_journal = (
+        journal_path.read_text()
+        + AppendToContentMessageMutation(message_id="message", content_delta=" again").model_dump_json()
+        + "\n"
+    )
+
+    chat = await load_chat_history("chat")
+    ChatJournal("chat").compact(chat)
+    journal_path.write_text(stale_journal)
+
+    chat = await load_chat_history("chat")
+    assert chat.message_groups[0].messages[0].content == "Hello"
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from aiconsole.core.chat import locking
+from aiconsole.core.chat.locking import ChatLock, acquire_lock, release_lock
+
+
+@pytest.mark.asyncio
+async def test_should_grant_lock_in_order_of_requests():
+    lock = ChatLock()
+    order = []
+
+    await lock.acquire("first", timeout=1)
+
+    async def acquire(owner: str):
+        await lock.acquire(owner, timeout=1)
+        order.append(owner)
+        await asyncio.sleep(0)
+        lock.release(owner)
+
+    waiters = [asyncio.create_task(acquire(owner)) for owner in ("second", "third", "fourth")]
+    await asyncio.sleep(0)
+    lock.release("first")
+    await asyncio.gather(*waiters)
+
+    assert order == ["second", "third", "fourth"]
+    assert lock.owner is None
+
+
+@pytest.mark.asyncio
+async def test_timed_out_waiter_does_not_block_the_next_one():
+    lock = ChatLock()
+    await lock.acquire("first", timeout=1)
+
+    timed_out = asyncio.create_task(lock.acquire("second", timeout=0.01))
+    next_waiter = asyncio.create_task(lock.acquire("third", timeout=1))
+
+    with pytest.raises(asyncio.TimeoutError):
+        await timed_out
+
+    lock.release("first")
+    await next_waiter
+
+    assert lock.owner == "third"
+
+
+@pytest.mark.asyncio
+async def test_should_hand_over_chat_without_reloading_it(initialized_project_dir, monkeypatch):
+    loads = []
+    load_chat_history = locking.load_chat_history
+
+    async def counting_load_chat_history(chat_id: str):
+        loads.append(chat_id)
+        return await load_chat_history(chat_id)
+
+    monkeypatch.setattr(locking, "load_chat_history", counting_load_chat_history)
+    handoffs = locking.lock_metrics.handoffs
+
+    chat = await acquire_lock("chat", "first", skip_mutating_clients=True)
+    waiter = asyncio.create_task(acquire_lock("chat", "second", skip_mutating_clients=True))
+    await asyncio.sleep(0)
+    await release_lock("chat", "first")
+
+    assert await waiter is chat
+    assert chat.lock_id == "second"
+    assert loads == ["chat"]
+    assert locking.lock_metrics.handoffs == handoffs + 1
+
+    await release_lock("chat", "second")
+
+    assert "chat" not in locking.chats
+
+
+@pytest.mark.asyncio
+async def test_should_time_out_waiting_for_lock(initialized_project_dir, monkeypatch):
+    monkeypatch.setattr(locking, "lock_timeout", 0.01)
+    timeouts = locking.lock_metrics.timeouts
+
+    await acquire_lock("chat", "first", skip_mutating_clients=True)
+
+    with pytest.raises(HTTPException) as e:
+        await acquire_lock("chat", "second", skip_mutating_clients=True)
+
+    assert e.value.status_code == 408
+    assert locking.lock_metrics.timeouts == timeouts + 1
+
+    await release_lock("chat", "first")
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from aiconsole.core.chat.chat_file import get_chat_hash_path
+from aiconsole.core.chat.chat_migrations import CHAT_VERSION, migrate_all_chats
+from aiconsole.core.chat.load_chat_history import load_chat_history
+
+LEGACY_CHAT = {
+    "id": "chat",
+    "headline": "Legacy chat",
+    "messages": [
+        {
+            "id": "message",
+            "role": "user",
+            "agent_id": "user",
+            "timestamp": "2023-12-01T12:00:00",
+            "content": "Hello",
+        }
+    ],
+}
+
+
+@pytest.fixture
+def chats_directory(initialized_project_dir):
+    (initialized_project_dir / "chats").mkdir()
+    return initialized_project_dir / "chats"
+
+
+@pytest.mark.asyncio
+async def test_should_migrate_legacy_chat_once_and_keep_its_modification_time(chats_directory):
+    chat_path = chats_directory / "chat.json"
+    chat_path.write_text(json.dumps(LEGACY_CHAT))
+    os.utime(chat_path, (1700000000, 1700000000))
+
+    chat = await load_chat_history("chat")
+
+    assert chat.message_groups[0].actor_id.id == "user"
+    assert chat.message_groups[0].messages[0].content == "Hello"
+
+    migrated = json.loads(chat_path.read_text())
+    assert migrated["version"] == CHAT_VERSION
+    assert "messages" not in migrated
+    assert os.path.getmtime(chat_path) == 1700000000
+    assert get_chat_hash_path("chat").exists()
+
+    assert (await load_chat_history("chat")).model_dump() == chat.model_dump()
+
+
+def test_should_migrate_all_chats_of_project(initialized_project_dir, chats_directory):
+    for chat_id in ("chat_1", "chat_2"):
+        (chats_directory / f"{chat_id}.json").write_text(json.dumps(LEGACY_CHAT))
+
+    assert migrate_all_chats(initialized_project_dir) == 2
+    assert migrate_all_chats(initialized_project_dir) == 0
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.chat.actor_id import ActorId
+from aiconsole.core.chat.apply_mutation import apply_mutation
+from aiconsole.core.chat.chat_mutations import (
+    AppendToCodeToolCallMutation,
+    AppendToHeadlineToolCallMutation,
+    ChatMutation,
+    CreateMessageGroupMutation,
+    CreateMessageMutation,
+    SetCodeToolCallMutation,
+    SetHeadlineToolCallMutation,
+    SetLanguageToolCallMutation,
+)
+from aiconsole.core.chat.execution_modes.utils.send_code import send_code
+from aiconsole.core.chat.types import Chat
+from aiconsole.core.gpt.partial import GPTPartialFunctionCall, GPTPartialToolsCall
+
+ARGUMENTS_DELTAS = ['{"head', 'line": "Prints', ' numbers", "co', 'de": "for i in range(3):\\n', '    print(i)\\n"}']
+
+
+class python_tool:
+    pass
+
+
+class RecordingMutator:
+    def __init__(self):
+        self.chat = Chat(id="chat", name="", last_modified=datetime.now(), message_groups=[])
+        self.mutations: list[ChatMutation] = []
+
+    async def mutate(self, mutation: ChatMutation) -> None:
+        self.mutations.append(mutation)
+        apply_mutation(self.chat, mutation)
+
+
+@pytest.mark.asyncio
+async def test_streamed_arguments_are_sent_as_deltas():
+    mutator = RecordingMutator()
+    await mutator.mutate(
+        CreateMessageGroupMutation(
+            message_group_id="group",
+            actor_id=ActorId(type="agent", id="agent"),
+            role="assistant",
+            task="",
+            materials_ids=[],
+            analysis="",
+        )
+    )
+    await mutator.mutate(
+        CreateMessageMutation(message_group_id="group", message_id="message", timestamp="", content="")
+    )
+
+    tool_call = GPTPartialToolsCall(
+        id="tool_call", type="function", function=GPTPartialFunctionCall(name="python_tool")
+    )
+
+    for arguments_delta in ARGUMENTS_DELTAS:
+        tool_call.function.arguments_builder.append(arguments_delta)
+        await send_code([tool_call], mutator, set(), "message", [python_tool])  # type: ignore
+
+    tool_call_location = mutator.chat.get_tool_call_location("tool_call")
+    assert tool_call_location is not None
+    assert tool_call_location.tool_call.language == "python"
+    assert tool_call_location.tool_call.headline == "Prints numbers"
+    assert tool_call_location.tool_call.code == "for i in range(3):\n    print(i)\n"
+
+    assert [m.code_delta for m in mutator.mutations if isinstance(m, AppendToCodeToolCallMutation)] == [
+        "for i in range(3):\n",
+        "    print(i)\n",
+    ]
+    assert [m.headline_delta for m in mutator.mutations if isinstance(m, AppendToHeadlineToolCallMutation)] == [
+        "Prints",
+        " numbers",
+    ]
+    assert len([m for m in mutator.mutations if isinstance(m, SetLanguageToolCallMutation)]) == 1
+    assert not [m for m in mutator.mutations if isinstance(m, (SetCodeToolCallMutation, SetHeadlineToolCallMutation))]
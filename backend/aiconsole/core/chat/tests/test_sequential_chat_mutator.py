@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from aiconsole.core.chat import locking
+from aiconsole.core.chat.locking import SequentialChatMutator
+
+CHATS_COUNT = 12
+MUTATIONS_COUNT = 200
+
+
+class RecordingMutator:
+    def __init__(self, chat_id: str, applied: list):
+        self.chat_id = chat_id
+        self.applied = applied
+
+    async def mutate(self, mutation) -> None:
+        await asyncio.sleep(0)  # Lets other chats and submitters run in between
+        self.applied.append(mutation)
+
+
+@pytest.mark.asyncio
+async def test_mutations_are_applied_in_submission_order():
+    applied = []
+    mutator = SequentialChatMutator(RecordingMutator("chat", applied))  # type: ignore
+
+    for i in range(100):
+        await mutator.in_sequence(lambda i=i: mutator.mutator.mutate(i))
+    await mutator.wait_for_all_mutations()
+
+    await locking.close_chat_actors()
+
+    assert applied == list(range(100))
+
+
+@pytest.mark.asyncio
+async def test_mutation_failure_is_raised_to_its_caller_only():
+    class FailingMutator(RecordingMutator):
+        async def mutate(self, mutation) -> None:
+            if mutation == "fail":
+                raise ValueError(mutation)
+            await super().mutate(mutation)
+
+    applied = []
+    mutator = SequentialChatMutator(FailingMutator("chat", applied))  # type: ignore
+
+    results = await asyncio.gather(
+        mutator.mutate("first"), mutator.mutate("fail"), mutator.mutate("last"), return_exceptions=True
+    )
+
+    await locking.close_chat_actors()
+
+    assert isinstance(results[1], ValueError)
+    assert results[0] is None and results[2] is None
+    assert applied == ["first", "last"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_keep_their_own_order():
+    applied: dict[str, list] = {f"chat_{i}": [] for i in range(CHATS_COUNT)}
+
+    async def stream(chat_id: str):
+        mutator = SequentialChatMutator(RecordingMutator(chat_id, applied[chat_id]))  # type: ignore
+        for i in range(MUTATIONS_COUNT):
+            await mutator.mutate(i)
+
+    await asyncio.gather(*(stream(chat_id) for chat_id in applied))
+
+    await locking.close_chat_actors()
+
+    for chat_applied in applied.values():
+        assert chat_applied == list(range(MUTATIONS_COUNT))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_operation_does_not_stop_the_actor():
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def done():
+        return "done"
+
+    actor = locking.chat_actor("chat")
+
+    cancelled_future = actor.submit(cancelled)
+    result = await actor.submit(done)
+
+    await locking.close_chat_actors()
+
+    assert cancelled_future.cancelled()
+    assert result == "done"
+
+
+@pytest.mark.asyncio
+async def test_drained_actor_is_forgotten():
+    actor = locking.chat_actor("chat")
+
+    await actor.barrier()
+    await asyncio.sleep(0)
+
+    assert "chat" not in locking._chat_actors
+    assert await locking.chat_actor("chat").submit(lambda: asyncio.sleep(0, "done")) == "done"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_consumer_stops():
+    started = asyncio.Event()
+
+    async def blocking():
+        started.set()
+        await asyncio.Event().wait()
+
+    actor = locking.chat_actor("chat")
+    future = actor.submit(blocking)
+    await started.wait()
+
+    actor._consumer.cancel()  # type: ignore
+    await asyncio.wait_for(asyncio.gather(actor._consumer, return_exceptions=True), timeout=1)  # type: ignore
+
+    assert future.cancelled()
+    assert "chat" not in locking._chat_actors
@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from aiconsole.core.assets.agents.agent import AICAgent
+from aiconsole.core.assets.materials.material import (
+    Material,
+    MaterialContentType,
+    MaterialRenderErrorEvent,
+)
+from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
+from aiconsole.core.assets.types import AssetLocation
+from aiconsole.core.chat.execution_modes.analysis import speculative_preparation
+from aiconsole.core.chat.execution_modes.analysis.speculative_preparation import (
+    SpeculativePreparation,
+)
+from aiconsole.core.chat.types import Chat
+from aiconsole.utils.events import internal_events
+
+RENDER_TIME = 0.1
+
+
+@pytest.fixture
+def started(monkeypatch):
+    started: dict[str, list[str]] = {"execution_modes": [], "materials": [], "cancelled": []}
+
+    async def import_and_validate_execution_mode(agent, chat_id):
+        started["execution_modes"].append(agent.id)
+        return f"execution mode of {agent.id}"
+
+    async def render(self, context):
+        started["materials"].append(self.id)
+        try:
+            await asyncio.sleep(RENDER_TIME)
+        except asyncio.CancelledError:
+            started["cancelled"].append(self.id)
+            raise
+        await internal_events().emit(MaterialRenderErrorEvent(), details=self.id)
+        relevant_materials = ",".join(material.id for material in context.relevant_materials)
+        return RenderedMaterial(
+            id=self.id, content=f"{self.id} for {context.agent.id} with {relevant_materials}", error=""
+        )
+
+    monkeypatch.setattr(
+        speculative_preparation, "import_and_validate_execution_mode", import_and_validate_execution_mode
+    )
+    monkeypatch.setattr(Material, "render", render)
+
+    return started
+
+
+def _agent(agent_id: str) -> AICAgent:
+    return AICAgent(
+        id=agent_id,
+        name=agent_id,
+        usage="",
+        usage_examples=[],
+        system="",
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+    )
+
+
+def _material(material_id: str, content_type: MaterialContentType = MaterialContentType.STATIC_TEXT) -> Material:
+    return Material(
+        id=material_id,
+        name=material_id,
+        usage="",
+        usage_examples=[],
+        defined_in=AssetLocation.PROJECT_DIR,
+        override=False,
+        content_type=content_type,
+    )
+
+
+def _chat() -> Chat:
+    return Chat(id="chat", name="", last_modified=datetime.now(), title_edited=False, message_groups=[])
+
+
+@pytest.mark.asyncio
+async def test_speculated_work_is_reused_by_matching_plan(started):
+    preparation = SpeculativePreparation(_chat())
+    agent, materials = _agent("coder"), [_material("first"), _material("second")]
+
+    preparation.speculate(agent, materials[:1])
+    preparation.speculate(agent, materials)
+    await asyncio.sleep(RENDER_TIME / 2)
+
+    start = asyncio.get_running_loop().time()
+    execution_mode, rendered_materials = await preparation.prepare(agent, materials)
+    duration = asyncio.get_running_loop().time() - start
+
+    assert execution_mode == "execution mode of coder"
+    assert [m.content for m in rendered_materials] == [
+        "first for coder with first",
+        "second for coder with first,second",
+    ]
+    assert started["materials"] == ["first", "second"]
+    assert duration < RENDER_TIME
+
+
+@pytest.mark.asyncio
+async def test_speculated_work_not_in_final_plan_is_cancelled(started):
+    preparation = SpeculativePreparation(_chat())
+
+    preparation.speculate(_agent("coder"), [_material("first"), _material("second")])
+    await asyncio.sleep(0)
+
+    execution_mode, rendered_materials = await preparation.prepare(_agent("writer"), [_material("first")])
+
+    assert execution_mode == "execution mode of writer"
+    assert [m.content for m in rendered_materials] == ["first for writer with first"]
+    assert sorted(started["cancelled"]) == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_dynamic_material_is_rendered_only_for_final_plan(started):
+    preparation = SpeculativePreparation(_chat())
+    agent = _agent("coder")
+    dynamic, static = _material("dynamic", MaterialContentType.DYNAMIC_TEXT), _material("static")
+
+    preparation.speculate(agent, [dynamic])
+    await asyncio.sleep(0)
+
+    assert started["materials"] == []
+
+    _, rendered_materials = await preparation.prepare(agent, [dynamic, static])
+
+    assert [m.content for m in rendered_materials] == [
+        "dynamic for coder with dynamic,static",
+        "static for coder with dynamic,static",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_events_of_speculated_work_are_emitted_only_if_final_plan_uses_it(started):
+    emitted = []
+
+    async def handler(event, **kwargs):
+        emitted.append(kwargs["details"])
+
+    internal_events().subscribe(MaterialRenderErrorEvent, handler)
+    try:
+        preparation = SpeculativePreparation(_chat())
+        preparation.speculate(_agent("coder"), [_material("first"), _material("second")])
+        await asyncio.sleep(RENDER_TIME * 2)
+
+        assert emitted == []
+
+        await preparation.prepare(_agent("coder"), [_material("first")])
+
+        assert emitted == ["first"]
+    finally:
+        internal_events().unsubscribe(MaterialRenderErrorEvent, handler)
+
+
+@pytest.mark.asyncio
+async def test_execution_mode_is_imported_again_for_final_plan(started):
+    preparation = SpeculativePreparation(_chat())
+
+    preparation.speculate(_agent("coder"), [])
+    preparation.speculate(_agent("writer"), [])
+    await asyncio.sleep(0)
+
+    execution_mode, _ = await preparation.prepare(_agent("coder"), [])
+
+    assert execution_mode == "execution mode of coder"
+    assert started["execution_modes"] == ["coder", "writer", "coder"]
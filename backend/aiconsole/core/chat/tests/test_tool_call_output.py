@@ -0,0 +1,71 @@
+from aiconsole.core.chat.chat_mutations import (
+    AppendToOutputToolCallMutation,
+    SetOutputToolCallMutation,
+)
+from aiconsole.core.chat.tool_call_output import (
+    ToolCallOutput,
+    delete_tool_call_outputs,
+    get_tool_call_output_path,
+)
+
+
+def test_output_below_max_size_is_appended(initialized_project_dir):
+    output = ToolCallOutput("chat", "tool_call", max_size=100)
+
+    mutations = [output.append("a" * 50), output.append("b" * 50), output.close()]
+
+    assert mutations == [
+        AppendToOutputToolCallMutation(tool_call_id="tool_call", output_delta="a" * 50),
+        AppendToOutputToolCallMutation(tool_call_id="tool_call", output_delta="b" * 50),
+        None,
+    ]
+    assert not get_tool_call_output_path("chat", "tool_call").exists()
+
+
+def test_output_above_max_size_keeps_head_and_tail(initialized_project_dir):
+    output = ToolCallOutput("chat", "tool_call", max_size=100, refresh_interval=0)
+    full_output = "".join(f"{i:04}\n" for i in range(1000))
+
+    mutations = [output.append(full_output[i : i + 7]) for i in range(0, len(full_output), 7)]
+    mutations.append(output.close())
+    mutation = [m for m in mutations if m][-1]
+
+    assert isinstance(mutation, SetOutputToolCallMutation)
+    assert mutation.is_output_truncated
+    assert mutation.output is not None
+    assert mutation.output.startswith(full_output[:50])
+    assert mutation.output.endswith(full_output[-50:])
+    assert f"... {len(full_output) - 100} characters omitted ..." in mutation.output
+    assert get_tool_call_output_path("chat", "tool_call").read_text() == full_output
+
+
+def test_truncated_output_updates_are_throttled(initialized_project_dir):
+    output = ToolCallOutput("chat", "tool_call", max_size=10, refresh_interval=60)
+
+    mutations = [output.append("x" * 5) for _ in range(100)]
+    updates = [m for m in mutations if isinstance(m, SetOutputToolCallMutation)]
+
+    assert len(updates) == 1
+    assert isinstance(output.close(), SetOutputToolCallMutation)
+
+
+def test_output_of_previous_run_is_removed(initialized_project_dir):
+    output = ToolCallOutput("chat", "tool_call", max_size=10)
+    output.append("x" * 20)
+    output.close()
+
+    ToolCallOutput("chat", "tool_call", max_size=10)
+
+    assert not get_tool_call_output_path("chat", "tool_call").exists()
+
+
+def test_outputs_of_deleted_chat_are_removed(initialized_project_dir):
+    for chat_id in ("chat", "other_chat"):
+        output = ToolCallOutput(chat_id, "tool_call", max_size=10)
+        output.append("x" * 20)
+        output.close()
+
+    delete_tool_call_outputs("chat")
+
+    assert not get_tool_call_output_path("chat", "tool_call").exists()
+    assert get_tool_call_output_path("other_chat", "tool_call").exists()
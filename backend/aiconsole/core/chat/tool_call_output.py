@@ -0,0 +1,134 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import time
+from pathlib import Path
+from typing import TextIO
+
+from aiconsole.consts import (
+    TOOL_CALL_OUTPUT_MAX_SIZE,
+    TOOL_CALL_OUTPUT_REFRESH_INTERVAL,
+)
+from aiconsole.core.chat.chat_mutations import (
+    AppendToOutputToolCallMutation,
+    ChatMutation,
+    SetOutputToolCallMutation,
+)
+from aiconsole.core.project.paths import get_tool_call_outputs_directory
+
+
+def get_tool_call_output_path(chat_id: str, tool_call_id: str) -> Path:
+    return get_tool_call_outputs_directory() / chat_id / f"{tool_call_id}.txt"
+
+
+def delete_tool_call_outputs(chat_id: str) -> None:
+    shutil.rmtree(get_tool_call_outputs_directory() / chat_id, ignore_errors=True)
+
+
+class ToolCallOutput:
+    """
+    Output of a running tool call, turned into chat mutations.
+
+    Up to max_size characters the output is appended to the chat as it comes. Above that the chat keeps only the head
+    and the tail of it, refreshed at most every refresh_interval seconds, and the full output goes to a file in
+    .aic/outputs/<chat id> which can be fetched on demand.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        tool_call_id: str,
+        max_size: int = TOOL_CALL_OUTPUT_MAX_SIZE,
+        refresh_interval: float = TOOL_CALL_OUTPUT_REFRESH_INTERVAL,
+    ):
+        self.chat_id = chat_id
+        self.tool_call_id = tool_call_id
+        self.max_size = max_size
+        self.refresh_interval = refresh_interval
+
+        self.size = 0
+        self._head = ""
+        self._tail = ""
+        self._file: TextIO | None = None
+        self._last_refresh = 0.0
+        self._refresh_pending = False
+
+        # Output of a previous run of this tool call
+        get_tool_call_output_path(chat_id, tool_call_id).unlink(missing_ok=True)
+
+    @property
+    def is_truncated(self) -> bool:
+        return self._file is not None
+
+    def append(self, delta: str) -> ChatMutation | None:
+        if not delta:
+            return None
+
+        self.size += len(delta)
+
+        if not self.is_truncated:
+            if self.size <= self.max_size:
+                self._head += delta
+                return AppendToOutputToolCallMutation(tool_call_id=self.tool_call_id, output_delta=delta)
+
+            self._spill()
+
+        assert self._file is not None
+        self._file.write(delta)
+        self._tail = (self._tail + delta)[-(self.max_size - len(self._head)) :]
+        self._refresh_pending = True
+
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            return self._refresh()
+        return None
+
+    def close(self) -> ChatMutation | None:
+        """
+        Finishes the spill file, returns the last update of a truncated output if there is one not yet sent.
+        """
+
+        if self._file is None:
+            return None
+
+        self._file.close()
+
+        if self._refresh_pending:
+            return self._refresh()
+        return None
+
+    def _spill(self) -> None:
+        path = get_tool_call_output_path(self.chat_id, self.tool_call_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file = open(path, "w", encoding="utf8", errors="replace")
+        self._file.write(self._head)
+
+        # Head and tail together take max_size, a half each
+        self._tail = self._head[self.max_size // 2 :]
+        self._head = self._head[: self.max_size // 2]
+
+    def _refresh(self) -> SetOutputToolCallMutation:
+        self._last_refresh = time.monotonic()
+        self._refresh_pending = False
+
+        omitted = self.size - len(self._head) - len(self._tail)
+
+        return SetOutputToolCallMutation(
+            tool_call_id=self.tool_call_id,
+            output=f"{self._head}\n\n... {omitted} characters omitted ...\n\n{self._tail}",
+            is_output_truncated=True,
+        )
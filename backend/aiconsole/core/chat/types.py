@@ -18,11 +18,12 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer
 
 from aiconsole.core.assets.types import EditableObject
 from aiconsole.core.chat.actor_id import ActorId
 from aiconsole.core.code_running.code_interpreters.language import LanguageStr
+from aiconsole.core.code_running.resource_limits import CodeExecutionUsage
 from aiconsole.core.gpt.tool_definition import ToolDefinition
 from aiconsole.core.gpt.types import GPTRole
 
@@ -33,6 +34,8 @@ class AICToolCall(BaseModel):
     code: str
     headline: str
     output: str | None = None
+    is_output_truncated: bool = False
+    usage: CodeExecutionUsage | None = None
 
     is_streaming: bool = False
     is_executing: bool = False
@@ -97,30 +100,84 @@ class Chat(ChatHeadline):
     message_groups: list[AICMessageGroup]
     is_analysis_in_progress: bool = False
 
-    def get_message_group(self, message_group_id: str) -> AICMessageGroup | None:
+    # id -> location indexes, built on first lookup and kept up to date by apply_mutation
+    _message_groups_index: dict[str, AICMessageGroup] | None = PrivateAttr(default=None)
+    _messages_index: dict[str, AICMessageLocation] | None = PrivateAttr(default=None)
+    _tool_calls_index: dict[str, AICToolCallLocation] | None = PrivateAttr(default=None)
+
+    def _build_indexes(self) -> None:
+        self._message_groups_index = {}
+        self._messages_index = {}
+        self._tool_calls_index = {}
+
         for message_group in self.message_groups:
-            if message_group.id == message_group_id:
-                return message_group
-        return None
+            self.index_message_group(message_group)
+
+    def index_message_group(self, message_group: AICMessageGroup) -> None:
+        if self._message_groups_index is None:
+            return
+
+        self._message_groups_index[message_group.id] = message_group
+        for message in message_group.messages:
+            self.index_message(message_group, message)
+
+    def index_message(self, message_group: AICMessageGroup, message: AICMessage) -> None:
+        if self._messages_index is None:
+            return
+
+        self._messages_index[message.id] = AICMessageLocation(message_group=message_group, message=message)
+        for tool_call in message.tool_calls:
+            self.index_tool_call(message_group, message, tool_call)
+
+    def index_tool_call(self, message_group: AICMessageGroup, message: AICMessage, tool_call: AICToolCall) -> None:
+        if self._tool_calls_index is None:
+            return
+
+        self._tool_calls_index[tool_call.id] = AICToolCallLocation(
+            message_group=message_group,
+            message=message,
+            tool_call=tool_call,
+        )
+
+    def unindex_message_group(self, message_group: AICMessageGroup) -> None:
+        if self._message_groups_index is None:
+            return
+
+        self._message_groups_index.pop(message_group.id, None)
+        for message in message_group.messages:
+            self.unindex_message(message)
+
+    def unindex_message(self, message: AICMessage) -> None:
+        if self._messages_index is None:
+            return
+
+        self._messages_index.pop(message.id, None)
+        for tool_call in message.tool_calls:
+            self.unindex_tool_call(tool_call)
+
+    def unindex_tool_call(self, tool_call: AICToolCall) -> None:
+        if self._tool_calls_index is None:
+            return
+
+        self._tool_calls_index.pop(tool_call.id, None)
+
+    def get_message_group(self, message_group_id: str) -> AICMessageGroup | None:
+        if self._message_groups_index is None:
+            self._build_indexes()
+
+        return self._message_groups_index.get(message_group_id)  # type: ignore
 
     def get_message_location(self, message_id: str) -> AICMessageLocation | None:
-        for message_group in self.message_groups:
-            for message in message_group.messages:
-                if message.id == message_id:
-                    return AICMessageLocation(message_group=message_group, message=message)
-        return None
+        if self._messages_index is None:
+            self._build_indexes()
+
+        return self._messages_index.get(message_id)  # type: ignore
 
     def get_tool_call_location(self, tool_call_id: str) -> AICToolCallLocation | None:
-        for message_group in self.message_groups:
-            for message in message_group.messages:
-                for tool_call in message.tool_calls:
-                    if tool_call.id == tool_call_id:
-                        return AICToolCallLocation(
-                            message_group=message_group,
-                            message=message,
-                            tool_call=tool_call,
-                        )
-        return None
+        if self._tool_calls_index is None:
+            self._build_indexes()
+
+        return self._tool_calls_index.get(tool_call_id)  # type: ignore
 
 
 class Command(BaseModel):
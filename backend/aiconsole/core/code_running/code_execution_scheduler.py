@@ -0,0 +1,168 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+from aiconsole.consts import CODE_EXECUTION_CONCURRENCY
+from aiconsole.core.code_running.resource_limits import CodeExecutionUsage
+
+_log = logging.getLogger(__name__)
+
+# Position in the queue starting from 1, None when the execution leaves it
+QueuePositionCallback = Callable[[int | None], Awaitable[None]]
+
+
+@dataclass
+class CodeExecutionMetrics:
+    executions: int = 0
+    queued_executions: int = 0
+    total_queue_time: float = 0.0
+    max_queue_time: float = 0.0
+    total_duration: float = 0.0
+    total_cpu_time: float = 0.0
+    limits_exceeded: int = 0
+    restarts: int = 0
+
+    def record_queue_time(self, queue_time: float) -> None:
+        self.queued_executions += 1
+        self.total_queue_time += queue_time
+        self.max_queue_time = max(self.max_queue_time, queue_time)
+
+    def record_usage(self, usage: CodeExecutionUsage) -> None:
+        self.total_duration += usage.duration
+        self.total_cpu_time += usage.cpu_time or 0.0
+        self.limits_exceeded += 1 if usage.limit_exceeded else 0
+        self.restarts += 1 if usage.restarted else 0
+
+
+code_execution_metrics = CodeExecutionMetrics()
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    on_queue_position: QueuePositionCallback | None
+    position: int | None = None
+
+
+@dataclass
+class _ChatLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0  # Executions holding or waiting for the lock
+
+
+class CodeExecutionScheduler:
+    """
+    Runs code of a single chat one execution at a time, and at most max_concurrency executions of all chats at once.
+
+    Executions waiting for a free slot get it in the order they asked for it, and are told their position in the
+    queue only when it changes, and when they leave the queue.
+    """
+
+    def __init__(self, max_concurrency: int = CODE_EXECUTION_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        self._chat_locks: dict[str, _ChatLock] = {}
+        self._waiters: deque[_Waiter] = deque()
+        self._notifications: set[asyncio.Task] = set()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    @asynccontextmanager
+    async def slot(self, chat_id: str, on_queue_position: QueuePositionCallback | None = None):
+        chat_lock = self._chat_locks.setdefault(chat_id, _ChatLock())
+        chat_lock.users += 1
+        try:
+            async with chat_lock.lock:
+                await self._acquire(on_queue_position)
+                code_execution_metrics.executions += 1
+                try:
+                    yield
+                finally:
+                    self._release()
+        finally:
+            chat_lock.users -= 1
+            if chat_lock.users == 0:
+                del self._chat_locks[chat_id]
+
+    async def _acquire(self, on_queue_position: QueuePositionCallback | None) -> None:
+        if self.running < self.max_concurrency and not self._waiters:
+            self.running += 1
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), on_queue_position)
+        self._waiters.append(waiter)
+        self._notify(waiter, len(self._waiters))
+
+        start = time.monotonic()
+        try:
+            await waiter.future
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was handed over at the same time, pass it on
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._waiters.remove(waiter)
+                self._notify(waiter, None)
+                self._notify_positions()
+            raise
+
+        code_execution_metrics.record_queue_time(time.monotonic() - start)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.future.done():
+                # Slot is handed over directly, so the number of running executions stays the same
+                waiter.future.set_result(None)
+                self._notify(waiter, None)
+                self._notify_positions()
+                return
+
+        self.running -= 1
+
+    def _notify_positions(self) -> None:
+        for position, waiter in enumerate(self._waiters, start=1):
+            self._notify(waiter, position)
+
+    def _notify(self, waiter: _Waiter, position: int | None) -> None:
+        if waiter.on_queue_position is None or waiter.position == position:
+            return
+
+        waiter.position = position
+
+        task = asyncio.create_task(waiter.on_queue_position(position))
+        self._notifications.add(task)
+        task.add_done_callback(self._log_notification_error)
+
+    def _log_notification_error(self, task: asyncio.Task) -> None:
+        self._notifications.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _log.error(f"Could not notify about the queue position: {task.exception()}")
+
+
+@lru_cache
+def code_execution_scheduler() -> CodeExecutionScheduler:
+    return CodeExecutionScheduler()
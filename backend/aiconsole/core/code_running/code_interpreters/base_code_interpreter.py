@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import AsyncGenerator, Protocol
 
 from aiconsole.core.assets.materials.material import Material
+from aiconsole.core.code_running.resource_limits import ProcessResourceUsage
 from aiconsole.core.code_running.virtual_env.create_dedicated_venv import WaitForEnvEvent
 from aiconsole.utils.events import internal_events
 from aiconsole_toolkit.env import (
@@ -26,9 +27,29 @@ class BaseCodeInterpreter(Protocol):
     def run(self, code: str, materials: list[Material]) -> AsyncGenerator[str, None]:  # fmt: off
         ...
 
-    def terminate(self) -> None:  # fmt: off
+    async def terminate(self) -> None:  # fmt: off
         ...
 
+    def stop(self) -> None:  # fmt: off
+        ...
+
+    async def is_alive(self) -> bool:
+        return True
+
+    async def exit_signal(self) -> int | None:
+        """
+        Signal which killed the interpreter process, None if it's alive, exited on its own or that can't be told.
+        """
+
+        return None
+
+    async def resource_usage(self) -> ProcessResourceUsage | None:
+        """
+        Resources the interpreter process used so far, None if they can't be measured.
+        """
+
+        return None
+
     def get_environment_variables(self) -> dict[str, str]:
         path = os.environ.get("PATH") or ""
 
@@ -66,3 +87,24 @@ class BaseCodeInterpreter(Protocol):
             await asyncio.sleep(check_interval)
 
         raise RuntimeError(f"No venv located at {venv_path} after {timeout} seconds")
+
+
+async def capture_output(output_queue: "asyncio.Queue[str | None]") -> AsyncGenerator[str, None]:
+    """
+    Yields outputs put in the queue as soon as they arrive, until None is put in it.
+
+    Outputs which arrived while the previous batch was being consumed are joined.
+    """
+
+    while True:
+        batch = [await output_queue.get()]
+        while not output_queue.empty() and batch[-1] is not None:
+            batch.append(output_queue.get_nowait())
+
+        finished = batch[-1] is None
+        if content := "".join(output for output in batch if output is not None):
+            yield content
+
+        if finished:
+            _log.debug("Execution finished, stopping output capture.")
+            return
@@ -37,16 +37,22 @@ import asyncio
 import logging
 import queue
 import re
-import threading
 import traceback
 from typing import Any, AsyncGenerator
 
 from jupyter_client.asynchronous.client import AsyncKernelClient
 from jupyter_client.manager import AsyncKernelManager
 
+from aiconsole.consts import KERNEL_INTERRUPT_TIMEOUT, KERNEL_LIVENESS_CHECK_INTERVAL
 from aiconsole.core.assets.materials.material import Material
 from aiconsole.core.code_running.code_interpreters.base_code_interpreter import (
     BaseCodeInterpreter,
+    capture_output,
+)
+from aiconsole.core.code_running.resource_limits import (
+    ProcessResourceUsage,
+    peak_rss_to_bytes,
+    resource_limited_process_kwargs,
 )
 from aiconsole_toolkit.env import get_current_project_venv_python_path
 
@@ -83,11 +89,11 @@ class Python(BaseCodeInterpreter):
     async def initialize(self):
         self.km, self.kc = await start_new_async_kernel(
             env=self.get_environment_variables(),
+            **resource_limited_process_kwargs(),
             # executable=str(get_current_project_venv_python_path()),
             # argv=[f"{get_current_project_venv_python_path()}", "-m", "ipykernel_launcher", "-f", "{connection_file}"],
         )
-        self.listener_thread = None
-        self.finish_flag = False
+        self.listener: asyncio.Task | None = None
 
         # DISABLED because sometimes this bypasses sending it up to us for some reason!
         # Give it our same matplotlib backend
@@ -105,137 +111,153 @@ matplotlib.use('{backend}')
             pass
 
     async def terminate(self):
+        if not hasattr(self, "km"):
+            return  # Kernel was never started
+
+        self.stop()
         self.kc.stop_channels()
         await self.km.shutdown_kernel()
 
     async def run(self, code: str, materials: list[Material]) -> AsyncGenerator[str, None]:
-        self.finish_flag = False
         try:
             preprocessed_code = preprocess_python(code, materials)
-            message_queue: queue.Queue[Any] = queue.Queue()
-            self._execute_code(preprocessed_code, message_queue)
-            async for output in self._capture_output(message_queue):
-                yield output
+            output_queue: asyncio.Queue[str | None] = asyncio.Queue()
+            msg_id = self.kc.execute(preprocessed_code)
+            self.listener = asyncio.create_task(self._listen_for_output(msg_id, output_queue))
+            try:
+                async for output in capture_output(output_queue):
+                    yield output
+            finally:
+                # Whoever consumed the output is gone, so the code should not keep running either
+                self.stop()
+
+                # Interruption has to reach the kernel before it gets the next code to run
+                await asyncio.wait({self.listener})
         except GeneratorExit:
             raise  # gotta pass this up!
         except Exception:
             content = traceback.format_exc()
             yield content
 
-    def _execute_code(self, code, message_queue):
-        async def iopub_message_listener():
-            while True:
-                # If self.finish_flag = True, and we didn't set it (we do below), we need to stop. That's our "stop"
-                if self.finish_flag:
-                    _log.debug("Interrupting kernel.")
-                    await self.km.interrupt_kernel()
-                    return
+    async def _listen_for_output(self, msg_id: str, output_queue: "asyncio.Queue[str | None]"):
+        """
+        Puts the output of the execution in the queue as soon as the kernel publishes it, and None when it's done.
+        """
+
+        try:
+            try:
+                await self._put_output_until_idle(msg_id, output_queue)
+            except asyncio.CancelledError:
+                _log.debug("Interrupting kernel.")
                 try:
-                    msg = await self.kc.iopub_channel.get_msg(timeout=0.05)
-                except queue.Empty:
-                    continue
+                    await self.km.interrupt_kernel()
 
-                _log.debug("Received message: %s", msg["content"])
+                    # Code sent to the kernel before it's done with the interrupted one would be aborted
+                    await asyncio.wait_for(
+                        self._put_output_until_idle(msg_id, output_queue), timeout=KERNEL_INTERRUPT_TIMEOUT
+                    )
+                except Exception:
+                    _log.debug("Could not interrupt kernel", exc_info=True)
+                raise
+        finally:
+            output_queue.put_nowait(None)
 
-                if msg["header"]["msg_type"] == "status" and msg["content"]["execution_state"] == "idle":
-                    # Set finish_flag and return when the kernel becomes idle
-                    _log.debug("Kernel is idle, setting finish_flag to True.")
-                    self.finish_flag = True
+    async def _put_output_until_idle(self, msg_id: str, output_queue: "asyncio.Queue[str | None]"):
+        while True:
+            try:
+                msg = await self.kc.get_iopub_msg(timeout=KERNEL_LIVENESS_CHECK_INTERVAL)
+            except queue.Empty:
+                if not await self.km.is_alive():
+                    output_queue.put_nowait("Kernel died during the execution.")
                     return
+                continue
 
-                content = msg["content"]
-
-                if msg["msg_type"] == "stream":
-                    line = content["text"]
-                    message_queue.put({"type": "console", "format": "output", "content": line})
-                elif msg["msg_type"] == "error":
-                    content = "\n".join(content["traceback"])
-                    # Remove color codes
-                    ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-                    content = ansi_escape.sub("", content)
-                    message_queue.put(
-                        {
-                            "type": "console",
-                            "format": "output",
-                            "content": content,
-                        }
-                    )
-                elif msg["msg_type"] in ["display_data", "execute_result"]:
-                    data = content["data"]
-                    if "image/png" in data:
-                        message_queue.put(
-                            {
-                                "type": "image",
-                                "format": "base64.png",
-                                "content": data["image/png"],
-                            }
-                        )
-                    elif "image/jpeg" in data:
-                        message_queue.put(
-                            {
-                                "type": "image",
-                                "format": "base64.jpeg",
-                                "content": data["image/jpeg"],
-                            }
-                        )
-                    elif "text/html" in data:
-                        message_queue.put(
-                            {
-                                "type": "code",
-                                "format": "html",
-                                "content": data["text/html"],
-                            }
-                        )
-                    elif "text/plain" in data:
-                        message_queue.put(
-                            {
-                                "type": "console",
-                                "format": "output",
-                                "content": data["text/plain"],
-                            }
-                        )
-                    elif "application/javascript" in data:
-                        message_queue.put(
-                            {
-                                "type": "code",
-                                "format": "javascript",
-                                "content": data["application/javascript"],
-                            }
-                        )
-
-        def start_async_loop(async_func):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(async_func())
-            finally:
-                loop.close()
+            # Messages of an earlier, interrupted execution can still come in
+            if msg["parent_header"].get("msg_id") != msg_id:
+                continue
 
-        self.listener_thread = threading.Thread(target=start_async_loop, args=(iopub_message_listener,))
-        # self.listener_thread.daemon = True
-        self.listener_thread.start()
+            _log.debug("Received message: %s", msg["content"])
 
-        _log.debug("Listener thread is alive: %s", self.listener_thread.is_alive())
+            if msg["msg_type"] == "status" and msg["content"]["execution_state"] == "idle":
+                _log.debug("Kernel is idle, execution finished.")
+                return
 
-        self.kc.execute(code)  # execute_interactive
+            if output := output_from_iopub_message(msg):
+                output_queue.put_nowait(output)
 
-    async def _capture_output(self, message_queue):
-        while True:
-            if self.listener_thread:
-                try:
-                    output = message_queue.get(timeout=0.1)
-                    _log.debug("Output from queue: %s", output)
-                    if content := output.get("content", None):
-                        yield content
-                except queue.Empty:
-                    if self.finish_flag:
-                        _log.debug("Finish flag is set, stopping output capture.")
-                        break
+    async def is_alive(self) -> bool:
+        return await self.km.is_alive()
+
+    async def exit_signal(self) -> int | None:
+        if self.km.provisioner is None:
+            return None
 
-            await asyncio.sleep(0.1)
+        exit_code = await self.km.provisioner.poll()
+        if exit_code is None or exit_code >= 0:
+            return None
+        return -exit_code
+
+    async def resource_usage(self) -> ProcessResourceUsage | None:
+        if not await self.km.is_alive():
+            return None
+
+        # Evaluated by the kernel itself, so it works the same on all systems
+        msg_id = self.kc.execute(
+            "", silent=True, store_history=False, user_expressions={"usage": _RESOURCE_USAGE_EXPRESSION}
+        )
+
+        try:
+            reply = await asyncio.wait_for(self._get_shell_reply(msg_id), timeout=KERNEL_INTERRUPT_TIMEOUT)
+            result = reply["content"]["user_expressions"]["usage"]
+            cpu_time, ru_maxrss = ast.literal_eval(result["data"]["text/plain"])
+        except Exception:
+            _log.debug("Could not get resource usage of the kernel", exc_info=True)
+            return None
+
+        return ProcessResourceUsage(
+            cpu_time=cpu_time, peak_rss=peak_rss_to_bytes(ru_maxrss) if ru_maxrss is not None else None
+        )
+
+    async def _get_shell_reply(self, msg_id: str) -> dict[str, Any]:
+        while True:
+            # Replies to executions are not used otherwise, so they are skipped here
+            reply = await self.kc.get_shell_msg()
+            if reply["parent_header"].get("msg_id") == msg_id:
+                return reply
 
     def stop(self):
-        self.finish_flag = True
+        """
+        Interrupts the running execution, if any.
+        """
+
+        if self.listener and not self.listener.done():
+            self.listener.cancel()
+
+
+_RESOURCE_USAGE_EXPRESSION = (
+    "(__import__('time').process_time(), "
+    "__import__('resource').getrusage(__import__('resource').RUSAGE_SELF).ru_maxrss "
+    "if __import__('sys').platform != 'win32' else None)"
+)
+
+_ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+
+def output_from_iopub_message(msg: dict[str, Any]) -> str | None:
+    content = msg["content"]
+
+    if msg["msg_type"] == "stream":
+        return content["text"]
+    elif msg["msg_type"] == "error":
+        # Remove color codes
+        return _ansi_escape.sub("", "\n".join(content["traceback"]))
+    elif msg["msg_type"] in ["display_data", "execute_result"]:
+        data = content["data"]
+        for mime_type in ["image/png", "image/jpeg", "text/html", "text/plain", "application/javascript"]:
+            if mime_type in data:
+                return data[mime_type]
+
+    return None
 
 
 def preprocess_python(code: str, materials: list[Material]):
@@ -32,28 +32,31 @@
 # "open-interpreter" by Killian Lucas https://github.com/KillianLucas/open-interpreter
 #
 import asyncio
+import contextlib
 import logging
+import os
 import platform
-import queue
-import subprocess
-import threading
-import time
+import signal
 import traceback
 from typing import AsyncGenerator
 
 from aiconsole.core.assets.materials.material import Material
+from aiconsole.core.code_running.resource_limits import resource_limited_process_kwargs
 
-from .base_code_interpreter import BaseCodeInterpreter
+from .base_code_interpreter import BaseCodeInterpreter, capture_output
 
 _log = logging.getLogger(__name__)
 
+# Lines of output can be long, e.g. when a script prints a whole document
+_STREAM_LIMIT = 16 * 1024 * 1024
+
 
 class SubprocessCodeInterpreter(BaseCodeInterpreter):
     def __init__(self):
         self.start_cmd = ""
-        self.process = None
-        self.output_queue: "queue.Queue[str]" = queue.Queue()
-        self.done = threading.Event()
+        self.process: asyncio.subprocess.Process | None = None
+        self.output_queue: "asyncio.Queue[str | None]" = asyncio.Queue()
+        self._stream_reader: asyncio.Task | None = None
 
     async def initialize(self):
         pass
@@ -73,40 +76,65 @@ class SubprocessCodeInterpreter(BaseCodeInterpreter):
         """
         return code
 
-    def terminate(self):
+    async def terminate(self):
+        self.stop()
+
+    def stop(self):
+        # Shell can't be interrupted reliably, a new one is started for the next run
         if self.process:
-            self.process.terminate()
+            if self.process.returncode is None:
+                self._terminate_process(self.process)
+            self.process = None
+
+    @staticmethod
+    def _terminate_process(process: asyncio.subprocess.Process):
+        if os.name == "posix":
+            # Code runs in children of the shell, which doesn't exit until they do, so all of them are terminated
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGTERM)
         else:
-            raise Exception("Process not started")
+            process.terminate()
+
+    async def is_alive(self) -> bool:
+        # Process which is not started yet is started on the next run
+        return self.process is None or self.process.returncode is None
+
+    async def exit_signal(self) -> int | None:
+        if self.process is None or self.process.returncode is None or self.process.returncode >= 0:
+            return None
+        return -self.process.returncode
 
-    def start_process(self):
+    async def start_process(self):
         if self.process:
-            self.terminate()
+            await self.terminate()
+
+        if platform.system() == "Windows":
+            create_process = asyncio.create_subprocess_shell(self.start_cmd, **self._process_kwargs())
+        else:
+            create_process = asyncio.create_subprocess_exec(*self.start_cmd.split(), **self._process_kwargs())
+
+        self.process = await create_process
+        assert self.process.stdout
+
+        # Output of the previous process, if any, is no longer relevant
+        self.output_queue = asyncio.Queue()
+        self._stream_reader = asyncio.create_task(self.handle_stream_output(self.process.stdout, self.output_queue))
 
-        self.process = subprocess.Popen(
-            self.start_cmd.split(),
+    def _process_kwargs(self):
+        return dict(
             # TODO: add executable, care with Windows. https://docs.python.org/3/library/subprocess.html#popen-constructor
             # this does not work on windows, with and without str()
             # executable=str(repr(get_current_project_venv_python_path())),
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            # Merged, so errors are in order with the rest of the output and before the end of execution marker
+            stderr=asyncio.subprocess.STDOUT,
             env=self.get_environment_variables(),
-            shell=True if platform.system() == "Windows" else False,
-            text=True,
-            bufsize=0,
-            universal_newlines=True,
+            limit=_STREAM_LIMIT,
+            # Own process group, so the code it runs can be terminated together with it
+            start_new_session=os.name == "posix",
+            **resource_limited_process_kwargs(),
         )
-        threading.Thread(
-            target=self.handle_stream_output,
-            args=(self.process.stdout, False),
-            daemon=True,
-        ).start()
-        threading.Thread(
-            target=self.handle_stream_output,
-            args=(self.process.stderr, True),
-            daemon=True,
-        ).start()
 
     async def run(self, code: str, materials: list[Material]) -> AsyncGenerator[str, None]:
         retry_count = 0
@@ -116,21 +144,19 @@ class SubprocessCodeInterpreter(BaseCodeInterpreter):
             await self.wait_for_path()
             code = self.preprocess_code(code, materials)
             _log.info(f"Running code:\n{code}\n---")
-            if not self.process:
-                self.start_process()
+            if not await self.is_alive() or not self.process:
+                await self.start_process()
         except:  # noqa E722
             yield traceback.format_exc()
             return
 
         while retry_count <= max_retries:
-            self.done.clear()
-
             try:
                 if not self.process or not self.process.stdin:
                     raise Exception("Process not started")
 
-                self.process.stdin.write(code + "\n")
-                self.process.stdin.flush()
+                self.process.stdin.write((code + "\n").encode())
+                await self.process.stdin.drain()
                 break
             except:  # noqa E722
                 if retry_count != 0:
@@ -141,48 +167,55 @@ class SubprocessCodeInterpreter(BaseCodeInterpreter):
                     yield f"Retrying... ({retry_count}/{max_retries})"
                     yield "Restarting process."
 
-                self.start_process()
+                await self.start_process()
 
                 retry_count += 1
                 if retry_count > max_retries:
                     yield "Maximum retries reached. Could not execute code.."
                     return
 
-        while True:
-            if not self.output_queue.empty():
-                yield self.output_queue.get()
-            else:
-                await asyncio.sleep(0.1)
-            try:
-                output = self.output_queue.get(timeout=0.3)  # Waits for 0.3 seconds
-                # _log.info(f"OUTPUT: {output}")
+        finished = False
+        try:
+            async for output in capture_output(self.output_queue):
                 yield output
-            except queue.Empty:
-                # AIConsole Fix: Added proces.pool check to fix hanging
-                if self.done.is_set() or (self.process and self.process.poll() is not None):
-                    # Try to yank 3 more times from it... maybe there's something in there...
-                    # (I don't know if this actually helps. Maybe we just need to yank 1 more time)
-
-                    for _ in range(3):
-                        if not self.output_queue.empty():
-                            yield self.output_queue.get()
-                        await asyncio.sleep(0.2)
-                    break
-
-    def handle_stream_output(self, stream, is_error_stream):
-        for line in iter(stream.readline, ""):
-            _log.debug(f"Received output line:\n{line}\n---")
-
-            line = self.line_postprocessor(line)
-
-            if line is None:
-                continue  # `line = None` is the postprocessor's signal to discard completely
-
-            if self.detect_end_of_execution(line):
-                self.done.set()
-            elif is_error_stream and "KeyboardInterrupt" in line:
-                self.output_queue.put("KeyboardInterrupt")
-                time.sleep(0.1)
-                self.done.set()
-            else:
-                self.output_queue.put(line)
+            finished = True
+        finally:
+            if not finished:
+                # Whoever consumed the output is gone, so the code should not keep running either
+                self.stop()
+
+    async def handle_stream_output(self, stream: asyncio.StreamReader, output_queue: "asyncio.Queue[str | None]"):
+        """
+        Puts lines of the output in the queue as soon as they are written, and None when the execution ends.
+        """
+
+        try:
+            while line_bytes := await _read_line(stream):
+                line = line_bytes.decode(errors="replace").replace("\r\n", "\n")
+                _log.debug(f"Received output line:\n{line}\n---")
+
+                line = self.line_postprocessor(line)
+
+                if line is None:
+                    continue  # `line = None` is the postprocessor's signal to discard completely
+
+                if self.detect_end_of_execution(line):
+                    output_queue.put_nowait(None)
+                elif line.strip() == "KeyboardInterrupt":
+                    output_queue.put_nowait("KeyboardInterrupt")
+                    output_queue.put_nowait(None)
+                else:
+                    output_queue.put_nowait(line)
+        finally:
+            # Process exited or its output can't be read, so nothing more will come
+            output_queue.put_nowait(None)
+
+
+async def _read_line(stream: asyncio.StreamReader) -> bytes:
+    try:
+        return await stream.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial  # Last line without a newline, or nothing at the end of the output
+    except asyncio.LimitOverrunError as e:
+        # Line longer than the stream limit is passed on in parts
+        return await stream.read(e.consumed)
@@ -0,0 +1,135 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from aiconsole.consts import KERNEL_POOL_SIZE
+from aiconsole.core.code_running.code_interpreters.base_code_interpreter import (
+    BaseCodeInterpreter,
+)
+from aiconsole.core.code_running.code_interpreters.languages.python import Python
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class KernelPoolMetrics:
+    hits: int = 0
+    cold_starts: int = 0
+    failed_starts: int = 0
+    reaped: int = 0
+    total_cold_start_time: float = 0.0
+
+
+kernel_pool_metrics = KernelPoolMetrics()
+
+_terminating: set[asyncio.Future] = set()
+
+
+def terminate_code_interpreter(code_interpreter: BaseCodeInterpreter) -> None:
+    """
+    Terminates the interpreter in the background.
+    """
+
+    future = asyncio.ensure_future(code_interpreter.terminate())
+    _terminating.add(future)
+    future.add_done_callback(_log_termination_error)
+
+
+def _log_termination_error(future: asyncio.Future) -> None:
+    _terminating.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        _log.error(f"Could not terminate code interpreter: {future.exception()}")
+
+
+class KernelPool:
+    """
+    Python interpreters with kernels started and initialized ahead of time, handed out to chats on demand.
+
+    A handed out interpreter belongs to the chat, the pool starts a new one in the background to take its place.
+    """
+
+    def __init__(self, size: int = KERNEL_POOL_SIZE, factory: Callable[[], BaseCodeInterpreter] = Python):
+        self.size = size
+        self._factory = factory
+        self._ready: list[BaseCodeInterpreter] = []
+        self._starting: set[asyncio.Task] = set()
+
+    async def acquire(self) -> BaseCodeInterpreter:
+        # A kernel which is already starting is ready sooner than a new one
+        while not self._ready and self._starting:
+            await asyncio.wait(self._starting, return_when=asyncio.FIRST_COMPLETED)
+
+        if self._ready:
+            interpreter = self._ready.pop(0)
+            kernel_pool_metrics.hits += 1
+        else:
+            _log.info("No kernel ready in the pool, starting a new one")
+            start = time.monotonic()
+            interpreter = self._factory()
+            await interpreter.initialize()
+            kernel_pool_metrics.cold_starts += 1
+            kernel_pool_metrics.total_cold_start_time += time.monotonic() - start
+
+        self.fill()
+        return interpreter
+
+    def fill(self) -> None:
+        """
+        Starts kernels in the background until there are enough of them.
+        """
+
+        while len(self._ready) + len(self._starting) < self.size:
+            task = asyncio.create_task(self._start())
+            self._starting.add(task)
+            task.add_done_callback(self._starting.discard)
+
+    def clear(self) -> None:
+        for task in self._starting:
+            task.cancel()
+        self._starting.clear()
+
+        for interpreter in self._ready:
+            terminate_code_interpreter(interpreter)
+        self._ready.clear()
+
+    async def _start(self) -> None:
+        interpreter = self._factory()
+        try:
+            await interpreter.initialize()
+        except asyncio.CancelledError:
+            terminate_code_interpreter(interpreter)
+            raise
+        except Exception:
+            kernel_pool_metrics.failed_starts += 1
+            _log.exception("Could not start a kernel for the pool")
+            terminate_code_interpreter(interpreter)
+            return
+
+        self._ready.append(interpreter)
+
+
+@lru_cache
+def kernel_pool() -> KernelPool:
+    return KernelPool()
+
+
+async def fill_kernel_pool() -> None:
+    kernel_pool().fill()
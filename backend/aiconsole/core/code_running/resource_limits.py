@@ -0,0 +1,90 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Limits of the resources code interpreter processes can use, and accounting of what they used.
+
+Limits of processes are set with rlimits, so they are only applied on POSIX systems. The CPU time limit counts the
+whole life of an interpreter, which runs all code of a chat. An interpreter which used more than half of it is
+restarted after the execution, so every execution has at least half of the limit.
+
+Peak memory is the peak of the whole interpreter process, as reported by the kernel, not of a single execution.
+"""
+
+import os
+import signal
+import sys
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from aiconsole.consts import KERNEL_CPU_TIME_LIMIT, KERNEL_MEMORY_LIMIT
+
+LimitExceeded = Literal["wall_time", "cpu_time", "memory"]
+
+
+class CodeExecutionUsage(BaseModel):
+    duration: float  # Seconds
+    cpu_time: float | None = None  # Seconds, None if it could not be measured
+    interpreter_peak_rss: int | None = None  # Bytes, peak of the interpreter process so far
+    limit_exceeded: LimitExceeded | None = None
+    restarted: bool = False
+
+
+@dataclass
+class ProcessResourceUsage:
+    cpu_time: float  # Seconds since the process started
+    peak_rss: int | None  # Bytes
+
+
+def peak_rss_to_bytes(ru_maxrss: int) -> int:
+    # macOS reports it in bytes, other systems in kilobytes
+    return ru_maxrss if sys.platform == "darwin" else ru_maxrss * 1024
+
+
+def _limit_resources() -> None:
+    import resource
+
+    if KERNEL_CPU_TIME_LIMIT is not None:
+        # Process gets SIGXCPU when it goes above the soft limit, which terminates it
+        resource.setrlimit(resource.RLIMIT_CPU, (KERNEL_CPU_TIME_LIMIT, KERNEL_CPU_TIME_LIMIT + 5))
+
+    if KERNEL_MEMORY_LIMIT is not None:
+        resource.setrlimit(resource.RLIMIT_DATA, (KERNEL_MEMORY_LIMIT, KERNEL_MEMORY_LIMIT))
+
+
+def resource_limited_process_kwargs() -> dict[str, Any]:
+    """
+    Keyword arguments of subprocess.Popen starting a code interpreter process with limited resources.
+    """
+
+    if os.name != "posix" or (KERNEL_CPU_TIME_LIMIT is None and KERNEL_MEMORY_LIMIT is None):
+        return {}
+
+    return {"preexec_fn": _limit_resources}
+
+
+def is_cpu_time_limit_mostly_used(cpu_time: float | None) -> bool:
+    return KERNEL_CPU_TIME_LIMIT is not None and cpu_time is not None and cpu_time > KERNEL_CPU_TIME_LIMIT / 2
+
+
+def is_cpu_time_limit_exceeded(exit_signal: int | None) -> bool:
+    # Sent by the OS when the process goes above the soft limit, there is no such signal outside of POSIX
+    return exit_signal is not None and exit_signal == getattr(signal, "SIGXCPU", None)
+
+
+def is_memory_limit_exceeded(peak_rss: int | None) -> bool:
+    return KERNEL_MEMORY_LIMIT is not None and peak_rss is not None and peak_rss > KERNEL_MEMORY_LIMIT
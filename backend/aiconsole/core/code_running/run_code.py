@@ -14,27 +14,133 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
-from typing import AsyncGenerator, cast
-
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, Awaitable, Callable, cast
+
+from aiconsole.consts import (
+    CODE_EXECUTION_TIMEOUT,
+    KERNEL_IDLE_TTL,
+    KERNEL_REAP_INTERVAL,
+)
 from aiconsole.core.assets.materials.material import Material
+from aiconsole.core.code_running.code_execution_scheduler import (
+    QueuePositionCallback,
+    code_execution_metrics,
+    code_execution_scheduler,
+)
 from aiconsole.core.code_running.code_interpreters.base_code_interpreter import (
     BaseCodeInterpreter,
 )
 from aiconsole.core.code_running.code_interpreters.language import LanguageStr
 from aiconsole.core.code_running.code_interpreters.language_map import language_map
+from aiconsole.core.code_running.kernel_pool import (
+    kernel_pool,
+    kernel_pool_metrics,
+    terminate_code_interpreter,
+)
+from aiconsole.core.code_running.resource_limits import (
+    CodeExecutionUsage,
+    LimitExceeded,
+    is_cpu_time_limit_exceeded,
+    is_cpu_time_limit_mostly_used,
+    is_memory_limit_exceeded,
+)
+
+_log = logging.getLogger(__name__)
 
 code_interpreters: dict[str, dict[str, BaseCodeInterpreter]] = {}
 
+# Time of the last use of each interpreter, None while it's running code
+_last_used: dict[tuple[str, str], float | None] = {}
+
+_reaper: asyncio.Task | None = None
 
-_global_code_running_lock = asyncio.Lock()
+
+UsageCallback = Callable[[CodeExecutionUsage], Awaitable[None]]
 
 
 async def run_in_code_interpreter(
-    language: str, chat_id: str, code: str, materials: list[Material]
+    language: str,
+    chat_id: str,
+    code: str,
+    materials: list[Material],
+    on_queue_position: QueuePositionCallback | None = None,
+    on_usage: UsageCallback | None = None,
 ) -> AsyncGenerator[str, None]:
-    async with _global_code_running_lock:
+    """
+    Output of the code, which runs once there is a free execution slot for it.
+
+    Closing the output before the code is done interrupts it. Resources used by the code are passed to on_usage when
+    it's done.
+    """
+
+    return _run_when_scheduled(language, chat_id, code, materials, on_queue_position, on_usage)
+
+
+async def _run_when_scheduled(
+    language: str,
+    chat_id: str,
+    code: str,
+    materials: list[Material],
+    on_queue_position: QueuePositionCallback | None,
+    on_usage: UsageCallback | None,
+) -> AsyncGenerator[str, None]:
+    async with code_execution_scheduler().slot(chat_id, on_queue_position):
         interpreter = await get_code_interpreter(language, chat_id)
-        return interpreter.run(code, materials)
+        key = (chat_id, language.lower())
+
+        _last_used[key] = None
+        try:
+            usage_before = await interpreter.resource_usage()
+            start = time.monotonic()
+            limit_exceeded: LimitExceeded | None = None
+
+            async with aclosing(interpreter.run(code, materials)) as outputs:
+                while True:
+                    timeout = CODE_EXECUTION_TIMEOUT - (time.monotonic() - start) if CODE_EXECUTION_TIMEOUT else None
+                    try:
+                        # Interpreter interrupts the code when it's cancelled by the timeout
+                        output = await asyncio.wait_for(anext(outputs), timeout=timeout)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        limit_exceeded = "wall_time"
+                        yield f"\nExecution took longer than {CODE_EXECUTION_TIMEOUT:.0f}s and was interrupted.\n"
+                        break
+                    yield output
+
+            usage = CodeExecutionUsage(duration=time.monotonic() - start, limit_exceeded=limit_exceeded)
+            usage_after = await interpreter.resource_usage()
+            if usage_after:
+                usage.interpreter_peak_rss = usage_after.peak_rss
+                if usage_before:
+                    usage.cpu_time = usage_after.cpu_time - usage_before.cpu_time
+
+            is_alive = await interpreter.is_alive()
+            if not is_alive and is_cpu_time_limit_exceeded(await interpreter.exit_signal()):
+                usage.limit_exceeded = usage.limit_exceeded or "cpu_time"
+            if is_memory_limit_exceeded(usage.interpreter_peak_rss):
+                usage.limit_exceeded = usage.limit_exceeded or "memory"
+
+            # Interrupted code which didn't stop could still be running, a new interpreter starts clean
+            if usage.limit_exceeded or not is_alive:
+                yield "\nInterpreter was restarted, its state was lost.\n"
+                _restart_code_interpreter(chat_id, key[1])
+                usage.restarted = True
+            elif usage_after and is_cpu_time_limit_mostly_used(usage_after.cpu_time):
+                # CPU time limit counts the whole life of the process, the next execution gets a full one
+                yield "\nInterpreter used most of its CPU time limit and was restarted, its state was lost.\n"
+                _restart_code_interpreter(chat_id, key[1])
+                usage.restarted = True
+
+            code_execution_metrics.record_usage(usage)
+            if on_usage:
+                await on_usage(usage)
+        finally:
+            if key in _last_used:
+                _last_used[key] = time.monotonic()
 
 
 async def get_code_interpreter(language_raw: str, chat_id: str) -> BaseCodeInterpreter:
@@ -49,21 +155,80 @@ async def get_code_interpreter(language_raw: str, chat_id: str) -> BaseCodeInter
         code_interpreters[chat_id] = {}
 
     if language not in code_interpreters[chat_id]:
-        code_interpreters[chat_id][language] = language_map[language]()
-        await code_interpreters[chat_id][language].initialize()
+        if language == "python":
+            code_interpreters[chat_id][language] = await kernel_pool().acquire()
+        else:
+            code_interpreters[chat_id][language] = language_map[language]()
+            await code_interpreters[chat_id][language].initialize()
+
+        _last_used[(chat_id, language)] = time.monotonic()
+        _start_reaper()
 
     return code_interpreters[chat_id][language]
 
 
+def _restart_code_interpreter(chat_id: str, language: str) -> None:
+    """
+    Terminates the interpreter of the chat, the next code it runs gets a new one.
+    """
+
+    _log.info(f"Restarting {language} interpreter of chat {chat_id}")
+    code_interpreter = code_interpreters.get(chat_id, {}).pop(language, None)
+    if code_interpreter:
+        terminate_code_interpreter(code_interpreter)
+    _last_used.pop((chat_id, language), None)
+
+
+def stop_code_interpreters(chat_id: str) -> None:
+    """
+    Interrupts code running in the interpreters of the chat, they keep their state.
+    """
+
+    for code_interpreter in code_interpreters.get(chat_id, {}).values():
+        code_interpreter.stop()
+
+
 def reset_code_interpreters(chat_id: str | None = None):
     global code_interpreters
 
     if chat_id:
         for code_interpreter in list(code_interpreters.get(chat_id, {}).values()):
-            code_interpreter.terminate()
+            terminate_code_interpreter(code_interpreter)
         code_interpreters[chat_id] = {}
     else:
         for chat_interpreters in code_interpreters.values():
             for code_interpreter in chat_interpreters.values():
-                code_interpreter.terminate()
+                terminate_code_interpreter(code_interpreter)
         code_interpreters = {}
+
+        # Kernels of the pool use the venv of the project they were started for
+        kernel_pool().clear()
+
+
+def reap_idle_code_interpreters(idle_ttl: float = KERNEL_IDLE_TTL) -> None:
+    """
+    Terminates interpreters of chats which didn't run any code for idle_ttl seconds.
+    """
+
+    now = time.monotonic()
+    for chat_id, chat_interpreters in code_interpreters.items():
+        for language, code_interpreter in list(chat_interpreters.items()):
+            last_used = _last_used.get((chat_id, language))
+            if last_used is not None and now - last_used > idle_ttl:
+                _log.info(f"Terminating {language} interpreter of chat {chat_id}, idle for {now - last_used:.0f}s")
+                terminate_code_interpreter(code_interpreter)
+                del chat_interpreters[language]
+                del _last_used[(chat_id, language)]
+                kernel_pool_metrics.reaped += 1
+
+
+def _start_reaper() -> None:
+    global _reaper
+
+    async def reap_periodically():
+        while True:
+            await asyncio.sleep(KERNEL_REAP_INTERVAL)
+            reap_idle_code_interpreters()
+
+    if _reaper is None or _reaper.done():
+        _reaper = asyncio.create_task(reap_periodically())
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from aiconsole.core.code_running.code_execution_scheduler import CodeExecutionScheduler
+
+
+async def _hold_slot(scheduler: CodeExecutionScheduler, chat_id: str, events: list, release: asyncio.Event, **kwargs):
+    async with scheduler.slot(chat_id, **kwargs):
+        events.append(f"start {chat_id}")
+        await release.wait()
+        events.append(f"end {chat_id}")
+
+
+@pytest.mark.asyncio
+async def test_chats_run_in_parallel_up_to_the_limit():
+    scheduler = CodeExecutionScheduler(max_concurrency=2)
+    events: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [asyncio.create_task(_hold_slot(scheduler, chat_id, events, release)) for chat_id in ["a", "b", "c"]]
+    await asyncio.sleep(0)
+
+    assert events == ["start a", "start b"]
+    assert scheduler.running == 2
+    assert scheduler.queued == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert events[-2:] == ["start c", "end c"]
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_executions_of_a_chat_run_one_at_a_time():
+    scheduler = CodeExecutionScheduler(max_concurrency=4)
+    events: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [asyncio.create_task(_hold_slot(scheduler, "a", events, release)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    assert events == ["start a"]
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert events == ["start a", "end a", "start a", "end a"]
+    assert scheduler._chat_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_queued_executions_are_told_their_position():
+    scheduler = CodeExecutionScheduler(max_concurrency=1)
+    events: list[str] = []
+    release_a, release_b, release_c = asyncio.Event(), asyncio.Event(), asyncio.Event()
+    positions: dict[str, list[int | None]] = {"b": [], "c": []}
+
+    def on_queue_position(chat_id):
+        async def notify(position: int | None):
+            positions[chat_id].append(position)
+
+        return notify
+
+    task_a = asyncio.create_task(_hold_slot(scheduler, "a", events, release_a))
+    task_b = asyncio.create_task(
+        _hold_slot(scheduler, "b", events, release_b, on_queue_position=on_queue_position("b"))
+    )
+    task_c = asyncio.create_task(
+        _hold_slot(scheduler, "c", events, release_c, on_queue_position=on_queue_position("c"))
+    )
+    await asyncio.sleep(0)
+
+    release_a.set()
+    await task_a
+    await asyncio.sleep(0)
+
+    assert events == ["start a", "end a", "start b"]
+    assert positions == {"b": [1, None], "c": [2, 1]}
+
+    release_b.set()
+    release_c.set()
+    await asyncio.gather(task_b, task_c)
+
+    assert positions == {"b": [1, None], "c": [2, 1, None]}
+
+
+@pytest.mark.asyncio
+async def test_queued_executions_are_not_told_an_unchanged_position():
+    scheduler = CodeExecutionScheduler(max_concurrency=1)
+    events: list[str] = []
+    release = asyncio.Event()
+    positions: list[int | None] = []
+
+    async def notify(position: int | None):
+        positions.append(position)
+
+    task_a = asyncio.create_task(_hold_slot(scheduler, "a", events, release))
+    task_b = asyncio.create_task(_hold_slot(scheduler, "b", events, release, on_queue_position=notify))
+    task_c = asyncio.create_task(_hold_slot(scheduler, "c", events, release))
+    await asyncio.sleep(0)
+
+    task_c.cancel()
+    await asyncio.gather(task_c, return_exceptions=True)
+
+    assert positions == [1]
+
+    release.set()
+    await asyncio.gather(task_a, task_b)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_execution_gives_up_its_place():
+    scheduler = CodeExecutionScheduler(max_concurrency=1)
+    events: list[str] = []
+    release = asyncio.Event()
+
+    task_a = asyncio.create_task(_hold_slot(scheduler, "a", events, release))
+    task_b = asyncio.create_task(_hold_slot(scheduler, "b", events, release))
+    task_c = asyncio.create_task(_hold_slot(scheduler, "c", events, release))
+    await asyncio.sleep(0)
+
+    task_b.cancel()
+    await asyncio.sleep(0)
+
+    assert scheduler.queued == 1
+
+    release.set()
+    await asyncio.gather(task_a, task_c)
+
+    assert events == ["start a", "end a", "start c", "end c"]
+    assert task_b.cancelled()
+    assert scheduler.running == 0
+    assert scheduler._chat_locks == {}
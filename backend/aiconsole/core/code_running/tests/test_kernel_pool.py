@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from aiconsole.core.code_running import kernel_pool, run_code
+from aiconsole.core.code_running.kernel_pool import KernelPool, KernelPoolMetrics
+
+
+class FakeInterpreter:
+    def __init__(self):
+        self.initialized = False
+        self.terminated = False
+
+    async def initialize(self):
+        await asyncio.sleep(0.01)
+        self.initialized = True
+
+    async def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    metrics = KernelPoolMetrics()
+    monkeypatch.setattr(kernel_pool, "kernel_pool_metrics", metrics)
+    monkeypatch.setattr(run_code, "kernel_pool_metrics", metrics)
+    return metrics
+
+
+@pytest.mark.asyncio
+async def test_first_acquire_is_a_cold_start_and_the_pool_is_filled(metrics):
+    pool = KernelPool(size=2, factory=FakeInterpreter)
+
+    interpreter = await pool.acquire()
+
+    assert interpreter.initialized
+    assert metrics.cold_starts == 1
+
+    await asyncio.wait(pool._starting)
+
+    assert len(pool._ready) == 2
+    assert all(interpreter.initialized for interpreter in pool._ready)
+
+
+@pytest.mark.asyncio
+async def test_acquire_takes_a_ready_kernel(metrics):
+    pool = KernelPool(size=1, factory=FakeInterpreter)
+    pool.fill()
+    await asyncio.wait(pool._starting)
+    ready = pool._ready[0]
+
+    assert await pool.acquire() is ready
+    assert metrics.hits == 1
+    assert metrics.cold_starts == 0
+
+    await asyncio.wait(pool._starting)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_a_starting_kernel(metrics):
+    pool = KernelPool(size=1, factory=FakeInterpreter)
+    pool.fill()
+
+    interpreter = await pool.acquire()
+
+    assert interpreter.initialized
+    assert metrics.hits == 1
+    assert metrics.cold_starts == 0
+
+    await asyncio.wait(pool._starting)
+
+
+@pytest.mark.asyncio
+async def test_clear_terminates_ready_kernels():
+    pool = KernelPool(size=2, factory=FakeInterpreter)
+    pool.fill()
+    await asyncio.wait(pool._starting)
+    ready = list(pool._ready)
+
+    pool.clear()
+    await asyncio.sleep(0)
+
+    assert pool._ready == []
+    assert all(interpreter.terminated for interpreter in ready)
+
+
+@pytest.mark.asyncio
+async def test_idle_chat_interpreters_are_reaped(monkeypatch, metrics):
+    idle, busy, recent = FakeInterpreter(), FakeInterpreter(), FakeInterpreter()
+    monkeypatch.setattr(
+        run_code, "code_interpreters", {"a": {"python": idle, "applescript": recent}, "b": {"python": busy}}
+    )
+    monkeypatch.setattr(
+        run_code,
+        "_last_used",
+        {("a", "python"): time.monotonic() - 100, ("a", "applescript"): time.monotonic(), ("b", "python"): None},
+    )
+
+    run_code.reap_idle_code_interpreters(idle_ttl=10)
+    await asyncio.sleep(0)
+
+    assert run_code.code_interpreters == {"a": {"applescript": recent}, "b": {"python": busy}}
+    assert idle.terminated
+    assert not busy.terminated
+    assert metrics.reaped == 1
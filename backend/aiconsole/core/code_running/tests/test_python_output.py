@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from aiconsole.core.code_running.code_interpreters.base_code_interpreter import (
+    capture_output,
+)
+from aiconsole.core.code_running.code_interpreters.languages.python import (
+    output_from_iopub_message,
+)
+
+
+@pytest.mark.asyncio
+async def test_outputs_which_arrived_together_are_batched():
+    output_queue: asyncio.Queue[str | None] = asyncio.Queue()
+    for line in ["1\n", "2\n", "3\n"]:
+        output_queue.put_nowait(line)
+
+    outputs = capture_output(output_queue)
+
+    assert await anext(outputs) == "1\n2\n3\n"
+
+    output_queue.put_nowait("4\n")
+    output_queue.put_nowait(None)
+
+    assert [output async for output in outputs] == ["4\n"]
+
+
+@pytest.mark.asyncio
+async def test_output_is_delivered_as_soon_as_it_arrives():
+    output_queue: asyncio.Queue[str | None] = asyncio.Queue()
+    outputs = capture_output(output_queue)
+
+    next_output = asyncio.ensure_future(anext(outputs))
+    await asyncio.sleep(0)
+    output_queue.put_nowait("line\n")
+
+    assert await asyncio.wait_for(next_output, timeout=0.05) == "line\n"
+
+    output_queue.put_nowait(None)
+    assert [output async for output in outputs] == []
+
+
+def test_output_from_iopub_message():
+    assert output_from_iopub_message({"msg_type": "stream", "content": {"text": "hello\n"}}) == "hello\n"
+    assert (
+        output_from_iopub_message(
+            {"msg_type": "error", "content": {"traceback": ["\x1b[0;31mZeroDivisionError\x1b[0m", "division by zero"]}}
+        )
+        == "ZeroDivisionError\ndivision by zero"
+    )
+    assert (
+        output_from_iopub_message(
+            {"msg_type": "execute_result", "content": {"data": {"text/plain": "2", "image/png": "iVBOR"}}}
+        )
+        == "iVBOR"
+    )
+    assert output_from_iopub_message({"msg_type": "execute_input", "content": {"code": "1 + 1"}}) is None
@@ -0,0 +1,151 @@
+import asyncio
+import signal
+from contextlib import aclosing
+
+import pytest
+
+from aiconsole.core.code_running import resource_limits, run_code
+from aiconsole.core.code_running.code_execution_scheduler import (
+    CodeExecutionScheduler,
+)
+from aiconsole.core.code_running.resource_limits import (
+    CodeExecutionUsage,
+    ProcessResourceUsage,
+)
+
+
+class FakeInterpreter:
+    def __init__(self, sleep: float = 0, peak_rss: int = 100, exit_signal: int | None = None):
+        self.sleep = sleep
+        self.peak_rss = peak_rss
+        self.cpu_time = 1.0
+        self.terminated = False
+        self._exit_signal = exit_signal
+
+    async def run(self, code, materials):
+        yield "started\n"
+        await asyncio.sleep(self.sleep)
+        self.cpu_time += 0.5
+        yield "done\n"
+
+    async def resource_usage(self):
+        return ProcessResourceUsage(cpu_time=self.cpu_time, peak_rss=self.peak_rss)
+
+    async def is_alive(self):
+        return self._exit_signal is None
+
+    async def exit_signal(self):
+        return self._exit_signal
+
+    def stop(self):
+        pass
+
+    async def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def interpreter(monkeypatch, request):
+    interpreter = FakeInterpreter(**getattr(request, "param", {}))
+    scheduler = CodeExecutionScheduler()
+    monkeypatch.setattr(run_code, "code_interpreters", {"chat": {"python": interpreter}})
+    monkeypatch.setattr(run_code, "_last_used", {})
+    monkeypatch.setattr(run_code, "code_execution_scheduler", lambda: scheduler)
+    return interpreter
+
+
+async def _run(on_usage) -> str:
+    async with aclosing(
+        await run_code.run_in_code_interpreter("python", "chat", "", [], on_usage=on_usage)
+    ) as outputs:
+        return "".join([output async for output in outputs])
+
+
+@pytest.mark.asyncio
+async def test_usage_is_recorded(interpreter):
+    usages: list[CodeExecutionUsage] = []
+
+    async def on_usage(usage):
+        usages.append(usage)
+
+    assert await _run(on_usage) == "started\ndone\n"
+
+    assert usages[0].cpu_time == pytest.approx(0.5)
+    assert usages[0].interpreter_peak_rss == 100
+    assert usages[0].limit_exceeded is None
+    assert not usages[0].restarted
+    assert run_code.code_interpreters["chat"]["python"] is interpreter
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("interpreter", [{"sleep": 10}], indirect=True)
+async def test_execution_above_the_time_limit_is_interrupted_and_the_interpreter_restarted(interpreter, monkeypatch):
+    monkeypatch.setattr(run_code, "CODE_EXECUTION_TIMEOUT", 0.05)
+    usages: list[CodeExecutionUsage] = []
+
+    async def on_usage(usage):
+        usages.append(usage)
+
+    output = await asyncio.wait_for(_run(on_usage), timeout=1)
+    await asyncio.sleep(0)
+
+    assert output.startswith("started\n")
+    assert "done" not in output
+    assert usages[0].limit_exceeded == "wall_time"
+    assert usages[0].restarted
+    assert interpreter.terminated
+    assert "python" not in run_code.code_interpreters["chat"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("interpreter", [{"peak_rss": 2048}], indirect=True)
+async def test_interpreter_above_the_memory_limit_is_restarted(interpreter, monkeypatch):
+    monkeypatch.setattr(resource_limits, "KERNEL_MEMORY_LIMIT", 1024)
+    usages: list[CodeExecutionUsage] = []
+
+    async def on_usage(usage):
+        usages.append(usage)
+
+    await _run(on_usage)
+
+    assert usages[0].limit_exceeded == "memory"
+    assert usages[0].restarted
+    assert "python" not in run_code.code_interpreters["chat"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not hasattr(signal, "SIGXCPU"), reason="CPU time limit is only enforced on POSIX")
+@pytest.mark.parametrize("interpreter", [{"exit_signal": getattr(signal, "SIGXCPU", None)}], indirect=True)
+async def test_interpreter_killed_for_going_above_the_cpu_time_limit_is_restarted(interpreter):
+    usages: list[CodeExecutionUsage] = []
+
+    async def on_usage(usage):
+        usages.append(usage)
+
+    await _run(on_usage)
+
+    assert usages[0].limit_exceeded == "cpu_time"
+    assert usages[0].restarted
+    assert "python" not in run_code.code_interpreters["chat"]
+
+
+@pytest.mark.asyncio
+async def test_interpreter_which_used_most_of_the_cpu_time_limit_is_restarted(interpreter, monkeypatch):
+    monkeypatch.setattr(resource_limits, "KERNEL_CPU_TIME_LIMIT", 3)
+    usages: list[CodeExecutionUsage] = []
+
+    async def on_usage(usage):
+        usages.append(usage)
+
+    await _run(on_usage)
+    assert not usages[0].restarted
+    assert run_code.code_interpreters["chat"]["python"] is interpreter
+
+    await _run(on_usage)
+    assert usages[1].limit_exceeded is None
+    assert usages[1].restarted
+    assert "python" not in run_code.code_interpreters["chat"]
+
+
+def test_no_process_limits_by_default():
+    assert resource_limits.resource_limited_process_kwargs() == {}
@@ -0,0 +1,81 @@
+import asyncio
+import platform
+from contextlib import aclosing
+
+import pytest
+import pytest_asyncio
+
+from aiconsole.core.code_running.code_interpreters import subprocess_code_interpreter
+from aiconsole.core.code_running.code_interpreters.subprocess_code_interpreter import (
+    SubprocessCodeInterpreter,
+)
+
+pytestmark = pytest.mark.skipif(platform.system() == "Windows", reason="Uses a POSIX shell")
+
+
+class Shell(SubprocessCodeInterpreter):
+    def __init__(self):
+        super().__init__()
+        self.start_cmd = "/bin/sh"
+        self.processes = []
+
+    async def start_process(self):
+        await super().start_process()
+        self.processes.append(self.process)
+
+    async def wait_for_path(self, timeout: int = 100, check_interval: int = 5):
+        pass
+
+    def preprocess_code(self, code, materials):
+        return code + '; echo "## end_of_execution ##"'
+
+    def detect_end_of_execution(self, line):
+        return "## end_of_execution ##" in line
+
+
+@pytest_asyncio.fixture
+async def shell():
+    shell = Shell()
+    yield shell
+    await shell.terminate()
+    for process in shell.processes:
+        await process.wait()
+
+
+async def _run(shell: Shell, code: str) -> str:
+    return "".join([output async for output in shell.run(code, [])])
+
+
+@pytest.mark.asyncio
+async def test_output_of_consecutive_executions(shell):
+    assert await _run(shell, "echo one; echo two >&2") == "one\ntwo\n"
+    assert await _run(shell, "echo three") == "three\n"
+
+
+@pytest.mark.asyncio
+async def test_lines_written_together_are_batched(shell):
+    # Single write, lines of separate writes could be read one by one
+    outputs = [output async for output in shell.run("printf '1\\n2\\n3\\n4\\n5\\n'", [])]
+
+    assert "".join(outputs) == "1\n2\n3\n4\n5\n"
+    assert len(outputs) < 5
+
+
+@pytest.mark.asyncio
+async def test_closing_the_output_stops_the_process(shell):
+    async with aclosing(shell.run("sleep 10; echo late", [])) as outputs:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(outputs), timeout=0.2)
+
+    assert shell.process is None
+    assert await shell.processes[0].wait() != 0
+    assert await _run(shell, "echo after") == "after\n"
+
+
+@pytest.mark.asyncio
+async def test_line_longer_than_the_stream_limit_is_passed_on(shell, monkeypatch):
+    monkeypatch.setattr(subprocess_code_interpreter, "_STREAM_LIMIT", 1024)
+
+    output = await asyncio.wait_for(_run(shell, "head -c 5000 /dev/zero | tr '\\0' x; echo"), timeout=5)
+
+    assert output == "x" * 5000 + "\n"
@@ -0,0 +1,22 @@
+import pytest
+
+from aiconsole.core.assets.materials.rendered_material_cache import (
+    rendered_material_cache,
+)
+from aiconsole.core.chat.chat_cache import chat_cache
+from aiconsole.core.project import project
+
+
+@pytest.fixture
+def initialized_project_dir(tmp_path, monkeypatch):
+    """
+    Empty temporary directory used as the current project, caches of the previous project are cleared.
+    """
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(project, "_project_initialized", True)
+    chat_cache().clear()
+    rendered_material_cache.cache_clear()
+    yield tmp_path
+    chat_cache().clear()
+    rendered_material_cache.cache_clear()
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 from enum import Enum
 from typing import Any
 
@@ -42,6 +43,17 @@ GPT_MODE_QUALITY_MAX_TOKENS = 128000
 GPT_MODE_ANALYSIS_MAX_TOKENS = 128000
 GPT_MODE_SPEED_MAX_TOKENS = 16384
 
+TOKEN_COUNTS_CACHE_SIZE = 20000  # Number of texts (messages, tool definitions) whose token counts are remembered
+
+# History which does not fit the model is reduced, starting from the oldest messages
+CONTEXT_BUDGET_KEEP_RECENT_MESSAGES = 6  # Number of last messages which are kept intact as long as possible
+CONTEXT_BUDGET_MAX_TOOL_OUTPUT_TOKENS = 1000  # Longer tool outputs are cut in the middle
+
+# Opt-in local cache of GPT responses, identical requests are answered from .aic/cache instead of the API
+GPT_RESPONSE_CACHE_ENABLED = os.environ.get("AICONSOLE_GPT_RESPONSE_CACHE", "0") == "1"
+GPT_RESPONSE_CACHE_TTL = 24 * 60 * 60  # Seconds a cached response is valid for
+GPT_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total size of cached responses, least recently used ones are evicted
+
 
 class GPTEncoding(str, Enum):
     GPT_4 = "gpt-4"
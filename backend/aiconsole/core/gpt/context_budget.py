@@ -0,0 +1,141 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fitting chat history into the token budget of a request.
+
+History which does not fit is reduced step by step, oldest messages first, until it fits:
+1. Outputs of old tool calls are removed.
+2. Long tool outputs are cut in the middle.
+3. Oldest messages are dropped, together with the tool outputs they led to.
+The last messages are kept intact as long as possible, system messages are never dropped.
+"""
+
+import json
+from typing import Protocol
+
+from aiconsole.core.gpt.consts import (
+    CONTEXT_BUDGET_KEEP_RECENT_MESSAGES,
+    CONTEXT_BUDGET_MAX_TOOL_OUTPUT_TOKENS,
+)
+from aiconsole.core.gpt.tokens import count_text_tokens, get_encoding
+from aiconsole.core.gpt.types import (
+    GPTRequestMessage,
+    GPTRequestTextMessage,
+    GPTRequestToolMessage,
+)
+
+REMOVED_OUTPUT = "Output removed to fit the context window."
+TRUNCATED_OUTPUT = "\n... {count} tokens of output removed to fit the context window ...\n"
+
+
+class ContextBudget(Protocol):
+    def fit(self, messages: list[GPTRequestMessage], max_tokens: int, encoding: str) -> list[GPTRequestMessage]:
+        """
+        Returns messages which take at most max_tokens, if that's possible.
+        """
+        ...
+
+
+class _Messages:
+    def __init__(self, messages: list[GPTRequestMessage], encoding: str):
+        self.encoding = encoding
+        self.messages: list[GPTRequestMessage | None] = list(messages)
+        self.tokens = [self._count(message) for message in messages]
+
+    def _count(self, message: GPTRequestMessage) -> int:
+        # Same as count_messages_tokens, each message and its separator, and brackets of the list in total_tokens
+        return count_text_tokens(json.dumps(message.model_dump(exclude_none=True)), self.encoding) + 1
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens) + 1
+
+    def replace(self, index: int, message: GPTRequestMessage | None) -> None:
+        self.messages[index] = message
+        self.tokens[index] = self._count(message) if message is not None else 0
+
+    def result(self) -> list[GPTRequestMessage]:
+        return [message for message in self.messages if message is not None]
+
+
+class DefaultContextBudget:
+    def __init__(
+        self,
+        keep_recent_messages: int = CONTEXT_BUDGET_KEEP_RECENT_MESSAGES,
+        max_tool_output_tokens: int = CONTEXT_BUDGET_MAX_TOOL_OUTPUT_TOKENS,
+    ):
+        self.keep_recent_messages = keep_recent_messages
+        self.max_tool_output_tokens = max_tool_output_tokens
+
+    def fit(self, messages: list[GPTRequestMessage], max_tokens: int, encoding: str) -> list[GPTRequestMessage]:
+        state = _Messages(messages, encoding)
+
+        if state.total_tokens <= max_tokens:
+            return messages
+
+        old_count = max(len(messages) - self.keep_recent_messages, 0)
+
+        for step in (self._remove_old_outputs, self._truncate_outputs):
+            for index in range(len(messages)):
+                if state.total_tokens <= max_tokens:
+                    return state.result()
+                step(state, index, old_count)
+
+        self._drop_oldest_messages(state, max_tokens)
+
+        return state.result()
+
+    def _remove_old_outputs(self, state: _Messages, index: int, old_count: int) -> None:
+        message = state.messages[index]
+        if index < old_count and isinstance(message, GPTRequestToolMessage) and message.content != REMOVED_OUTPUT:
+            state.replace(index, message.model_copy(update={"content": REMOVED_OUTPUT}))
+
+    def _truncate_outputs(self, state: _Messages, index: int, old_count: int) -> None:
+        message = state.messages[index]
+        if not isinstance(message, GPTRequestToolMessage) or not message.content:
+            return
+
+        encoding = get_encoding(state.encoding)
+        tokens = encoding.encode(message.content)
+        if len(tokens) <= self.max_tool_output_tokens:
+            return
+
+        # Beginning and end of an output are usually the most informative parts
+        head = self.max_tool_output_tokens // 2
+        tail = self.max_tool_output_tokens - head
+        content = (
+            encoding.decode(tokens[:head])
+            + TRUNCATED_OUTPUT.format(count=len(tokens) - head - tail)
+            + encoding.decode(tokens[-tail:])
+        )
+        state.replace(index, message.model_copy(update={"content": content}))
+
+    def _drop_oldest_messages(self, state: _Messages, max_tokens: int) -> None:
+        index = 0
+        while state.total_tokens > max_tokens and index < len(state.messages) - self.keep_recent_messages:
+            message = state.messages[index]
+
+            if message is None or (isinstance(message, GPTRequestTextMessage) and message.role == "system"):
+                index += 1
+                continue
+
+            # Tool outputs can't be left without the message which called the tools
+            state.replace(index, None)
+            index += 1
+            while index < len(state.messages) and isinstance(state.messages[index], GPTRequestToolMessage):
+                state.replace(index, None)
+                index += 1
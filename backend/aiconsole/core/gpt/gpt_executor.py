@@ -20,12 +20,15 @@ from typing import AsyncGenerator
 import litellm  # type: ignore
 
 # from litellm.caching import Cache  # type: ignore
+from litellm.utils import Delta, StreamingChoices  # type: ignore
 from openai import AuthenticationError
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
 
 from aiconsole.api.websockets.connection_manager import connection_manager
 from aiconsole.api.websockets.server_messages import DebugJSONServerMessage
 from aiconsole.core.gpt.partial import GPTPartialResponse
 from aiconsole.core.gpt.request import GPTRequest
+from aiconsole.core.gpt.response_cache import gpt_response_cache, request_cache_key
 
 from .exceptions import NoOpenAPIKeyException
 from .types import CLEAR_STR, CLEAR_STR_TYPE, GPTChoice, GPTResponse, GPTResponseMessage
@@ -38,6 +41,35 @@ litellm.disable_cache()
 litellm.set_verbose = False
 
 
+def _chunk_to_dict(chunk: litellm.ModelResponse) -> dict:
+    choices = []
+    for choice in chunk.choices:
+        delta = {
+            key: choice.delta.get(key) for key in ("role", "content", "name") if choice.delta.get(key) is not None
+        }
+        if choice.delta.get("tool_calls"):
+            delta["tool_calls"] = [tool_call.model_dump(exclude_none=True) for tool_call in choice.delta.tool_calls]
+        choices.append({"index": choice.index, "finish_reason": choice.finish_reason, "delta": delta})
+
+    return {"id": chunk.id, "created": chunk.created, "model": chunk.model, "choices": choices}
+
+
+def _chunk_from_dict(data: dict) -> litellm.ModelResponse:
+    chunk = litellm.ModelResponse(stream=True, id=data["id"], created=data["created"], model=data["model"])
+
+    choices = []
+    for choice in data["choices"]:
+        delta_data = dict(choice["delta"])
+        tool_calls = delta_data.pop("tool_calls", None)
+        delta = Delta(**delta_data)
+        if tool_calls is not None:
+            delta.tool_calls = [ChoiceDeltaToolCall(**tool_call) for tool_call in tool_calls]
+        choices.append(StreamingChoices(finish_reason=choice["finish_reason"], index=choice["index"], delta=delta))
+    chunk.choices = choices
+
+    return chunk
+
+
 class GPTExecutor:
     def __init__(self):
         self.request = {}
@@ -68,6 +100,24 @@ class GPTExecutor:
         if request.tools:
             request_dict["tools"] = [tool.model_dump(exclude_none=True) for tool in request.tools]
 
+        cache = gpt_response_cache()
+        cache_key = request_cache_key(request_dict) if cache else ""
+
+        if cache and (cached_chunks := await cache.get(cache_key)) is not None:
+            _log.info("Replaying cached GPT response")
+            self.request = request_dict
+            self.partial_response = GPTPartialResponse()
+
+            # Replayed the same way as a streamed response, so callers don't see a difference
+            for data in cached_chunks:
+                chunk = _chunk_from_dict(data)
+                self.partial_response.apply_chunk(chunk)
+                yield chunk
+                await asyncio.sleep(0)
+
+            self.response = self.partial_response.to_final_response()
+            return
+
         for attempt in range(3):
             try:
                 _log.info("Executing GPT request:", request_dict)
@@ -75,14 +125,20 @@ class GPTExecutor:
                 response = await litellm.acompletion(**request_dict, stream=True)  # caching=True, ttl=60 * 60 * 24
 
                 self.partial_response = GPTPartialResponse()
+                recorded_chunks = []
 
                 async for chunk in response:  # type: ignore
                     self.partial_response.apply_chunk(chunk)
+                    if cache:
+                        recorded_chunks.append(_chunk_to_dict(chunk))
                     yield chunk
                     await asyncio.sleep(0)
 
                 self.response = self.partial_response.to_final_response()
 
+                if cache:
+                    await cache.put(cache_key, recorded_chunks)
+
                 if _log.isEnabledFor(logging.DEBUG):
                     await connection_manager().send_to_all(
                         DebugJSONServerMessage(
@@ -0,0 +1,280 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import re
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+_SCALAR_CHARS = frozenset("-+.0123456789eEtruefalsn")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Run of string characters which don't need any handling
+_PLAIN_STRING_CHARS = re.compile(r'[^"\\]+')
+
+# What is expected next in a container
+_KEY, _COLON, _VALUE, _COMMA = range(4)
+
+
+class IncrementalJSONParser:
+    """
+    Parses JSON which arrives in parts, e.g. streamed arguments of a tool call.
+
+    Only the new part is processed on every feed, state of the unfinished containers and strings is kept in between.
+    The value parsed so far is available at any point, with unfinished strings and numbers as they are so far and
+    without keys whose value has not been started or can't be parsed yet.
+
+    What was added to string values of a top level object is also gathered, to be taken as deltas.
+
+    If the text turns out not to be JSON, failed is set and nothing more is parsed.
+    """
+
+    def __init__(self):
+        self.failed = False
+
+        self._root: Any = None
+        self._has_root = False
+
+        # Containers being parsed with what's expected next in them, and the key of the value in a dict
+        self._stack: list[tuple[dict | list, int, str | None]] = []
+
+        # Unfinished string or literal (number, true, false, null)
+        self._token: str | None = None
+        self._chars: list[str] = []
+        self._is_key = False
+        self._escape: str | None = None
+        self._high_surrogate: int | None = None
+
+        # Added to string values of the top level object since they were last taken, by their keys
+        self._string_deltas: dict[str, list[str]] = {}
+        self._string_deltas_key: str | None = None
+
+    @property
+    def is_object(self) -> bool:
+        return isinstance(self._root, dict)
+
+    def take_string_deltas(self) -> dict[str, str]:
+        string_deltas = {key: "".join(deltas) for key, deltas in self._string_deltas.items()}
+        self._string_deltas.clear()
+        return string_deltas
+
+    @property
+    def value(self) -> Any:
+        if self._token == "string" and not self._is_key:
+            self._chars = ["".join(self._chars)]
+            self._set(self._chars[0])
+        elif self._token == "literal":
+            # Could still grow, e.g. 1 into 12, it's shown as it is so far
+            try:
+                self._set(json.loads("".join(self._chars)))
+            except json.JSONDecodeError:
+                pass
+
+        return self._root
+
+    def feed(self, text: str) -> None:
+        i = 0
+        length = len(text)
+
+        while i < length and not self.failed:
+            if self._token == "string":
+                i = self._feed_string(text, i)
+                continue
+
+            char = text[i]
+
+            if self._token == "literal":
+                if char in _SCALAR_CHARS:
+                    self._chars.append(char)
+                    i += 1
+                    continue
+                self._end_literal()
+                continue
+
+            i += 1
+
+            if char in _WHITESPACE:
+                continue
+
+            phase = self._stack[-1][1] if self._stack else _VALUE
+
+            if self._has_root and not self._stack:
+                self.failed = True
+            elif phase == _KEY:
+                if char == '"':
+                    self._start_string(is_key=True)
+                elif char == "}" and not self._stack[-1][0]:
+                    self._pop()
+                else:
+                    self.failed = True
+            elif phase == _COLON:
+                if char == ":":
+                    self._set_phase(_VALUE)
+                else:
+                    self.failed = True
+            elif phase == _VALUE:
+                if char == "]" and isinstance(self._stack[-1][0], list) and not self._stack[-1][0]:
+                    self._pop()
+                else:
+                    self._start_value(char)
+            elif phase == _COMMA:
+                container = self._stack[-1][0]
+                if char == ",":
+                    self._set_phase(_KEY if isinstance(container, dict) else _VALUE)
+                elif char == ("}" if isinstance(container, dict) else "]"):
+                    self._pop()
+                else:
+                    self.failed = True
+
+    def _start_value(self, char: str) -> None:
+        if char == "{":
+            self._push({})
+        elif char == "[":
+            self._push([])
+        elif char == '"':
+            self._start_string(is_key=False)
+            self._set("")
+            if len(self._stack) == 1 and isinstance(self._root, dict):
+                self._string_deltas_key = self._stack[-1][2]
+        elif char in _SCALAR_CHARS:
+            self._token = "literal"
+            self._chars = [char]
+        else:
+            self.failed = True
+
+    def _start_string(self, is_key: bool) -> None:
+        self._token = "string"
+        self._chars = []
+        self._is_key = is_key
+        self._escape = None
+        self._high_surrogate = None
+        self._string_deltas_key = None
+
+    def _append_chars(self, chars: str) -> None:
+        if self._high_surrogate is not None:
+            # Not followed by the second half of the pair, kept on its own
+            high_surrogate, self._high_surrogate = chr(self._high_surrogate), None
+            self._append_chars(high_surrogate)
+
+        self._chars.append(chars)
+        if self._string_deltas_key is not None:
+            self._string_deltas.setdefault(self._string_deltas_key, []).append(chars)
+
+    def _feed_string(self, text: str, i: int) -> int:
+        if self._escape is not None:
+            return self._feed_escape(text, i)
+
+        match = _PLAIN_STRING_CHARS.match(text, i)
+        if match:
+            self._append_chars(match.group())
+            return match.end()
+
+        if text[i] == "\\":
+            self._escape = ""
+        else:
+            self._end_string()
+        return i + 1
+
+    def _feed_escape(self, text: str, i: int) -> int:
+        assert self._escape is not None
+        self._escape += text[i]
+
+        if self._escape[0] != "u":
+            if self._escape not in _ESCAPES:
+                self.failed = True
+            else:
+                self._append_chars(_ESCAPES[self._escape])
+            self._escape = None
+        elif len(self._escape) == 5:
+            try:
+                code = int(self._escape[1:], 16)
+            except ValueError:
+                self.failed = True
+                return i + 1
+            self._escape = None
+
+            if 0xD800 <= code <= 0xDBFF and self._high_surrogate is None:
+                # First half of a surrogate pair, waits for the second one
+                self._high_surrogate = code
+            elif 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                self._high_surrogate = None
+                self._append_chars(chr(code))
+            else:
+                self._append_chars(chr(code))
+
+        return i + 1
+
+    def _end_string(self) -> None:
+        if self._high_surrogate is not None:
+            self._append_chars("")
+
+        string = "".join(self._chars)
+        self._token = None
+        self._chars = []
+
+        if self._is_key:
+            container, _, _ = self._stack[-1]
+            self._stack[-1] = (container, _COLON, string)
+        else:
+            self._set(string)
+            self._value_done()
+
+    def _end_literal(self) -> None:
+        literal = "".join(self._chars)
+        self._token = None
+        self._chars = []
+
+        try:
+            self._set(json.loads(literal))
+        except json.JSONDecodeError:
+            self.failed = True
+            return
+        self._value_done()
+
+    def _set(self, value: Any) -> None:
+        """
+        Sets the value currently being parsed, an unfinished one is set again when it grows.
+        """
+
+        if not self._stack:
+            self._root = value
+            self._has_root = True
+            return
+
+        container, phase, key = self._stack[-1]
+        if isinstance(container, dict):
+            container[key] = value
+        elif phase == _VALUE:
+            container.append(value)
+            self._stack[-1] = (container, _COMMA, key)
+        else:
+            container[-1] = value
+
+    def _value_done(self) -> None:
+        if self._stack:
+            self._set_phase(_COMMA)
+
+    def _push(self, container: dict | list) -> None:
+        self._set(container)
+        self._stack.append((container, _KEY if isinstance(container, dict) else _VALUE, None))
+
+    def _pop(self) -> None:
+        self._stack.pop()
+        self._value_done()
+
+    def _set_phase(self, phase: int) -> None:
+        container, _, key = self._stack[-1]
+        self._stack[-1] = (container, phase, key)
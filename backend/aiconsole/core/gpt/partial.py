@@ -17,8 +17,9 @@
 from litellm import ModelResponse  # type: ignore
 from litellm.utils import Delta, StreamingChoices  # type: ignore
 from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
+from aiconsole.core.gpt.incremental_json_parser import IncrementalJSONParser
 from aiconsole.core.gpt.parse_partial_json import parse_partial_json
 from aiconsole.core.gpt.types import (
     GPTChoice,
@@ -34,14 +35,52 @@ class GPTPartialFunctionCall(BaseModel):
     name: str = ""
     arguments_builder: list[str] = []
 
+    _arguments_parser: IncrementalJSONParser = PrivateAttr(default_factory=IncrementalJSONParser)
+    _parsed_builder_length: int = PrivateAttr(default=0)
+    _arguments_length: int = PrivateAttr(default=0)
+
     @property
     def arguments(self) -> str:
+        self._parse_new_arguments()
         self.arguments_builder = ["".join(self.arguments_builder)]
+        self._parsed_builder_length = 1
         return self.arguments_builder[0]
 
+    def _parse_new_arguments(self):
+        # Only deltas appended since the last parse are fed to the parser
+        for arguments_delta in self.arguments_builder[self._parsed_builder_length :]:
+            self._arguments_parser.feed(arguments_delta)
+            self._arguments_length += len(arguments_delta)
+        self._parsed_builder_length = len(self.arguments_builder)
+
+    @property
+    def has_arguments(self) -> bool:
+        self._parse_new_arguments()
+        return self._arguments_length > 0
+
+    def take_arguments_deltas(self) -> dict[str, str] | None:
+        """
+        Text added to each string argument since the last call, None if the arguments are not a JSON object.
+        """
+
+        self._parse_new_arguments()
+        parser = self._arguments_parser
+
+        if parser.failed or not parser.is_object:
+            return None
+
+        return parser.take_string_deltas()
+
     @property
     def arguments_dict(self) -> dict | None:
-        return parse_partial_json(self.arguments)
+        self._parse_new_arguments()
+        parser = self._arguments_parser
+
+        if parser.failed:
+            # Not JSON, but could still be a dict with python strings in it
+            return parse_partial_json(self.arguments) if '"""' in self.arguments else None
+
+        return parser.value if isinstance(parser.value, dict) else None
 
 
 class GPTPartialToolsCall(BaseModel):
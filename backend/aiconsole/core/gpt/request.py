@@ -18,10 +18,14 @@ import json
 import logging
 from typing import Literal
 
-import tiktoken
-
 from aiconsole.core.gpt.consts import GPTMode
+from aiconsole.core.gpt.context_budget import ContextBudget
 from aiconsole.core.gpt.token_error import TokenError
+from aiconsole.core.gpt.tokens import (
+    count_messages_tokens,
+    count_text_tokens,
+    get_encoding,
+)
 from aiconsole.core.gpt.tool_definition import ToolDefinition
 from aiconsole.core.gpt.types import (
     EnforcedFunctionCall,
@@ -48,6 +52,7 @@ class GPTRequest:
         presence_penalty: float = 0,
         min_tokens: int = 0,
         preferred_tokens: int = 0,
+        context_budget: ContextBudget | None = None,
     ):
         self.system_message = system_message
         self.messages = messages
@@ -63,6 +68,19 @@ class GPTRequest:
         used_tokens = self.count_tokens() + EXTRA_BUFFER_FOR_ENCODING_OVERHEAD
         available_tokens = self.model_config.max_tokens - used_tokens
 
+        if context_budget is not None and available_tokens < max(min_tokens, preferred_tokens):
+            # History is reduced so there is room for the preferred length of the response
+            encoding = self.model_config.encoding
+            messages_tokens = count_messages_tokens([m.model_dump(exclude_none=True) for m in self.messages], encoding)
+            self.messages = context_budget.fit(
+                self.messages,
+                max_tokens=messages_tokens - (max(min_tokens, preferred_tokens) - available_tokens),
+                encoding=encoding,
+            )
+
+            used_tokens = self.count_tokens() + EXTRA_BUFFER_FOR_ENCODING_OVERHEAD
+            available_tokens = self.model_config.max_tokens - used_tokens
+
         if available_tokens < min_tokens:
             _log.error(
                 f"Not enough tokens to perform the modification. Used tokens: {used_tokens},"
@@ -122,26 +140,22 @@ class GPTRequest:
         return mode_config
 
     def count_tokens(self):
-        encoding = tiktoken.encoding_for_model(self.model_config.encoding)
+        encoding = self.model_config.encoding
 
         if self.tools:
-            functions_tokens = len(encoding.encode(",".join(json.dumps(f.model_dump()) for f in self.tools)))
+            functions_tokens = count_text_tokens(",".join(json.dumps(f.model_dump()) for f in self.tools), encoding)
         else:
             functions_tokens = 0
         return self.count_messages_tokens(encoding) + functions_tokens
 
     def count_tokens_for_model(self, model):
-        encoding = tiktoken.encoding_for_model(self.model_config.encoding)
-        return self.count_messages_tokens(encoding)
+        return self.count_messages_tokens(self.model_config.encoding)
 
     def count_messages_tokens(self, encoding):
-        messages_str = json.dumps(self.get_messages_dump())
-        messages_tokens = len(encoding.encode(messages_str))
-
-        return messages_tokens
+        return count_messages_tokens(self.get_messages_dump(), encoding)
 
     def count_tokens_output(self, message_content: str, message_function_call: dict | None):
-        encoding = tiktoken.encoding_for_model(self.model_config.encoding)
+        encoding = get_encoding(self.model_config.encoding)
 
         return len(encoding.encode(message_content)) + (
             len(encoding.encode(json.dumps(message_function_call))) if message_function_call else 0
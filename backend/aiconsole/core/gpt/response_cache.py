@@ -0,0 +1,166 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from aiconsole.core.gpt.consts import (
+    GPT_RESPONSE_CACHE_ENABLED,
+    GPT_RESPONSE_CACHE_MAX_BYTES,
+    GPT_RESPONSE_CACHE_TTL,
+)
+from aiconsole.core.project.paths import get_cache_directory
+from aiconsole.core.project.project import is_project_initialized
+
+_log = logging.getLogger(__name__)
+
+# Keys that don't affect the response, excluded so they don't change the cache key
+_IGNORED_REQUEST_KEYS = {"api_key"}
+
+
+def request_cache_key(request_dict: dict) -> str:
+    """
+    Canonical hash of a request, requests which differ only in the order of their keys have the same one.
+    """
+
+    canonical = json.dumps(
+        {key: value for key, value in request_dict.items() if key not in _IGNORED_REQUEST_KEYS},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class GPTResponseCache:
+    """
+    Streamed GPT responses, stored as lists of chunks in a SQLite database.
+
+    Responses older than ttl seconds are not returned, when the total size of responses exceeds max_bytes the least
+    recently used ones are evicted. Database is accessed on a worker thread, so a slow disk doesn't block the event
+    loop.
+    """
+
+    def __init__(self, path: Path, ttl: float = GPT_RESPONSE_CACHE_TTL, max_bytes: int = GPT_RESPONSE_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, chunks TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+        return self._connection
+
+    async def get(self, key: str) -> list[dict] | None:
+        return await asyncio.to_thread(self._locked, self._get, key)
+
+    async def put(self, key: str, chunks: list[dict]) -> None:
+        await asyncio.to_thread(self._locked, self._put, key, chunks)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._locked, self._clear)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _locked(self, f, *args):
+        with self._lock:
+            return f(*args)
+
+    def _get(self, key: str) -> list[dict] | None:
+        now = time.time()
+
+        row = self.connection.execute("SELECT chunks, created FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+        self.connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _put(self, key: str, chunks: list[dict]) -> None:
+        data = json.dumps(chunks, separators=(",", ":"))
+        if len(data) > self.max_bytes:
+            return
+
+        now = time.time()
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, chunks, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict(now)
+
+    def _clear(self) -> None:
+        self.connection.execute("DELETE FROM responses")
+
+    def _evict(self, now: float) -> None:
+        self.connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+
+        (total_size,) = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total_size <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total_size <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_size -= size
+            evicted += 1
+
+        _log.debug(f"Evicted {evicted} cached GPT responses")
+
+
+@lru_cache
+def _gpt_response_cache(path: Path) -> GPTResponseCache:
+    return GPTResponseCache(path)
+
+
+def gpt_response_cache() -> GPTResponseCache | None:
+    """
+    Response cache of the current project, None if the cache is not enabled.
+    """
+
+    if not GPT_RESPONSE_CACHE_ENABLED or not is_project_initialized():
+        return None
+
+    return _gpt_response_cache(get_cache_directory() / "gpt_responses.sqlite")
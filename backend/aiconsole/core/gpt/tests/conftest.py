@@ -0,0 +1,21 @@
+import pytest
+import tiktoken
+
+from aiconsole.core.gpt import tokens
+
+
+@pytest.fixture(autouse=True)
+def byte_encoding(monkeypatch):
+    # Real encodings are downloaded on first use, a byte level one behaves the same way for counting
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: encoding)
+    tokens.get_encoding.cache_clear()
+    tokens._token_counts.clear()
+    yield encoding
+    tokens.get_encoding.cache_clear()
+    tokens._token_counts.clear()
@@ -0,0 +1,68 @@
+import json
+
+from aiconsole.core.gpt.context_budget import REMOVED_OUTPUT, DefaultContextBudget
+from aiconsole.core.gpt.tokens import count_messages_tokens
+from aiconsole.core.gpt.types import (
+    GPTFunctionCall,
+    GPTRequestMessage,
+    GPTRequestTextMessage,
+    GPTRequestToolMessage,
+    GPTToolCall,
+)
+
+
+def _create_turn(i: int, output: str) -> list[GPTRequestMessage]:
+    return [
+        GPTRequestTextMessage(role="user", content=f"Question {i}"),
+        GPTRequestTextMessage(
+            role="assistant",
+            content=f"Answer {i}",
+            tool_calls=[
+                GPTToolCall(id=f"call_{i}", function=GPTFunctionCall(name="python_tool", arguments=json.dumps({})))
+            ],
+        ),
+        GPTRequestToolMessage(tool_call_id=f"call_{i}", content=output),
+    ]
+
+
+def _count(messages: list[GPTRequestMessage]) -> int:
+    return count_messages_tokens([message.model_dump(exclude_none=True) for message in messages], "gpt-4")
+
+
+def test_should_keep_history_which_fits():
+    messages = [message for i in range(3) for message in _create_turn(i, "output")]
+
+    assert DefaultContextBudget().fit(messages, _count(messages), "gpt-4") is messages
+
+
+def test_should_remove_old_tool_outputs_first():
+    messages = [message for i in range(4) for message in _create_turn(i, "output " * 100)]
+
+    fitted = DefaultContextBudget(keep_recent_messages=3).fit(messages, _count(messages) - 500, "gpt-4")
+
+    assert len(fitted) == len(messages)
+    assert fitted[2].content == REMOVED_OUTPUT
+    assert fitted[-1].content == messages[-1].content
+    assert _count(fitted) <= _count(messages) - 500
+
+
+def test_should_truncate_long_outputs_in_the_middle():
+    messages = _create_turn(0, "start " + "middle " * 1000 + "end")
+
+    fitted = DefaultContextBudget(max_tool_output_tokens=100).fit(messages, 600, "gpt-4")
+
+    assert fitted[-1].content.startswith("start")
+    assert fitted[-1].content.endswith("end")
+    assert _count(fitted) <= 600
+
+
+def test_should_drop_oldest_turns_together_with_their_tool_outputs():
+    system_message = GPTRequestTextMessage(role="system", content="Director")
+    messages = [system_message, *[message for i in range(10) for message in _create_turn(i, "output")]]
+
+    fitted = DefaultContextBudget(keep_recent_messages=3).fit(messages, _count(messages) // 2, "gpt-4")
+
+    assert fitted[0] == system_message
+    assert not isinstance(fitted[1], GPTRequestToolMessage)
+    assert fitted[-3:] == messages[-3:]
+    assert _count(fitted) <= _count(messages) // 2
@@ -0,0 +1,100 @@
+import pytest
+
+from aiconsole.core.gpt import gpt_executor
+from aiconsole.core.gpt.gpt_executor import GPTExecutor, _chunk_from_dict
+from aiconsole.core.gpt.response_cache import GPTResponseCache
+
+CHUNKS = [
+    {
+        "id": "response",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": None, "delta": {"role": "assistant", "content": "Hel"}}],
+    },
+    {
+        "id": "response",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": None, "delta": {"content": "lo"}}],
+    },
+    {
+        "id": "response",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": None,
+                "delta": {
+                    "tool_calls": [
+                        {
+                            "index": 0,
+                            "id": "call",
+                            "type": "function",
+                            "function": {"name": "python", "arguments": '{"code": "print(1)"}'},
+                        }
+                    ]
+                },
+            }
+        ],
+    },
+    {
+        "id": "response",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "tool_calls", "delta": {}}],
+    },
+]
+
+
+class FakeRequest:
+    temperature = 0
+    presence_penalty = 0
+    tool_choice = None
+    tools = []
+    llm_settings = {"model": "gpt-4o", "api_key": "sk-test"}
+
+    def validate_request(self):
+        pass
+
+    def get_messages_dump(self):
+        return [{"role": "user", "content": "Hello"}]
+
+
+@pytest.fixture
+def completions(tmp_path, monkeypatch):
+    cache = GPTResponseCache(tmp_path / "gpt_responses.sqlite")
+    completions = []
+
+    async def stream():
+        for data in CHUNKS:
+            yield _chunk_from_dict(data)
+
+    async def acompletion(**request):
+        completions.append(request)
+        return stream()
+
+    monkeypatch.setattr(gpt_executor, "gpt_response_cache", lambda: cache)
+    monkeypatch.setattr(gpt_executor.litellm, "acompletion", acompletion)
+
+    yield completions
+    cache.close()
+
+
+async def _execute(executor: GPTExecutor) -> list:
+    return [chunk async for chunk in executor.execute(FakeRequest())]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_cached_response_is_replayed_without_a_request(completions):
+    executor = GPTExecutor()
+    await _execute(executor)
+
+    cached_executor = GPTExecutor()
+    replayed_chunks = await _execute(cached_executor)
+
+    assert len(completions) == 1
+    assert len(replayed_chunks) == len(CHUNKS)
+    assert cached_executor.response == executor.response
+    assert cached_executor.response.choices[0].message.content == "Hello"
+    assert cached_executor.response.choices[0].message.tool_calls[0].function.arguments == '{"code": "print(1)"}'
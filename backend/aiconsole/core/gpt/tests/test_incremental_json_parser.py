@@ -0,0 +1,151 @@
+import json
+import time
+
+import pytest
+
+from aiconsole.core.gpt.incremental_json_parser import IncrementalJSONParser
+from aiconsole.core.gpt.parse_partial_json import parse_partial_json
+
+CODE_SIZE = 20_000
+LONG_CODE_SIZE = 100_000
+CHUNK_SIZE = 10  # Characters of a streamed delta, a few tokens
+
+
+def _feed_in_chunks(text: str, chunk_size: int) -> IncrementalJSONParser:
+    parser = IncrementalJSONParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i : i + chunk_size])
+        parser.value
+    return parser
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"headline": "Print", "code": 'print("Hello\\n\\tworld")\n# ąę 😀   \\ "quoted"'},
+        {"a": [1, -2.5, 3e10, True, False, None, {"b": []}, [], {}], "c": {"d": ""}},
+        [1, "x", {"y": [None]}],
+        "text",
+        12,
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_parses_json_fed_in_parts(value, chunk_size, ensure_ascii):
+    parser = _feed_in_chunks(json.dumps(value, ensure_ascii=ensure_ascii, indent=1), chunk_size)
+
+    assert not parser.failed
+    assert parser.value == value
+
+
+def test_partial_values_are_exposed():
+    parser = IncrementalJSONParser()
+
+    parser.feed('{"headline": "Prin')
+    assert parser.value == {"headline": "Prin"}
+
+    parser.feed('t", "code": ')
+    assert parser.value == {"headline": "Print"}
+
+    parser.feed('"print(\\"a')
+    assert parser.value == {"headline": "Print", "code": 'print("a'}
+
+    parser.feed("\\u00")
+    assert parser.value == {"headline": "Print", "code": 'print("a'}
+
+    parser.feed('e9", "lines": [1')
+    assert parser.value == {"headline": "Print", "code": 'print("aé', "lines": [1]}
+
+
+def test_partial_values_match_whole_text_parsing():
+    text = json.dumps({"agent_id": "coder", "relevant_material_ids": ["a", "b"], "is_final_step": False, "n": 1.5})
+
+    for i in range(len(text)):
+        parser = IncrementalJSONParser()
+        parser.feed(text[:i])
+        expected = parse_partial_json(text[:i])
+
+        if expected is not None:
+            assert parser.value == expected
+
+
+@pytest.mark.parametrize("text", ["print(1)", '{"code": """print(1)"""}', '{"a" 1}', '{"a": 1,}', "[1,]", "{} x"])
+def test_text_which_is_not_json_fails(text):
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+
+    assert parser.failed
+
+
+@pytest.mark.benchmark
+def test_streamed_code_arguments_benchmark():
+    code = "".join(f"print('line {i}')  # \"comment\"\n" for i in range(CODE_SIZE // 30))[:CODE_SIZE]
+    arguments = json.dumps({"headline": "Print lines", "code": code})
+    chunks = [arguments[i : i + CHUNK_SIZE] for i in range(0, len(arguments), CHUNK_SIZE)]
+
+    start = time.perf_counter()
+    parser = IncrementalJSONParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        parser.value
+    incremental_duration = time.perf_counter() - start
+
+    # Whole text parsed again on every chunk, as it was done before
+    start = time.perf_counter()
+    arguments_so_far = ""
+    for chunk in chunks:
+        arguments_so_far += chunk
+        parse_partial_json(arguments_so_far)
+    whole_text_duration = time.perf_counter() - start
+
+    assert parser.value == {"headline": "Print lines", "code": code}
+    assert (
+        incremental_duration * 10 < whole_text_duration
+    ), f"incremental {incremental_duration * 1000:.0f}ms, whole text {whole_text_duration * 1000:.0f}ms"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5])
+def test_string_deltas_of_top_level_object_add_up_to_its_strings(chunk_size):
+    arguments = {"headline": "Emoji 😀", "code": 'print("\\u00e9 😀")\n' * 10, "nested": {"ignored": "x"}, "n": 1}
+    text = json.dumps(arguments)
+
+    parser = IncrementalJSONParser()
+    strings: dict[str, str] = {}
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i : i + chunk_size])
+        for key, delta in parser.take_string_deltas().items():
+            strings[key] = strings.get(key, "") + delta
+
+    assert strings == {"headline": arguments["headline"], "code": arguments["code"]}
+    assert parser.take_string_deltas() == {}
+
+
+@pytest.mark.benchmark
+def test_streamed_code_deltas_benchmark():
+    code = "".join(f"print('line {i}')  # \"comment\"\n" for i in range(LONG_CODE_SIZE // 30))[:LONG_CODE_SIZE]
+    arguments = json.dumps({"headline": "Print lines", "code": code})
+    chunks = [arguments[i : i + CHUNK_SIZE] for i in range(0, len(arguments), CHUNK_SIZE)]
+
+    start = time.perf_counter()
+    parser = IncrementalJSONParser()
+    sent_code = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        sent_code.append(parser.take_string_deltas().get("code", ""))
+    deltas_duration = time.perf_counter() - start
+
+    # Whole code taken from the parsed arguments on every chunk and compared with what was sent, as it was done before
+    start = time.perf_counter()
+    parser = IncrementalJSONParser()
+    previous_code = ""
+    for chunk in chunks:
+        parser.feed(chunk)
+        current_code = parser.value.get("code", "")
+        assert current_code.startswith(previous_code)
+        previous_code = current_code
+    whole_code_duration = time.perf_counter() - start
+
+    assert "".join(sent_code) == code
+    assert (
+        deltas_duration < whole_code_duration
+    ), f"deltas {deltas_duration * 1000:.1f}ms, whole code {whole_code_duration * 1000:.1f}ms"
@@ -0,0 +1,76 @@
+import pytest
+
+from aiconsole.core.gpt import response_cache
+from aiconsole.core.gpt.response_cache import (
+    GPTResponseCache,
+    gpt_response_cache,
+    request_cache_key,
+)
+from aiconsole.core.project import project
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GPTResponseCache(tmp_path / "cache" / "gpt_responses.sqlite", ttl=60, max_bytes=500)
+    yield cache
+    cache.close()
+
+
+def _chunks(content: str) -> list[dict]:
+    return [
+        {"id": "response", "created": 0, "model": "gpt-4o", "choices": [{"index": 0, "delta": {"content": c}}]}
+        for c in content
+    ]
+
+
+def test_request_cache_key_is_canonical():
+    request = {"messages": [{"role": "user", "content": "Hello"}], "temperature": 0, "model": "gpt-4o"}
+
+    assert request_cache_key(request) == request_cache_key(dict(reversed(request.items())))
+    assert request_cache_key(request) == request_cache_key({**request, "api_key": "sk-other"})
+    assert request_cache_key(request) != request_cache_key({**request, "temperature": 1})
+
+
+@pytest.mark.asyncio
+async def test_cached_chunks_are_returned(cache):
+    assert await cache.get("key") is None
+
+    await cache.put("key", _chunks("Hello"))
+
+    assert await cache.get("key") == _chunks("Hello")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_expired_responses_are_not_returned(cache, monkeypatch):
+    await cache.put("key", _chunks("Hello"))
+
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_responses_are_evicted(cache):
+    await cache.put("first", _chunks("ab"))
+    await cache.put("second", _chunks("cd"))
+    await cache.get("first")
+    await cache.put("third", _chunks("ef"))
+
+    assert await cache.get("first") is not None
+    assert await cache.get("second") is None
+    assert await cache.get("third") is not None
+
+
+def test_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(project, "_project_initialized", True)
+
+    monkeypatch.setattr(response_cache, "GPT_RESPONSE_CACHE_ENABLED", False)
+    assert gpt_response_cache() is None
+
+    monkeypatch.setattr(response_cache, "GPT_RESPONSE_CACHE_ENABLED", True)
+    cache = gpt_response_cache()
+    assert cache is not None
+    assert cache.path == tmp_path / ".aic" / "cache" / "gpt_responses.sqlite"
@@ -0,0 +1,62 @@
+import json
+import time
+
+import pytest
+
+from aiconsole.core.gpt.tokens import count_messages_tokens, count_text_tokens
+
+MESSAGES_COUNT = 2000
+
+
+def _create_messages(count: int) -> list[dict]:
+    return [
+        {"role": "user" if i % 2 else "assistant", "content": f"Message number {i}, " + "lorem ipsum dolor " * 50}
+        for i in range(count)
+    ]
+
+
+def test_should_count_text_once(byte_encoding, monkeypatch):
+    encoded = []
+    encode = byte_encoding.encode
+    monkeypatch.setattr(byte_encoding, "encode", lambda text: encoded.append(text) or encode(text))
+
+    assert count_text_tokens("Hello world", "gpt-4") == len(encode("Hello world"))
+    assert count_text_tokens("Hello world", "gpt-4") == len(encode("Hello world"))
+    assert encoded == ["Hello world"]
+
+
+def test_token_count_of_messages_is_close_to_count_of_their_dump(byte_encoding):
+    messages = _create_messages(10)
+
+    assert abs(count_messages_tokens(messages, "gpt-4") - len(byte_encoding.encode(json.dumps(messages)))) <= 10
+
+
+def test_counting_growing_history_encodes_only_new_messages(byte_encoding, monkeypatch):
+    messages = _create_messages(10)
+    count_messages_tokens(messages[:-1], "gpt-4")  # Previous turn
+
+    encoded = []
+    encode = byte_encoding.encode
+    monkeypatch.setattr(byte_encoding, "encode", lambda text: encoded.append(text) or encode(text))
+    count_messages_tokens(messages, "gpt-4")
+
+    assert encoded == [json.dumps(messages[-1])]
+
+
+@pytest.mark.benchmark
+def test_counting_growing_history_benchmark(byte_encoding):
+    messages = _create_messages(MESSAGES_COUNT)
+
+    start = time.perf_counter()
+    for _ in range(2):  # Request is validated twice, once when created and once when executed
+        len(byte_encoding.encode(json.dumps(messages)))
+    before = time.perf_counter() - start
+
+    count_messages_tokens(messages[:-1], "gpt-4")  # Previous turn
+
+    start = time.perf_counter()
+    for _ in range(2):
+        count_messages_tokens(messages, "gpt-4")
+    after = time.perf_counter() - start
+
+    assert after < before, f"{before * 1000:.1f}ms before, {after * 1000:.1f}ms with cached counts"
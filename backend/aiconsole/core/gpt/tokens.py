@@ -0,0 +1,60 @@
+# The AIConsole Project
+#
+# Copyright 2023 10Clouds
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Token counting with encoders and token counts of texts cached for the whole process.
+
+History of a chat is mostly the same between consecutive requests, so counting it only encodes messages which were
+not counted before.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from functools import lru_cache
+
+import tiktoken
+
+from aiconsole.core.gpt.consts import TOKEN_COUNTS_CACHE_SIZE
+
+_token_counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+
+
+@lru_cache
+def get_encoding(model: str) -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(model)
+
+
+def count_text_tokens(text: str, model: str) -> int:
+    key = (model, hashlib.blake2b(text.encode("utf8", errors="replace"), digest_size=16).digest())
+
+    count = _token_counts.get(key)
+    if count is not None:
+        _token_counts.move_to_end(key)
+        return count
+
+    count = len(get_encoding(model).encode(text))
+
+    _token_counts[key] = count
+    if len(_token_counts) > TOKEN_COUNTS_CACHE_SIZE:
+        _token_counts.popitem(last=False)
+
+    return count
+
+
+def count_messages_tokens(messages: list[dict], model: str) -> int:
+    # Brackets and separators of the dumped list take about one token per message
+    return sum(count_text_tokens(json.dumps(message), model) for message in messages) + len(messages) + 1
@@ -47,6 +47,14 @@ def get_aic_directory(project_path: Path | None = None):
     return get_project_directory(project_path) / ".aic"
 
 
+def get_tool_call_outputs_directory(project_path: Path | None = None):
+    return get_aic_directory(project_path) / "outputs"
+
+
+def get_cache_directory(project_path: Path | None = None):
+    return get_aic_directory(project_path) / "cache"
+
+
 def get_project_directory(project_path: Path | None = None):
     if not is_project_initialized() and not project_path:
         raise ValueError("Project settings are not initialized")
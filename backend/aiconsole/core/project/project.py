@@ -32,6 +32,7 @@ from aiconsole.api.websockets.server_messages import (
     ProjectOpenedServerMessage,
 )
 from aiconsole.core.assets.types import AssetType
+from aiconsole.core.code_running.kernel_pool import fill_kernel_pool
 from aiconsole.core.code_running.run_code import reset_code_interpreters
 from aiconsole.core.code_running.virtual_env.create_dedicated_venv import (
     create_dedicated_venv,
@@ -49,6 +50,9 @@ _project_initialized = False
 
 
 async def _clear_project():
+    from aiconsole.core.chat.chat_cache import chat_cache
+    from aiconsole.core.chat.locking import close_chat_actors
+
     global _materials
     global _agents
     global _project_initialized
@@ -60,6 +64,8 @@ async def _clear_project():
         _agents.stop()
 
     reset_code_interpreters()
+    await close_chat_actors()
+    chat_cache().clear()
 
     _materials = None
     _agents = None
@@ -148,3 +154,6 @@ async def choose_project(path: Path, background_tasks: BackgroundTasks):
     await reinitialize_project()
 
     background_tasks.add_task(create_dedicated_venv)
+
+    # Background tasks run one after another, so kernels are started in the venv which is ready by then
+    background_tasks.add_task(fill_kernel_pool)
@@ -49,6 +49,19 @@ def run_aiconsole(dev: bool):
         _log.info("Exiting ...")
 
 
+def migrate_all():
+    from pathlib import Path
+
+    from aiconsole.core.chat.chat_migrations import migrate_all_chats
+
+    parser = argparse.ArgumentParser(description="Upgrade all chats of a project to the current format.")
+    parser.add_argument("project", type=str, nargs="?", help="Project directory.", default=".")
+
+    project_path = Path(parser.parse_args().project)
+    migrated = migrate_all_chats(project_path)
+    print(f"Migrated {migrated} chats in {project_path.absolute()}")
+
+
 def aiconsole_dev():
     run_aiconsole(dev=True)
 
@@ -1,5 +1,6 @@
 from abc import ABC, ABCMeta
 from collections import defaultdict
+from contextvars import ContextVar
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Awaitable, Callable, Type, TypeVar
@@ -12,6 +13,17 @@ class InternalEvent(ABC):
 
 InternalEventT = TypeVar("InternalEventT", bound=InternalEvent)
 
+_held_back_events: ContextVar[list[tuple[InternalEvent, dict]] | None] = ContextVar("_held_back_events", default=None)
+
+
+def hold_back_internal_events(held_back_events: list[tuple[InternalEvent, dict]]) -> None:
+    """
+    Events emitted from now on in the current context, and in tasks started from it, are not handled but appended to
+    the given list, so they can be emitted later.
+    """
+
+    _held_back_events.set(held_back_events)
+
 
 class InternalEvents:
     """
@@ -29,6 +41,11 @@ class InternalEvents:
             self._handlers[event_type].remove(handler)
 
     async def emit(self, event: InternalEvent, **kwargs) -> None:
+        held_back_events = _held_back_events.get()
+        if held_back_events is not None:
+            held_back_events.append((event, kwargs))
+            return
+
         for handler in self._handlers[type(event)]:
             await handler(event, **kwargs)
 
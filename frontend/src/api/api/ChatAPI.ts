@@ -16,6 +16,7 @@
 
 // Analysis
 
+import { CodeExecutionUsage } from '@/types/editables/chatTypes';
 import ky from 'ky';
 import { API_HOOKS, getBaseURL } from '../../store/useAPIStore';
 
@@ -47,6 +48,21 @@ const patchChatOptions = (chatId: string, body: object) =>
     hooks: API_HOOKS,
   });
 
+const getToolCallOutput = (chatId: string, toolCallId: string) =>
+  ky
+    .get(`${getBaseURL()}/api/chats/${chatId}/tool_calls/${toolCallId}/output`, {
+      timeout: 60000,
+      hooks: API_HOOKS,
+    })
+    .text();
+
+const getToolCallUsage = (chatId: string, toolCallId: string) =>
+  ky
+    .get(`${getBaseURL()}/api/chats/${chatId}/tool_calls/${toolCallId}/usage`, {
+      hooks: API_HOOKS,
+    })
+    .json<CodeExecutionUsage>();
+
 // Commands
 
 const getCommandHistory = () => ky.get(`${getBaseURL()}/commands/history`);
@@ -61,6 +77,8 @@ const saveCommandToHistory = (body: object) =>
 export const ChatAPI = {
   patchChatOptions,
   runCode,
+  getToolCallOutput,
+  getToolCallUsage,
   getCommandHistory,
   saveCommandToHistory,
 };
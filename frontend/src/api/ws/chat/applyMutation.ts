@@ -141,9 +141,12 @@ export function applyMutation(chat: Chat, mutation: ChatMutation) {
     case 'SetLanguageToolCallMutation':
       getToolCallLocation(chat, mutation.tool_call_id).tool_call.language = mutation.language;
       break;
-    case 'SetOutputToolCallMutation':
-      getToolCallLocation(chat, mutation.tool_call_id).tool_call.output = mutation.output;
+    case 'SetOutputToolCallMutation': {
+      const tool_call = getToolCallLocation(chat, mutation.tool_call_id).tool_call;
+      tool_call.output = mutation.output;
+      tool_call.is_output_truncated = mutation.is_output_truncated;
       break;
+    }
     case 'AppendToOutputToolCallMutation': {
       const tool_call = getToolCallLocation(chat, mutation.tool_call_id).tool_call;
       if (tool_call.output === undefined) {
@@ -155,6 +158,9 @@ export function applyMutation(chat: Chat, mutation: ChatMutation) {
     case 'SetIsStreamingToolCallMutation':
       getToolCallLocation(chat, mutation.tool_call_id).tool_call.is_streaming = mutation.is_streaming;
       break;
+    case 'SetUsageToolCallMutation':
+      getToolCallLocation(chat, mutation.tool_call_id).tool_call.usage = mutation.usage;
+      break;
     case 'SetIsExecutingToolCallMutation':
       getToolCallLocation(chat, mutation.tool_call_id).tool_call.is_executing = mutation.is_executing;
       break;
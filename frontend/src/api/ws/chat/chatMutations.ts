@@ -1,5 +1,5 @@
 import { GPTRoleSchema, LanguageStrSchema } from '@/types/editables/assetTypes';
-import { ActorIdSchema } from '@/types/editables/chatTypes';
+import { ActorIdSchema, CodeExecutionUsageSchema } from '@/types/editables/chatTypes';
 import { z } from 'zod';
 
 export const LockAcquiredMutationSchema = z.object({
@@ -157,10 +157,19 @@ export const SetOutputToolCallMutationSchema = z.object({
   type: z.literal('SetOutputToolCallMutation'),
   tool_call_id: z.string(),
   output: z.string().optional(),
+  is_output_truncated: z.boolean().optional(),
 });
 
 export type SetOutputToolCallMutation = z.infer<typeof SetOutputToolCallMutationSchema>;
 
+export const SetUsageToolCallMutationSchema = z.object({
+  type: z.literal('SetUsageToolCallMutation'),
+  tool_call_id: z.string(),
+  usage: CodeExecutionUsageSchema.nullable().optional(),
+});
+
+export type SetUsageToolCallMutation = z.infer<typeof SetUsageToolCallMutationSchema>;
+
 export const AppendToOutputToolCallMutationSchema = z.object({
   type: z.literal('AppendToOutputToolCallMutation'),
   tool_call_id: z.string(),
@@ -264,6 +273,7 @@ export const ChatMutationSchema = z.union([
   SetLanguageToolCallMutationSchema,
   SetOutputToolCallMutationSchema,
   AppendToOutputToolCallMutationSchema,
+  SetUsageToolCallMutationSchema,
   SetIsStreamingToolCallMutationSchema,
   SetIsExecutingToolCallMutationSchema,
 ]);
@@ -99,6 +99,22 @@ export async function handleServerMessage(message: ServerMessage) {
       useChatStore.setState({ chat });
       break;
     }
+    case 'BatchedMutationsServerMessage': {
+      const chat = deepCopyChat(useChatStore.getState().chat);
+      if (!chat) {
+        throw new Error('Chat is not initialized');
+      }
+      for (const mutation of message.mutations) {
+        applyMutation(chat, mutation);
+      }
+      useChatStore.setState({ chat });
+      break;
+    }
+    case 'CodeExecutionQueueServerMessage':
+      if (message.chat_id === useChatStore.getState().chat?.id) {
+        useChatStore.getState().setCodeExecutionQueuePosition(message.tool_call_id, message.position);
+      }
+      break;
     case 'ChatOpenedServerMessage':
       useChatStore.setState({
         chat: message.chat,
@@ -99,6 +99,24 @@ export const NotifyAboutChatMutationServerMessageSchema = BaseServerMessageSchem
 
 export type NotifyAboutChatMutationServerMessage = z.infer<typeof NotifyAboutChatMutationServerMessageSchema>;
 
+export const BatchedMutationsServerMessageSchema = BaseServerMessageSchema.extend({
+  type: z.literal('BatchedMutationsServerMessage'),
+  request_id: z.string(),
+  chat_id: z.string(),
+  mutations: z.array(ChatMutationSchema),
+});
+
+export type BatchedMutationsServerMessage = z.infer<typeof BatchedMutationsServerMessageSchema>;
+
+export const CodeExecutionQueueServerMessageSchema = BaseServerMessageSchema.extend({
+  type: z.literal('CodeExecutionQueueServerMessage'),
+  chat_id: z.string(),
+  tool_call_id: z.string(),
+  position: z.number().nullable(), // null when the code is no longer waiting
+});
+
+export type CodeExecutionQueueServerMessage = z.infer<typeof CodeExecutionQueueServerMessageSchema>;
+
 export const ChatOpenedServerMessageSchema = BaseServerMessageSchema.extend({
   type: z.literal('ChatOpenedServerMessage'),
   chat: ChatSchema,
@@ -130,6 +148,8 @@ export const ServerMessageSchema = z.discriminatedUnion('type', [
   AssetsUpdatedServerMessageSchema,
   SettingsServerMessageSchema,
   NotifyAboutChatMutationServerMessageSchema,
+  BatchedMutationsServerMessageSchema,
+  CodeExecutionQueueServerMessageSchema,
   ChatOpenedServerMessageSchema,
   ResponseServerMessageSchema,
 ]);
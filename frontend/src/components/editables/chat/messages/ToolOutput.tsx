@@ -14,13 +14,38 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+import { ChatAPI } from '@/api/api/ChatAPI';
 import { useChatStore } from '@/store/editables/chat/useChatStore';
-import { AICToolCall } from '@/types/editables/chatTypes';
-import { useCallback, useState } from 'react';
+import { AICToolCall, CodeExecutionUsage } from '@/types/editables/chatTypes';
+import { useCallback, useEffect, useState } from 'react';
 import SyntaxHighlighter, { SyntaxHighlighterProps } from 'react-syntax-highlighter';
 import { duotoneDark as vs2015 } from 'react-syntax-highlighter/dist/cjs/styles/prism';
 import { EditableContentMessage } from './EditableContentMessage';
 
+const LIMIT_EXCEEDED_LABELS: Record<NonNullable<CodeExecutionUsage['limit_exceeded']>, string> = {
+  wall_time: 'time limit exceeded',
+  cpu_time: 'CPU time limit exceeded',
+  memory: 'memory limit exceeded',
+};
+
+function formatUsage(usage: CodeExecutionUsage) {
+  const parts = [`Ran for ${usage.duration.toFixed(1)}s`];
+  if (usage.cpu_time !== undefined && usage.cpu_time !== null) {
+    parts.push(`CPU ${usage.cpu_time.toFixed(1)}s`);
+  }
+  if (usage.interpreter_peak_rss !== undefined && usage.interpreter_peak_rss !== null) {
+    // Peak of the whole interpreter process, not only of this execution
+    parts.push(`interpreter peak memory ${Math.round(usage.interpreter_peak_rss / (1024 * 1024))} MB`);
+  }
+  if (usage.limit_exceeded) {
+    parts.push(LIMIT_EXCEEDED_LABELS[usage.limit_exceeded]);
+  }
+  if (usage.restarted) {
+    parts.push('interpreter restarted');
+  }
+  return parts.join(', ');
+}
+
 interface OutputProps {
   tool_call: AICToolCall;
   syntaxHighlighterCustomStyles?: SyntaxHighlighterProps['style'];
@@ -28,7 +53,22 @@ interface OutputProps {
 
 export function ToolOutput({ tool_call, syntaxHighlighterCustomStyles }: OutputProps) {
   const userMutateChat = useChatStore((state) => state.userMutateChat);
+  const chatId = useChatStore((state) => state.chat?.id);
+  const queuePosition = useChatStore((state) => state.codeExecutionQueuePositions[tool_call.id]);
   const [isEditing, setIsEditing] = useState(false);
+  const [fullOutput, setFullOutput] = useState<string | undefined>(undefined);
+
+  const output = fullOutput ?? tool_call.output ?? '';
+
+  useEffect(() => {
+    // Output changed (e.g. it's run again), a previously fetched full one is outdated
+    setFullOutput(undefined);
+  }, [tool_call.output]);
+
+  const handleShowFullOutput = useCallback(async () => {
+    if (!chatId) return;
+    setFullOutput(await ChatAPI.getToolCallOutput(chatId, tool_call.id));
+  }, [chatId, tool_call.id]);
 
   const handleAcceptedContent = useCallback(
     (content: string) => {
@@ -53,7 +93,7 @@ export function ToolOutput({ tool_call, syntaxHighlighterCustomStyles }: OutputP
     <div className="flex flex-col w-full mt-2">
       <span className="text-[15px] w-20 flex-none">Output: </span>
       <EditableContentMessage
-        initialContent={tool_call.output || ''}
+        initialContent={output}
         handleAcceptedContent={handleAcceptedContent}
         handleRemoveClick={handleRemoveClick}
         className="flex-grow"
@@ -62,11 +102,24 @@ export function ToolOutput({ tool_call, syntaxHighlighterCustomStyles }: OutputP
       >
         <SyntaxHighlighter
           style={syntaxHighlighterCustomStyles || vs2015}
-          children={tool_call.output || ''}
+          children={output}
           language={'text'}
           className="basis-0 flex-grow rounded-md p-2 overflow-auto"
         />
       </EditableContentMessage>
+      {tool_call.is_output_truncated && fullOutput === undefined && !tool_call.is_executing && (
+        <button className="self-start mt-1 text-[13px] text-gray-400 hover:text-white" onClick={handleShowFullOutput}>
+          Show full output
+        </button>
+      )}
+      {queuePosition !== undefined && tool_call.is_executing && (
+        <span className="mt-1 text-[13px] text-gray-400">
+          Waiting for other code to finish, {queuePosition} in the queue
+        </span>
+      )}
+      {tool_call.usage && !tool_call.is_executing && (
+        <span className="mt-1 text-[13px] text-gray-400">{formatUsage(tool_call.usage)}</span>
+      )}
     </div>
   );
 }
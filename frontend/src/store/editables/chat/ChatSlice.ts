@@ -26,11 +26,13 @@ export type ChatSlice = {
   lastUsedChat?: Chat;
   isChatLoading: boolean;
   isChatOptionsExpanded: boolean;
+  codeExecutionQueuePositions: Record<string, number>; // tool call id -> position in the queue of code executions
   setLastUsedChat: (chat?: Chat) => void;
   setChat: (chat: Chat) => void;
   renameChat: (newChat: Chat) => Promise<void>;
   setIsChatLoading: (isLoading: boolean) => void;
   setIsChatOptionsExpanded: (isExpanded: boolean) => void;
+  setCodeExecutionQueuePosition: (toolCallId: string, position: number | null) => void;
 };
 
 export const createChatSlice: StateCreator<ChatStore, [], [], ChatSlice> = (set, get) => ({
@@ -39,12 +41,13 @@ export const createChatSlice: StateCreator<ChatStore, [], [], ChatSlice> = (set,
   agent: undefined,
   lastUsedChat: undefined,
   isChatOptionsExpanded: true,
+  codeExecutionQueuePositions: {},
   materials: [],
   setLastUsedChat: (chat?: Chat) => {
     set({ lastUsedChat: chat });
   },
   setChat: (chat: Chat) => {
-    set({ chat });
+    set({ chat, codeExecutionQueuePositions: {} });
   },
   renameChat: async (newChat: Chat) => {
     await EditablesAPI.updateEditableObject('chat', newChat, newChat.id);
@@ -59,4 +62,13 @@ export const createChatSlice: StateCreator<ChatStore, [], [], ChatSlice> = (set,
   setIsChatOptionsExpanded: (isExpanded: boolean) => {
     set({ isChatOptionsExpanded: isExpanded });
   },
+  setCodeExecutionQueuePosition: (toolCallId: string, position: number | null) => {
+    const positions = { ...get().codeExecutionQueuePositions };
+    if (position === null) {
+      delete positions[toolCallId];
+    } else {
+      positions[toolCallId] = position;
+    }
+    set({ codeExecutionQueuePositions: positions });
+  },
 });
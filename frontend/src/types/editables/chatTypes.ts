@@ -1,6 +1,16 @@
 import { z } from 'zod';
 import { EditableObjectSchema, GPTRoleSchema } from './assetTypes'; // Import necessary types and schemas
 
+export const CodeExecutionUsageSchema = z.object({
+  duration: z.number(),
+  cpu_time: z.number().nullable().optional(),
+  interpreter_peak_rss: z.number().nullable().optional(),
+  limit_exceeded: z.enum(['wall_time', 'cpu_time', 'memory']).nullable().optional(),
+  restarted: z.boolean().optional(),
+});
+
+export type CodeExecutionUsage = z.infer<typeof CodeExecutionUsageSchema>;
+
 export const AICToolCallSchema = z.object({
   id: z.string(),
   language: z.string().optional(),
@@ -9,6 +19,8 @@ export const AICToolCallSchema = z.object({
   code: z.string(),
   headline: z.string(),
   output: z.string().optional(),
+  is_output_truncated: z.boolean().optional(),
+  usage: CodeExecutionUsageSchema.nullable().optional(),
 });
 
 export type AICToolCall = z.infer<typeof AICToolCallSchema>;